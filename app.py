@@ -11,8 +11,14 @@ import uuid
 import json
 from datetime import datetime
 import threading
-from video_summarizer_simple import VideoSummarizer
-from video_info import show_video_info
+from llm_cache import get_llm_cache
+from llm_hedging import hedged_stats
+from model_registry import get_registry
+from processing_tiers import PROCESSING_TIERS, select_tier
+from transcript_cache import get_transcript_cache
+from transcription_backends import available_backends
+from word_store import legacy_transcript
+from workspace import JobWorkspace
 import tempfile
 import shutil
 
@@ -24,6 +30,7 @@ app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
 UPLOAD_FOLDER = 'uploads'
 OUTPUT_FOLDER = 'output'
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm', 'm4v'}
+PARTIAL_TRANSCRIPT_LINES = 20
 
 # Ensure directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -55,7 +62,8 @@ def get_video_info(video_path):
     except Exception as e:
         return {'error': str(e)}
 
-def process_video_async(job_id, input_path, output_path, summary_type='auto', target_length='2_minutes'):
+def process_video_async(job_id, input_path, output_path, summary_type='auto', target_length='2_minutes',
+                        tier='auto', language=None, backend=None):
     """Process video in background thread"""
     try:
         processing_status[job_id] = {
@@ -65,13 +73,39 @@ def process_video_async(job_id, input_path, output_path, summary_type='auto', ta
             'start_time': datetime.now().isoformat()
         }
         
-        # Initialize summarizer
-        summarizer = VideoSummarizer()
-        processing_status[job_id]['progress'] = 20
-        processing_status[job_id]['stage'] = 'Extracting audio and generating timestamps...'
+        # Imported here so whisper/torch, moviepy and openai are only loaded
+        # once the first processing job starts, not when the app boots
+        from video_summarizer_simple import VideoSummarizer
         
-        # Process video
-        result = summarizer.process_video(input_path, output_path)
+        # Pick the speed/quality tier from the request or the video duration
+        duration = get_video_info(input_path).get('duration')
+        processing_tier = select_tier(tier, summary_type, target_length, duration)
+        processing_status[job_id]['tier'] = processing_tier['name']
+        processing_status[job_id]['partial_transcript'] = []
+        processing_status[job_id]['segments_transcribed'] = 0
+        
+        def on_segment(segment):
+            """Publish each transcribed segment as a live partial transcript"""
+            status = processing_status[job_id]
+            status['segments_transcribed'] += 1
+            # Only the latest lines are kept so status polls stay small
+            status['partial_transcript'] = (status['partial_transcript'] + [{
+                'start': round(segment['start'], 2),
+                'end': round(segment['end'], 2),
+                'text': segment['text'].strip()
+            }])[-PARTIAL_TRANSCRIPT_LINES:]
+            if duration:
+                status['progress'] = 20 + int(50 * min(1.0, segment['end'] / duration))
+        
+        # Initialize summarizer (the Whisper model is shared across jobs)
+        with VideoSummarizer(tier=processing_tier, backend=backend, target_length=target_length) as summarizer:
+            processing_status[job_id]['backend'] = summarizer.backend.name
+            processing_status[job_id]['progress'] = 20
+            processing_status[job_id]['stage'] = 'Extracting audio and generating timestamps...'
+            
+            # Process video (intermediate files live in a per-job workspace)
+            with JobWorkspace(job_id) as workspace:
+                result = summarizer.process_video(input_path, output_path, workspace, on_segment, language)
         
         processing_status[job_id]['progress'] = 100
         processing_status[job_id]['status'] = 'completed'
@@ -84,7 +118,10 @@ def process_video_async(job_id, input_path, output_path, summary_type='auto', ta
             'result': result,
             'completion_time': datetime.now().isoformat(),
             'summary_type': summary_type,
-            'target_length': target_length
+            'target_length': target_length,
+            'tier': processing_tier['name'],
+            'language': result['transcript'].get('language'),
+            'backend': processing_status[job_id]['backend']
         }
         
     except Exception as e:
@@ -110,6 +147,15 @@ def upload_file():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
+        tier = request.form.get('tier', 'auto')
+        if tier != 'auto' and tier not in PROCESSING_TIERS:
+            return jsonify({'error': f'Unknown processing tier: {tier}'}), 400
+        # Optional spoken-language hint; without one the language is detected
+        language = request.form.get('language', '').strip().lower() or None
+        backend = request.form.get('backend') or None
+        if backend and backend not in available_backends():
+            return jsonify({'error': f'Transcription backend not available: {backend}'}), 400
+        
         # Generate unique job ID
         job_id = str(uuid.uuid4())
         
@@ -131,7 +177,7 @@ def upload_file():
         # Start background processing
         thread = threading.Thread(
             target=process_video_async,
-            args=(job_id, input_path, output_path, summary_type, target_length)
+            args=(job_id, input_path, output_path, summary_type, target_length, tier, language, backend)
         )
         thread.daemon = True
         thread.start()
@@ -162,7 +208,9 @@ def get_status(job_id):
 def get_result(job_id):
     """Get processing result"""
     if job_id in completed_summaries:
-        return jsonify(completed_summaries[job_id])
+        summary = completed_summaries[job_id]
+        result = dict(summary['result'], transcript=legacy_transcript(summary['result']['transcript']))
+        return jsonify(dict(summary, result=result))
     else:
         return jsonify({'error': 'Result not found'}), 404
 
@@ -216,6 +264,24 @@ def api_status(job_id):
     """API endpoint for status checking"""
     return get_status(job_id)
 
+@app.route('/api/v1/models')
+def api_models():
+    """API endpoint reporting the shared models loaded in this process"""
+    return jsonify({'models': get_registry().stats()})
+
+@app.route('/api/v1/cache')
+def api_cache():
+    """API endpoint reporting transcript and LLM response cache usage and hit/miss counters"""
+    cache = get_transcript_cache()
+    llm_cache = get_llm_cache()
+    return jsonify({'transcript_cache': cache.stats() if cache else None,
+                    'llm_cache': llm_cache.stats() if llm_cache else None})
+
+@app.route('/api/v1/llm')
+def api_llm():
+    """API endpoint reporting hedged LLM requests (hedge rate, delay, secondary wins)"""
+    return jsonify({'hedging': hedged_stats()})
+
 @app.route('/samples')
 def samples():
     """Show sample videos gallery"""
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Audio Extraction
+Decodes a video's audio track once into a 16 kHz mono float32 file in the job
+workspace and exposes it as a memory-mapped buffer for every audio consumer
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+from typing import Optional
+
+SAMPLE_RATE = 16000
+AUDIO_FILENAME = 'audio_16k_f32le.pcm'
+
+
+def ffmpeg_binary() -> str:
+    """ffmpeg on PATH, or the copy bundled with imageio-ffmpeg (a moviepy dependency)"""
+    binary = os.getenv('FFMPEG_BINARY') or shutil.which('ffmpeg')
+    if binary:
+        return binary
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+class AudioBuffer:
+    """16 kHz mono float32 samples backed by a memory-mapped file"""
+
+    def __init__(self, path: str, sample_rate: int = SAMPLE_RATE):
+        import numpy as np
+
+        self.path = path
+        self.sample_rate = sample_rate
+        self._content_hash = None
+        if os.path.getsize(path) == 0:
+            # np.memmap can't map an empty file (video without an audio track)
+            self.samples = np.zeros(0, dtype=np.float32)
+        else:
+            # Copy-on-write so consumers like torch.from_numpy get a writable
+            # array without a private copy of the pages
+            self.samples = np.memmap(path, dtype=np.float32, mode='c')
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def content_hash(self) -> str:
+        """Hash of the decoded samples, identifying the audio regardless of container"""
+        if self._content_hash is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(str(self.sample_rate).encode())
+            block = self.sample_rate * 60
+            for start in range(0, len(self.samples), block):
+                digest.update(memoryview(self.samples[start:start + block]).cast('B'))
+            self._content_hash = digest.hexdigest()
+        return self._content_hash
+
+    def sample_index(self, seconds: float) -> int:
+        return max(0, min(len(self.samples), int(round(seconds * self.sample_rate))))
+
+    def window(self, start: float, end: Optional[float] = None):
+        """Zero-copy view of the samples between two timestamps (seconds)"""
+        stop = len(self.samples) if end is None else self.sample_index(end)
+        return self.samples[self.sample_index(start):stop]
+
+
+def extract_audio(media_path: str, workspace) -> AudioBuffer:
+    """Decode the audio track of `media_path` into the workspace (once per job)"""
+    path = workspace.path(AUDIO_FILENAME)
+    if os.path.exists(path):
+        return AudioBuffer(path)
+
+    print(f"Decoding audio track from {media_path}...")
+    tmp_path = f"{path}.tmp"
+    cmd = [
+        ffmpeg_binary(), '-nostdin', '-y', '-loglevel', 'error', '-threads', '0',
+        '-i', media_path,
+        '-map', '0:a:0?', '-vn',
+        '-ac', '1', '-ar', str(SAMPLE_RATE),
+        '-f', 'f32le', '-acodec', 'pcm_f32le',
+        tmp_path,
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        if 'does not contain any stream' in proc.stderr:
+            # No audio track: an empty buffer means "no speech" downstream
+            open(tmp_path, 'wb').close()
+        else:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise RuntimeError(f"Failed to decode audio from {media_path}: {proc.stderr.strip()}")
+
+    os.replace(tmp_path, path)
+    return AudioBuffer(path)
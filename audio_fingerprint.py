@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Audio Fingerprints
+Compact per-frame fingerprints of decoded audio that survive re-encoding and
+gain changes, used to find which regions of a new upload repeat audio that was
+transcribed before (a trimmed intro, an edit in one section), so only the new
+or changed regions need transcribing
+"""
+
+import glob
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from audio_extraction import SAMPLE_RATE
+
+# 128 ms frames at a 20 ms hop; the heavy overlap keeps codes stable when the
+# new audio is offset from the source by a fraction of a hop
+FRAME_SAMPLES = 2048
+HOP_SAMPLES = 320
+FRAMES_PER_SECOND = SAMPLE_RATE / HOP_SAMPLES
+# 17 log-spaced bands between these frequencies give 16 difference bits
+BAND_RANGE = (300.0, 3000.0)
+N_BANDS = 17
+# Regions are verified in 2 s blocks; unrelated audio sits near 50% bit errors
+BLOCK_FRAMES = 100
+MAX_BIT_ERROR_RATE = 0.3
+# Codes seen more often than this in a source (e.g. silence) don't vote
+MAX_CODE_REPEATS = 32
+# Offsets need this many exact code hits before they're verified
+MIN_VOTES = 20
+MAX_OFFSETS = 8
+# Source segments this close to the inner edge of a matched region are
+# transcribed again: regions are only block-accurate around an edit
+EDGE_MARGIN = 0.5
+# Uncovered stretches shorter than this aren't worth a Whisper call
+MIN_GAP = 0.5
+# The uncovered stretches, glued together for transcription
+GAPS_FILENAME = 'gaps_16k_f32le.pcm'
+
+
+def incremental_enabled() -> bool:
+    return os.getenv('INCREMENTAL_TRANSCRIPTION', '1').lower() not in ('0', 'false', 'no')
+
+
+def fingerprint(samples):
+    """uint16 code per 20 ms frame: the signs of the band-energy differences
+    between neighbouring bands, differentiated over time"""
+    import numpy as np
+
+    n_frames = (len(samples) - FRAME_SAMPLES) // HOP_SAMPLES + 1
+    if n_frames <= 1:
+        return np.zeros(0, dtype=np.uint16)
+
+    frequencies = np.fft.rfftfreq(FRAME_SAMPLES, 1.0 / SAMPLE_RATE)
+    edges = np.geomspace(BAND_RANGE[0], BAND_RANGE[1], N_BANDS + 1)
+    band_of_bin = np.digitize(frequencies, edges) - 1
+    # One-hot (FFT bin x band) matrix summing bin powers into bands
+    bands = np.zeros((len(frequencies), N_BANDS), dtype=np.float32)
+    in_band = (band_of_bin >= 0) & (band_of_bin < N_BANDS)
+    bands[np.flatnonzero(in_band), band_of_bin[in_band]] = 1.0
+    window = np.hanning(FRAME_SAMPLES).astype(np.float32)
+
+    energies = np.empty((n_frames, N_BANDS), dtype=np.float32)
+    # Blocks of frames keep the strided view and FFT output bounded in memory
+    block = 4096
+    for first in range(0, n_frames, block):
+        last = min(n_frames, first + block)
+        chunk = np.asarray(samples[first * HOP_SAMPLES:(last - 1) * HOP_SAMPLES + FRAME_SAMPLES], dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(chunk, FRAME_SAMPLES)[::HOP_SAMPLES]
+        power = (np.abs(np.fft.rfft(frames * window, axis=1)) ** 2).astype(np.float32)
+        energies[first:last] = np.log10(power @ bands + 1e-10)
+
+    band_difference = energies[:, :-1] - energies[:, 1:]
+    bits = np.zeros_like(band_difference, dtype=bool)
+    bits[1:] = (band_difference[1:] - band_difference[:-1]) > 0
+    return np.packbits(bits, axis=1, bitorder='little').view(np.uint16).ravel()
+
+
+def _candidate_offsets(codes, source) -> List[int]:
+    """Frame offsets d (codes[t] ~ source[t + d]) backed by the most exact code hits"""
+    import numpy as np
+
+    order = np.argsort(source, kind='stable')
+    ordered = source[order]
+    lo = np.searchsorted(ordered, codes, side='left')
+    counts = np.searchsorted(ordered, codes, side='right') - lo
+    voting = (counts > 0) & (counts <= MAX_CODE_REPEATS) & (codes != 0)
+    if not voting.any():
+        return []
+
+    counts = counts[voting]
+    frames = np.repeat(np.flatnonzero(voting), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    positions = order[np.repeat(lo[voting], counts) + within]
+    offsets = positions - frames
+
+    shift = offsets.min()
+    votes = np.bincount(offsets - shift)
+    candidates = []
+    for index in np.argsort(votes)[::-1]:
+        if votes[index] < MIN_VOTES or len(candidates) >= MAX_OFFSETS:
+            break
+        # Neighbouring offsets are the same alignment smeared by a frame
+        if all(abs(index + shift - offset) > 2 for offset in candidates):
+            candidates.append(int(index + shift))
+    return candidates
+
+
+def _block_error_rates(codes, source, offset: int):
+    """Bit error rate of each BLOCK_FRAMES block of `codes` against `source`
+    shifted by `offset` (1.0 where the source doesn't cover the block)"""
+    import numpy as np
+
+    n_blocks = len(codes) // BLOCK_FRAMES
+    rates = np.ones(n_blocks)
+    for block in range(n_blocks):
+        first = block * BLOCK_FRAMES
+        source_first = first + offset
+        if source_first < 0 or source_first + BLOCK_FRAMES > len(source):
+            continue
+        difference = codes[first:first + BLOCK_FRAMES] ^ source[source_first:source_first + BLOCK_FRAMES]
+        rates[block] = np.unpackbits(difference.view(np.uint8)).mean()
+    return rates
+
+
+def match_regions(codes, source) -> List[Tuple[float, float, float]]:
+    """Regions of the new audio that repeat the source, as (start, end, offset)
+    seconds where new time t corresponds to source time t + offset.
+
+    Regions never overlap; each block goes to the offset matching it best.
+    """
+    import numpy as np
+
+    n_blocks = len(codes) // BLOCK_FRAMES
+    if n_blocks == 0 or len(source) < BLOCK_FRAMES:
+        return []
+    offsets = _candidate_offsets(codes, source)
+    if not offsets:
+        return []
+
+    rates = np.stack([_block_error_rates(codes, source, offset) for offset in offsets])
+    best = rates.argmin(axis=0)
+    matched = rates[best, np.arange(n_blocks)] <= MAX_BIT_ERROR_RATE
+
+    regions = []
+    for block in range(n_blocks):
+        if not matched[block]:
+            continue
+        offset = offsets[best[block]]
+        if regions and regions[-1][1] == block and regions[-1][2] == offset:
+            regions[-1][1] = block + 1
+        else:
+            regions.append([block, block + 1, offset])
+    return [(first * BLOCK_FRAMES / FRAMES_PER_SECOND, last * BLOCK_FRAMES / FRAMES_PER_SECOND,
+             offset / FRAMES_PER_SECOND) for first, last, offset in regions]
+
+
+def plan_reuse(source_segments: List[Dict], regions: List[Tuple[float, float, float]], duration: float,
+               margin: float = EDGE_MARGIN) -> Tuple[List[Dict], List[Tuple[float, float]]]:
+    """(reused, gaps): the source segments lying inside a matched region,
+    moved onto the new timeline, and the (start, end) ranges of the new audio
+    they leave to transcribe. Gaps run from one reused segment's end to the
+    next one's start, so they begin and end at pauses the source saw."""
+    from chunked_transcription import shift_result
+
+    reused = []
+    for start, end, offset in regions:
+        # Edges at the ends of the new audio aren't edits
+        low = start + offset + (margin if start > 0 else 0.0)
+        high = end + offset - (margin if end < duration else 0.0)
+        inside = [segment for segment in source_segments if segment['start'] >= low and segment['end'] <= high]
+        reused.extend(shift_result({'segments': inside}, -offset)['segments'])
+    reused.sort(key=lambda segment: segment['start'])
+
+    gaps = []
+    position = 0.0
+    for segment in reused + [{'start': duration, 'end': duration}]:
+        if segment['start'] - position >= MIN_GAP:
+            gaps.append((round(position, 3), round(min(segment['start'], duration), 3)))
+        position = max(position, segment['end'])
+    return reused, gaps
+
+
+def fingerprint_cache_max_bytes() -> int:
+    return int(float(os.getenv('FINGERPRINT_CACHE_MAX_MB', '100')) * 1024 * 1024)
+
+
+class FingerprintIndex:
+    """Fingerprints of transcribed audio, stored next to the transcript cache.
+
+    Each entry is the fingerprint of one cached transcript (named by its
+    transcript key) plus the transcription profile it was made with, so only
+    sources transcribed the same way are reused. Like the transcript cache it
+    is bounded by size, evicting the least recently added or reused entries.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = None):
+        self.directory = directory
+        self.max_bytes = max_bytes if max_bytes is not None else fingerprint_cache_max_bytes()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, key: str, profile: str, codes, duration: float):
+        """Store a fingerprint atomically, then evict down to the size bound"""
+        import numpy as np
+
+        path = os.path.join(self.directory, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            np.save(f"{tmp_path}.npy", codes)
+            os.replace(f"{tmp_path}.npy", f"{path}.npy")
+            with open(tmp_path, 'w') as f:
+                json.dump({'key': key, 'profile': profile, 'duration': duration}, f)
+            os.replace(tmp_path, f"{path}.json")
+        self.evict()
+
+    def remove(self, key: str):
+        for extension in ('.npy', '.json'):
+            try:
+                os.remove(os.path.join(self.directory, key + extension))
+            except OSError:
+                pass
+
+    def touch(self, key: str):
+        """Mark an entry as recently used (it was just reused)"""
+        try:
+            os.utime(os.path.join(self.directory, f"{key}.json"))
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the index fits in max_bytes"""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            key = os.path.basename(path)[:-len('.json')]
+            try:
+                mtime = os.path.getmtime(path)
+                size = os.path.getsize(path) + os.path.getsize(os.path.join(self.directory, f"{key}.npy"))
+            except OSError:
+                continue
+            entries.append((mtime, size, key))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def candidates(self, profile: str, limit: int = 20) -> List[Dict]:
+        """Most recently added sources transcribed with `profile`"""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+                entry['mtime'] = os.path.getmtime(path)
+            except (OSError, ValueError):
+                continue
+            if entry.get('profile') == profile:
+                entries.append(entry)
+        entries.sort(key=lambda entry: entry['mtime'], reverse=True)
+        return entries[:limit]
+
+    def load(self, key: str):
+        import numpy as np
+
+        try:
+            return np.load(os.path.join(self.directory, f"{key}.npy"))
+        except (OSError, ValueError):
+            return None
+
+    def find_source(self, codes, profile: str) -> Optional[Tuple[str, List[Tuple[float, float, float]]]]:
+        """(transcript key, matched regions) of the earlier source sharing the
+        most audio with `codes`, or None"""
+        best = None
+        for entry in self.candidates(profile):
+            source = self.load(entry['key'])
+            if source is None:
+                continue
+            regions = match_regions(codes, source)
+            covered = sum(end - start for start, end, _ in regions)
+            if covered > 0 and (best is None or covered > best[0]):
+                best = (covered, entry['key'], regions)
+        return (best[1], best[2]) if best else None
+
+
+def get_fingerprint_index() -> Optional[FingerprintIndex]:
+    """Index living beside the transcript cache, or None when the cache or
+    incremental transcription is disabled"""
+    from transcript_cache import transcript_cache_dir
+
+    directory = transcript_cache_dir()
+    if not directory or not incremental_enabled():
+        return None
+    return FingerprintIndex(os.path.join(directory, 'fingerprints'))
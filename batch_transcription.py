@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Batched Whisper Transcription
+Transcribes many short inputs together: every input is cut at quiet points
+into windows of up to 30 s and the windows of all inputs are decoded in
+batched forward passes, instead of one input (and one window) at a time with
+the model idle in between
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from chunked_transcription import find_split_points, merge_results
+
+# Whisper's own thresholds for retrying a window at a higher temperature and
+# for treating it as silence
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+# Windows are cut within SPLIT_SEARCH_SECONDS of every WINDOW_SECONDS; with
+# find_split_points' tail of at most 1.5 chunks, none exceeds Whisper's 30 s
+WINDOW_SECONDS = 20.0
+SPLIT_SEARCH_SECONDS = 5.0
+
+
+def default_batch_size() -> int:
+    return int(os.getenv('TRANSCRIBE_BATCH_SIZE', '8'))
+
+
+def plan_windows(audios: List) -> List[Tuple[int, float, float]]:
+    """(input index, start, end) of the windows covering every input, cut at
+    the quietest point near every WINDOW_SECONDS so no word straddles a cut"""
+    from whisper.audio import SAMPLE_RATE
+
+    windows = []
+    for index, samples in enumerate(audios):
+        duration = len(samples) / SAMPLE_RATE
+        bounds = [0.0] + find_split_points(samples, WINDOW_SECONDS, SAMPLE_RATE, SPLIT_SEARCH_SECONDS) + [duration]
+        windows.extend((index, start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start)
+    return windows
+
+
+def _split_segments(result, tokenizer, window_duration: float) -> List[Dict]:
+    """Segments of one decoded window, split at its timestamp tokens as
+    whisper.transcribe does"""
+    from whisper.audio import HOP_LENGTH, SAMPLE_RATE
+
+    time_precision = 2 * HOP_LENGTH / SAMPLE_RATE
+    tokens = list(result.tokens)
+    timestamp_begin = tokenizer.timestamp_begin
+    is_timestamp = [token >= timestamp_begin for token in tokens]
+
+    def segment(start: float, end: float, segment_tokens: List[int]) -> Dict:
+        return {
+            'seek': 0,
+            'start': round(min(start, window_duration), 3),
+            'end': round(min(end, window_duration), 3),
+            'text': tokenizer.decode([token for token in segment_tokens if token < tokenizer.eot]),
+            'tokens': segment_tokens,
+            'temperature': result.temperature,
+            'avg_logprob': result.avg_logprob,
+            'compression_ratio': result.compression_ratio,
+            'no_speech_prob': result.no_speech_prob,
+        }
+
+    consecutive = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+    if consecutive:
+        if is_timestamp[-2:] == [False, True]:
+            consecutive.append(len(tokens))
+        segments = []
+        last = 0
+        for current in consecutive:
+            sliced = tokens[last:current]
+            segments.append(segment((sliced[0] - timestamp_begin) * time_precision,
+                                    (sliced[-1] - timestamp_begin) * time_precision, sliced))
+            last = current
+        return segments
+
+    end = window_duration
+    timestamps = [token for token in tokens if token >= timestamp_begin]
+    if timestamps and timestamps[-1] != timestamp_begin:
+        end = (timestamps[-1] - timestamp_begin) * time_precision
+    return [segment(0.0, end, tokens)]
+
+
+def _decoding_options(options: Dict, temperature: float, fp16: bool):
+    import whisper
+
+    return whisper.DecodingOptions(
+        task=options.get('task', 'transcribe'),
+        language=options.get('language'),
+        temperature=temperature,
+        # Beam search for the greedy pass, sampling for the fallback passes
+        beam_size=options.get('beam_size') if temperature == 0 else None,
+        best_of=options.get('best_of') if temperature > 0 else None,
+        fp16=fp16,
+    )
+
+
+def _needs_fallback(result) -> bool:
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return False
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def transcribe_batch(model, audios: List, options: Dict, batch_size: int = None,
+                     languages: List[Optional[str]] = None) -> List[Dict]:
+    """Whisper-style results ({'text', 'segments', 'language'}) for a list of
+    16 kHz sample arrays, decoding up to `batch_size` windows (of up to 30 s,
+    see plan_windows) per forward pass; segments are merged across the cuts
+    as chunked_transcription merges chunks.
+
+    Windows are decoded independently (no previous-text prompt), each at the
+    first temperature of `options['temperature']`, with batched retries at the
+    next temperatures for windows that fail Whisper's quality thresholds.
+    `languages` fixes each input's language (default: `options['language']`,
+    None detects it per window); a forward pass only mixes windows of one
+    language.
+    """
+    import numpy as np
+    import torch
+    import whisper
+    from whisper.audio import HOP_LENGTH, SAMPLE_RATE
+    from whisper.timing import add_word_timestamps
+    from whisper.tokenizer import get_tokenizer
+
+    batch_size = batch_size or default_batch_size()
+    temperatures = options.get('temperature', (0.0,))
+    temperatures = temperatures if isinstance(temperatures, (list, tuple)) else (temperatures,)
+    parameter = next(model.parameters())
+    fp16 = parameter.dtype == torch.float16
+
+    languages = languages or [options.get('language')] * len(audios)
+    windows = plan_windows(audios)
+    # Window indices grouped by language, in input order within a language
+    groups: Dict[Optional[str], List[int]] = {}
+    for position, (index, _, _) in enumerate(windows):
+        groups.setdefault(languages[index], []).append(position)
+    batches = [(language, positions[start:start + batch_size])
+               for language, positions in groups.items() for start in range(0, len(positions), batch_size)]
+
+    window_results: List[Optional[Dict]] = [None] * len(windows)
+    for language, positions in batches:
+        batch = [windows[position] for position in positions]
+        batch_options = dict(options, language=language)
+        samples = [np.ascontiguousarray(audios[index][int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)],
+                                        dtype=np.float32) for index, start, end in batch]
+        mel = torch.stack([whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(window)),
+                                                       model.dims.n_mels) for window in samples])
+        mel = mel.to(device=parameter.device, dtype=parameter.dtype)
+
+        decoded = whisper.decode(model, mel, _decoding_options(batch_options, temperatures[0], fp16))
+        for temperature in temperatures[1:]:
+            retry = [i for i, result in enumerate(decoded) if _needs_fallback(result)]
+            if not retry:
+                break
+            retry_options = _decoding_options(batch_options, temperature, fp16)
+            if (retry_options.best_of or 1) > 1:
+                # Sampling best_of candidates per window fails on batches of
+                # more than one window (the cross-attention keys aren't
+                # repeated per candidate), so these retries go one at a time
+                retried = [whisper.decode(model, mel[i], retry_options) for i in retry]
+            else:
+                retried = whisper.decode(model, mel[retry], retry_options)
+            for i, result in zip(retry, retried):
+                decoded[i] = result
+
+        for i, result in enumerate(decoded):
+            window_duration = len(samples[i]) / SAMPLE_RATE
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                segments = []
+            else:
+                tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                          language=result.language, task='transcribe')
+                segments = _split_segments(result, tokenizer, window_duration)
+                if options.get('word_timestamps', True) and any(segment['tokens'] for segment in segments):
+                    add_word_timestamps(segments=segments, model=model, tokenizer=tokenizer, mel=mel[i],
+                                        num_frames=len(samples[i]) // HOP_LENGTH, last_speech_timestamp=0.0)
+            window_results[positions[i]] = {
+                'text': ''.join(segment['text'] for segment in segments),
+                'segments': segments,
+                'language': result.language,
+            }
+
+    # Back to one result per input, on its own timeline
+    per_input = [[] for _ in audios]
+    for (index, start, end), result in zip(windows, window_results):
+        per_input[index].append((start, end, result))
+    return [merge_results(chunks) for chunks in per_input]
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Transcription Backend Benchmark
+Compares the installed transcription backends on a local corpus of video or
+audio files: real-time factor and word-timestamp accuracy against reference
+word timings (a <name>.words.json next to each file) or a reference backend
+"""
+
+import argparse
+import difflib
+import json
+import os
+import re
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from audio_extraction import extract_audio
+from model_registry import get_registry
+from processing_tiers import get_tier
+from transcription_backends import available_backends, get_backend
+from workspace import JobWorkspace
+
+MEDIA_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v', '.wav', '.mp3', '.flac', '.m4a'}
+# A word counts as well-placed when both its edges are this close to the reference
+TOLERANCE_SECONDS = 0.2
+
+
+def corpus_files(path: str) -> List[str]:
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS
+    )
+
+
+def reference_words(media_path: str) -> Optional[List[Dict]]:
+    """Hand-checked word timings stored as <media>.words.json, if present"""
+    path = os.path.splitext(media_path)[0] + '.words.json'
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", '', word.lower())
+
+
+def timestamp_errors(words: List[Dict], reference: List[Dict]) -> Dict:
+    """Align hypothesis words to reference words by text, then compare timings"""
+    matcher = difflib.SequenceMatcher(a=[_normalize(w['word']) for w in reference],
+                                      b=[_normalize(w['word']) for w in words], autojunk=False)
+    errors = []
+    for block in matcher.get_matching_blocks():
+        for i in range(block.size):
+            ref, hyp = reference[block.a + i], words[block.b + i]
+            errors.append(max(abs(hyp['start'] - ref['start']), abs(hyp['end'] - ref['end'])))
+    return {
+        'matched': len(errors) / len(reference) if reference else 0.0,
+        'mean_error': statistics.mean(errors) if errors else None,
+        'within_tolerance': sum(e <= TOLERANCE_SECONDS for e in errors) / len(errors) if errors else None,
+    }
+
+
+def transcribe_words(backend_name: str, model_size: str, audio, options: Dict) -> Dict:
+    """Transcribe one buffer and return its words in the common schema plus timings"""
+    backend = get_backend(backend_name)
+    with get_registry().acquire(model_size, backend=backend_name) as handle:
+        start = time.perf_counter()
+        result = backend.transcribe(handle.model, audio.samples, options)
+        elapsed = time.perf_counter() - start
+    words = [word for segment in result['segments']
+             for word in backend.format_segment(segment).get('words', [])]
+    return {'words': words, 'elapsed': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcription backends")
+    parser.add_argument('corpus', help="Media file or directory of media files")
+    parser.add_argument('--backends', default=None,
+                        help="Comma-separated backends (default: every installed backend)")
+    parser.add_argument('--tier', default='standard', help="Tier whose model size and decoding to use")
+    parser.add_argument('--model', default=None, help="Override the tier's Whisper model size")
+    parser.add_argument('--language', default='en', help="Fixed decoding language")
+    parser.add_argument('--reference', default='whisper_timestamped',
+                        help="Backend whose word timings serve as reference when a file has none")
+    args = parser.parse_args()
+
+    tier = get_tier(args.tier)
+    model_size = args.model or tier['whisper_model']
+    backends = args.backends.split(',') if args.backends else available_backends()
+    files = corpus_files(args.corpus)
+    print(f"\n=== {len(files)} files, model {model_size}, backends: {', '.join(backends)} ===")
+
+    totals = {name: {'elapsed': 0.0, 'errors': [], 'matched': [], 'within': []} for name in backends}
+    audio_seconds = 0.0
+    for media_path in files:
+        reference = reference_words(media_path)
+        names = list(backends)
+        if reference is None and args.reference not in names:
+            names.append(args.reference)
+
+        with JobWorkspace() as workspace:
+            audio = extract_audio(media_path, workspace)
+            audio_seconds += audio.duration
+
+            runs = {}
+            for name in names:
+                options = get_backend(name).decode_options(tier['decode_options'], args.language)
+                # Warm-up so model loading isn't billed to the first file
+                get_registry().acquire(model_size, backend=name).release()
+                runs[name] = transcribe_words(name, model_size, audio, options)
+
+        source = 'reference file'
+        if reference is None:
+            reference, source = runs[args.reference]['words'], args.reference
+        print(f"\n{os.path.basename(media_path)} ({audio.duration:.0f}s, timings vs {source}):")
+        for name in backends:
+            run = runs[name]
+            accuracy = timestamp_errors(run['words'], reference)
+            totals[name]['elapsed'] += run['elapsed']
+            totals[name]['matched'].append(accuracy['matched'])
+            if accuracy['mean_error'] is not None:
+                totals[name]['errors'].append(accuracy['mean_error'])
+                totals[name]['within'].append(accuracy['within_tolerance'])
+            mean_error = f"{accuracy['mean_error'] * 1000:.0f} ms" if accuracy['mean_error'] is not None else 'n/a'
+            print(f"  {name:22s} {run['elapsed']:7.1f}s  RTF {run['elapsed'] / max(audio.duration, 1e-9):.3f}  "
+                  f"words matched {accuracy['matched']:5.1%}  mean edge error {mean_error}")
+
+    print(f"\n{'backend':22s} {'RTF':>7s} {'matched':>8s} {'edge err':>9s} {'<=' + str(int(TOLERANCE_SECONDS * 1000)) + 'ms':>8s}")
+    for name in backends:
+        total = totals[name]
+        rtf = total['elapsed'] / max(audio_seconds, 1e-9)
+        error = f"{statistics.mean(total['errors']) * 1000:.0f} ms" if total['errors'] else 'n/a'
+        within = f"{statistics.mean(total['within']):.1%}" if total['within'] else 'n/a'
+        print(f"{name:22s} {rtf:7.3f} {statistics.mean(total['matched']):8.1%} {error:>9s} {within:>8s}")
+
+
+if __name__ == "__main__":
+    main()
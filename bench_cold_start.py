@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Model Cold-Start Benchmark
+Compares loading Whisper from its checkpoint (whisper.load_model) against the
+memory-mapped model cache, each in a fresh process, and shows how much memory
+concurrent processes share when they map the same cache file
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+LOAD_SNIPPET = """
+import json, sys, time
+import torch, whisper
+sys.path.insert(0, {repo!r})
+import model_cache
+
+def memory():
+    info = {{}}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    info[key.lower()] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return info
+
+start = time.perf_counter()
+if {mode!r} == 'checkpoint':
+    model = whisper.load_model({size!r}, device={device!r})
+else:
+    model = model_cache.load_model_cache({cache!r}, device={device!r})
+load_time = time.perf_counter() - start
+
+# Touch every weight once so lazily-paged mmap loads aren't flattered
+mel = torch.zeros(1, model.dims.n_mels, 3000, device={device!r},
+                  dtype=next(model.parameters()).dtype)
+with torch.no_grad():
+    model.encoder(mel)
+first_forward = time.perf_counter() - start - load_time
+
+if {hold!r}:
+    print(json.dumps({{'ready': True}}), flush=True)
+    sys.stdin.readline()
+print(json.dumps({{'load_time': load_time, 'first_forward': first_forward, **memory()}}), flush=True)
+"""
+
+
+def run_load(mode: str, size: str, device: str, cache: str, hold: bool = False):
+    """Start a fresh interpreter that loads the model one way"""
+    snippet = LOAD_SNIPPET.format(repo=os.path.dirname(os.path.abspath(__file__)), mode=mode,
+                                  size=size, device=device, cache=cache, hold=hold)
+    return subprocess.Popen([sys.executable, '-c', snippet], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, text=True)
+
+
+def collect(proc) -> dict:
+    out, _ = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError("Benchmark subprocess failed")
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def ensure_cache(size: str, device: str, dtype: str) -> str:
+    """Build the mmap cache file from the checkpoint if it doesn't exist yet"""
+    import model_cache
+    directory = model_cache.cache_dir() or os.path.join('output', 'model_cache')
+    path = model_cache.cache_path(size, device, dtype, directory=directory)
+    if not os.path.exists(path):
+        import whisper
+        print(f"Building model cache {path}...")
+        model = whisper.load_model(size, device=device)
+        model_cache.save_model_cache(model, path, dtype)
+    return path
+
+
+def mb(value) -> str:
+    return f"{value / (1024 * 1024):8.1f}" if value is not None else "     n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper cold-start load paths")
+    parser.add_argument('--size', default='base', help="Model size or checkpoint path")
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--dtype', default=None, help="Cache dtype (default: per device)")
+    parser.add_argument('--runs', type=int, default=3, help="Fresh-process loads per path")
+    parser.add_argument('--processes', type=int, default=4,
+                        help="Concurrent processes for the memory sharing test")
+    args = parser.parse_args()
+
+    import model_cache
+    dtype = args.dtype or model_cache.default_dtype(args.device)
+    cache = ensure_cache(args.size, args.device, dtype)
+
+    print(f"\n=== Cold start: whisper {args.size} on {args.device} ({dtype} cache) ===")
+    print(f"{'path':12s} {'load s':>8s} {'+forward s':>11s} {'RSS MB':>8s} {'PSS MB':>8s}")
+    medians = {}
+    for mode in ('checkpoint', 'mmap'):
+        results = [collect(run_load(mode, args.size, args.device, cache)) for _ in range(args.runs)]
+        load = statistics.median(r['load_time'] for r in results)
+        forward = statistics.median(r['first_forward'] for r in results)
+        medians[mode] = load + forward
+        print(f"{mode:12s} {load:8.3f} {forward:11.3f} {mb(results[-1].get('rss'))} "
+              f"{mb(results[-1].get('pss'))}")
+    print(f"\nSpeedup (load + first forward): {medians['checkpoint'] / medians['mmap']:.1f}x")
+
+    print(f"\n=== {args.processes} concurrent processes ===")
+    for mode in ('checkpoint', 'mmap'):
+        procs = [run_load(mode, args.size, args.device, cache, hold=True) for _ in range(args.processes)]
+        # Wait until every process has its model loaded before sampling memory
+        for proc in procs:
+            proc.stdout.readline()
+        for proc in procs:
+            proc.stdin.write('\n')
+            proc.stdin.flush()
+        results = [collect(proc) for proc in procs]
+        total_rss = sum(r.get('rss', 0) for r in results)
+        total_pss = sum(r.get('pss', 0) for r in results)
+        print(f"{mode:12s} total RSS {mb(total_rss)} MB   total PSS {mb(total_pss)} MB")
+
+
+if __name__ == "__main__":
+    main()
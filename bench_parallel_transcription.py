@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Parallel Transcription Benchmark
+Measures wall-clock speedup of chunked multi-process transcription against the
+number of worker processes on a local video or audio file
+"""
+
+import argparse
+import os
+import time
+
+from audio_extraction import extract_audio
+from chunked_transcription import default_chunk_seconds, plan_chunks, transcribe_parallel
+from model_registry import get_registry
+from workspace import JobWorkspace
+
+
+def transcribe_single(audio, model_size: str, options: dict) -> float:
+    """Baseline: one Whisper call over the whole buffer in this process"""
+    with get_registry().acquire(model_size) as handle:
+        start = time.perf_counter()
+        handle.model.transcribe(audio.samples, **options)
+        return time.perf_counter() - start
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark chunked parallel transcription")
+    parser.add_argument('media', help="Video or audio file to transcribe")
+    parser.add_argument('--model', default='base', help="Whisper model size")
+    parser.add_argument('--chunk-minutes', type=float, default=default_chunk_seconds() / 60)
+    parser.add_argument('--workers', default=None,
+                        help="Comma-separated worker counts (default: powers of two up to the core count)")
+    parser.add_argument('--skip-baseline', action='store_true',
+                        help="Don't run the single-process baseline")
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(',')]
+    else:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpu_count:
+            worker_counts.append(worker_counts[-1] * 2)
+
+    options = {'word_timestamps': True}
+    chunk_seconds = args.chunk_minutes * 60
+
+    with JobWorkspace() as workspace:
+        audio = extract_audio(args.media, workspace)
+        chunks = plan_chunks(audio, chunk_seconds)
+        print(f"\n=== {os.path.basename(args.media)}: {audio.duration / 60:.1f} min, "
+              f"{len(chunks)} chunks of ~{args.chunk_minutes:g} min, {cpu_count} cores ===")
+
+        baseline = None
+        if not args.skip_baseline:
+            baseline = transcribe_single(audio, args.model, options)
+            print(f"Single process: {baseline:.1f}s (RTF {baseline / audio.duration:.3f})")
+
+        print(f"\n{'workers':>8s} {'wall s':>9s} {'RTF':>7s} {'speedup':>8s} {'efficiency':>11s}")
+        for workers in worker_counts:
+            start = time.perf_counter()
+            transcribe_parallel(audio, 'whisper', args.model, options,
+                                workers=workers, chunk_seconds=chunk_seconds)
+            elapsed = time.perf_counter() - start
+            # Without a baseline, speedup is relative to the first worker count
+            baseline = baseline or elapsed
+            speedup = baseline / elapsed
+            print(f"{workers:8d} {elapsed:9.1f} {elapsed / audio.duration:7.3f} "
+                  f"{speedup:7.2f}x {speedup / workers:10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+Measures how long it takes to import the web app and what each module costs,
+and fails if heavy ML/video modules get pulled in at startup again
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# Modules that must only be loaded by processing jobs, never by `import app`
+HEAVY_MODULES = ['torch', 'whisper', 'whisper_timestamped', 'faster_whisper', 'moviepy.editor', 'openai', 'numpy']
+
+CHECK_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run_import(module: str) -> Dict:
+    """Import a module in a fresh interpreter with -X importtime"""
+    snippet = CHECK_SNIPPET.format(module=module, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', snippet],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    wall_time = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    lines = proc.stdout.strip().splitlines()
+    return {
+        'module': module,
+        'import_time': float(lines[0]),
+        'process_time': wall_time,
+        'heavy_loaded': [m for m in lines[1].split(',') if m] if len(lines) > 1 else [],
+        'modules': parse_importtime(proc.stderr),
+    }
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse `-X importtime` output into per-module self/cumulative times (ms)"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        # importtime indents nested imports by two spaces after one leading space
+        name = name[1:]
+        modules.append({
+            'name': name.strip(),
+            'depth': (len(name) - len(name.lstrip())) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+        })
+    return modules
+
+
+def print_report(result: Dict, top: int):
+    """Print the slowest top-level imports for one module"""
+    print(f"\n=== import {result['module']} ===")
+    print(f"Import time:  {result['import_time'] * 1000:.1f} ms")
+    print(f"Process time: {result['process_time'] * 1000:.1f} ms (interpreter start + import)")
+    heavy = ', '.join(result['heavy_loaded']) or 'none'
+    print(f"Heavy modules loaded: {heavy}")
+
+    top_level = [m for m in result['modules'] if m['depth'] <= 1]
+    top_level.sort(key=lambda m: m['cumulative_ms'], reverse=True)
+    print(f"\n{'module':40s} {'self ms':>10s} {'cumul. ms':>10s}")
+    for mod in top_level[:top]:
+        print(f"{mod['name']:40s} {mod['self_ms']:10.1f} {mod['cumulative_ms']:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark application startup imports")
+    parser.add_argument('modules', nargs='*', default=['app'],
+                        help="Modules to import (default: app)")
+    parser.add_argument('--top', type=int, default=15, help="Number of slowest imports to show")
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help="Fail if any module takes longer than this to import")
+    parser.add_argument('--allow-heavy', action='store_true',
+                        help="Don't fail when heavy ML/video modules are imported")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        result = run_import(module)
+        print_report(result, args.top)
+
+        if result['heavy_loaded'] and not args.allow_heavy:
+            failures.append(f"{module} imports {', '.join(result['heavy_loaded'])} at startup")
+        if args.max_ms is not None and result['import_time'] * 1000 > args.max_ms:
+            failures.append(f"{module} took {result['import_time'] * 1000:.1f} ms "
+                            f"(budget {args.max_ms:.1f} ms)")
+
+    if failures:
+        print("\n❌ Startup regressions:")
+        for failure in failures:
+            print(f"   • {failure}")
+        sys.exit(1)
+
+    print("\n✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
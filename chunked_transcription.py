@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Chunked Transcription
+Splits decoded job audio at low-energy points into chunks of a few minutes,
+transcribes the chunks in parallel worker processes and merges the results
+back into one Whisper-style result with timestamps on the original timeline
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from audio_extraction import SAMPLE_RATE, AudioBuffer
+from vad import frame_energy
+from workspace import to_json_safe
+
+FRAME_SECONDS = 0.01
+SMOOTHING_SECONDS = 0.2
+# Whisper's 'seek' counts 10 ms mel frames
+MEL_FRAMES_PER_SECOND = 100
+
+
+def default_chunk_seconds() -> float:
+    return float(os.getenv('TRANSCRIBE_CHUNK_MINUTES', '10')) * 60
+
+
+def stream_chunk_seconds() -> float:
+    """Window length for streaming transcription in a single process"""
+    return float(os.getenv('TRANSCRIBE_STREAM_SECONDS', '120'))
+
+
+def default_workers() -> int:
+    """Worker processes for chunked transcription (1 disables it)"""
+    return int(os.getenv('TRANSCRIBE_WORKERS', '1'))
+
+
+def find_split_points(samples, chunk_seconds: float, sample_rate: int = SAMPLE_RATE,
+                      search_seconds: float = None) -> List[float]:
+    """Split times (seconds) near every `chunk_seconds`, each at the quietest
+    point within `search_seconds` of the target, so no word is cut in half"""
+    import numpy as np
+
+    duration = len(samples) / sample_rate
+    if duration <= chunk_seconds * 1.5:
+        return []
+
+    search_seconds = search_seconds if search_seconds is not None else min(30.0, chunk_seconds / 4)
+    energy = frame_energy(samples, sample_rate)
+    # Smooth so a single quiet frame inside a word doesn't look like a pause
+    width = max(1, int(SMOOTHING_SECONDS / FRAME_SECONDS))
+    smoothed = np.convolve(energy, np.ones(width, dtype=np.float32) / width, mode='same')
+
+    splits = []
+    target = chunk_seconds
+    while target < duration - chunk_seconds / 2:
+        lo = int(max(target - search_seconds, (splits[-1] if splits else 0) + 1.0) / FRAME_SECONDS)
+        hi = int(min(target + search_seconds, duration - 1.0) / FRAME_SECONDS)
+        if hi <= lo:
+            break
+        quietest = lo + int(np.argmin(smoothed[lo:hi]))
+        splits.append(round(quietest * FRAME_SECONDS, 2))
+        target = splits[-1] + chunk_seconds
+    return splits
+
+
+def plan_chunks(audio: AudioBuffer, chunk_seconds: float) -> List[Tuple[float, float]]:
+    """(start, end) times of each chunk covering the whole buffer"""
+    bounds = [0.0] + find_split_points(audio.samples, chunk_seconds, audio.sample_rate) + [audio.duration]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def shift_result(result: Dict, offset: float, chunk_end: float = None) -> Dict:
+    """Move a chunk's segment/word timestamps onto the full-file timeline.
+
+    Anything Whisper placed past the end of the chunk (it sometimes runs over
+    at the tail of a window) is clamped so chunks never overlap after merging.
+    """
+    def shift(value: float) -> float:
+        shifted = round(value + offset, 3)
+        return min(shifted, chunk_end) if chunk_end is not None else shifted
+
+    segments = []
+    for segment in result.get('segments', []):
+        if chunk_end is not None and segment['start'] + offset >= chunk_end:
+            continue
+        segment = dict(segment, start=shift(segment['start']), end=shift(segment['end']))
+        if 'seek' in segment:
+            segment['seek'] += int(round(offset * MEL_FRAMES_PER_SECOND))
+        if 'words' in segment:
+            words = [
+                dict(word, start=shift(word['start']), end=shift(word['end']))
+                for word in segment['words']
+                if chunk_end is None or word['start'] + offset < chunk_end
+            ]
+            if len(words) != len(segment['words']):
+                segment['text'] = ''.join(_word_text(w) for w in words)
+            segment['words'] = words
+        segments.append(segment)
+    return dict(result, segments=segments)
+
+
+def iter_merged_segments(chunk_results: Iterable[Tuple[float, float, Dict]]) -> Iterator[Dict]:
+    """Yield merged segments as per-chunk results, given as (start, end, result)
+    in time order, arrive"""
+    next_id = 0
+    last_end = 0.0
+    for start, end, result in chunk_results:
+        for segment in shift_result(result, start, end)['segments']:
+            # Guard the seam: words already covered by the previous segment
+            # are dropped rather than emitted twice
+            if segment['start'] < last_end:
+                if segment.get('words'):
+                    segment['words'] = [w for w in segment['words'] if w['start'] >= last_end]
+                    if not segment['words']:
+                        continue
+                    segment['text'] = ''.join(_word_text(w) for w in segment['words'])
+                    segment['start'] = segment['words'][0]['start']
+                elif segment['end'] <= last_end:
+                    continue
+                else:
+                    segment['start'] = last_end
+            segment['id'] = next_id
+            next_id += 1
+            last_end = segment['end']
+            yield segment
+
+
+def merge_results(chunk_results: List[Tuple[float, float, Dict]]) -> Dict:
+    """Merge per-chunk results, given as (start, end, result) in time order"""
+    segments = list(iter_merged_segments(chunk_results))
+    language = next((result.get('language') for _, _, result in chunk_results
+                     if result.get('language')), None)
+    return {
+        'text': ''.join(segment['text'] for segment in segments),
+        'segments': segments,
+        'language': language,
+    }
+
+
+def _word_text(word: Dict) -> str:
+    # openai-whisper calls it 'word' (with leading space), whisper-timestamped 'text'
+    return word['word'] if 'word' in word else ' ' + word['text']
+
+
+# Per-process state for pool workers
+_worker_model = None
+
+
+def _init_worker(backend: str, model_size: str, device: str, threads: int):
+    global _worker_model
+    import torch
+    from model_registry import get_registry
+
+    torch.set_num_threads(threads)
+    os.environ['FASTER_WHISPER_CPU_THREADS'] = str(threads)
+    # Workers keep their handle for the life of the process
+    _worker_model = get_registry().acquire(model_size, backend=backend, device=device)
+
+
+def _transcribe_chunk(audio_path: str, start: float, end: float, backend: str, options: Dict) -> Dict:
+    from model_server import run_transcription
+
+    audio = AudioBuffer(audio_path)
+    result = run_transcription(_worker_model.model, backend, audio.window(start, end), options)
+    return to_json_safe(result)
+
+
+def iter_chunk_results(audio: AudioBuffer, backend: str, model_size: str, options: Dict,
+                       workers: int = None, chunk_seconds: float = None, device: str = None,
+                       mp_context: str = 'spawn', checkpoints=None) -> Iterator[Tuple[float, float, Dict]]:
+    """Transcribe silence-aligned chunks of `audio` across a process pool,
+    yielding (start, end, result) in time order as each chunk finishes.
+
+    With `checkpoints` (a transcript_checkpoints.ChunkCheckpoints), chunks
+    completed by an earlier run are reused and new ones are saved as they're
+    yielded.
+
+    Each worker loads its own model copy (enable WHISPER_MODEL_CACHE_DIR so the
+    copies share weights through the page cache) and reads its chunk straight
+    from the memory-mapped job audio.
+    """
+    from model_registry import default_device
+
+    workers = workers or default_workers()
+    chunk_seconds = chunk_seconds or default_chunk_seconds()
+    device = device or default_device()
+    chunks = plan_chunks(audio, chunk_seconds)
+    done = {}
+    if checkpoints:
+        done = {(start, end): checkpoints.load(start, end) for start, end in chunks}
+        done = {chunk: result for chunk, result in done.items() if result is not None}
+        if done:
+            print(f"Resuming: {len(done)} of {len(chunks)} chunks already transcribed")
+    pending = [chunk for chunk in chunks if chunk not in done]
+    if not pending:
+        for start, end in chunks:
+            yield start, end, done[(start, end)]
+        return
+    workers = max(1, min(workers, len(pending)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Transcribing {len(pending)} chunks across {workers} worker processes...")
+
+    context = multiprocessing.get_context(mp_context)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(backend, model_size, device, threads)) as pool:
+        futures = {(start, end): pool.submit(_transcribe_chunk, audio.path, start, end, backend, options)
+                   for start, end in pending}
+        try:
+            for start, end in chunks:
+                if (start, end) in done:
+                    yield start, end, done[(start, end)]
+                    continue
+                result = futures[(start, end)].result()
+                if checkpoints:
+                    result = checkpoints.save(start, end, result)
+                yield start, end, result
+        finally:
+            # A consumer that stops early doesn't wait for the remaining chunks
+            for future in futures.values():
+                future.cancel()
+
+
+def transcribe_parallel(audio: AudioBuffer, backend: str, model_size: str, options: Dict,
+                        workers: int = None, chunk_seconds: float = None, device: str = None,
+                        mp_context: str = 'spawn') -> Dict:
+    """Transcribe `audio` in parallel chunks and merge them into one result"""
+    return merge_results(list(iter_chunk_results(audio, backend, model_size, options, workers,
+                                                 chunk_seconds, device, mp_context)))
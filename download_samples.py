@@ -9,6 +9,7 @@ import requests
 import json
 from datetime import datetime
 from video_summarizer_simple import VideoSummarizer
+from word_store import legacy_transcript
 import time
 
 # Create directories
@@ -241,7 +242,23 @@ def download_video(video_info, max_retries=3):
                 print(f"❌ Failed to download {video_id} after {max_retries} attempts")
                 return None
 
-def process_video_sample(video_info, input_path):
+def transcribe_samples(downloads):
+    """Transcribe every sample that still needs a summary in one batched pass"""
+    pending = [(video_info, input_path) for video_info, input_path in downloads
+               if not os.path.exists(f"samples/summaries/{video_info['id']}_summary.mp4")]
+    if not pending:
+        return {}
+    
+    print(f"\n🎙️ Transcribing {len(pending)} samples in batches...")
+    try:
+        with VideoSummarizer() as summarizer:
+            transcripts = summarizer.transcribe_batch([input_path for _, input_path in pending])
+    except Exception as e:
+        print(f"❌ Batch transcription failed, samples will be transcribed one by one: {e}")
+        return {}
+    return {video_info['id']: transcript for (video_info, _), transcript in zip(pending, transcripts)}
+
+def process_video_sample(video_info, input_path, transcript_data=None):
     """Process a video and generate summary"""
     video_id = video_info['id']
     output_path = f"samples/summaries/{video_id}_summary.mp4"
@@ -253,16 +270,15 @@ def process_video_sample(video_info, input_path):
     print(f"🤖 Processing {video_info['title']} with AI...")
     
     try:
-        # Initialize summarizer
-        summarizer = VideoSummarizer()
-        
-        # Process video
-        result = summarizer.process_video(input_path, output_path)
+        # Initialize summarizer (reuses the Whisper model loaded for earlier samples)
+        with VideoSummarizer() as summarizer:
+            # Process video
+            result = summarizer.process_video(input_path, output_path, transcript_data=transcript_data)
         
         # Save metadata
         metadata = {
             **video_info,
-            'processing_result': result,
+            'processing_result': dict(result, transcript=legacy_transcript(result['transcript'])),
             'processed_at': datetime.now().isoformat(),
             'original_file': input_path,
             'summary_file': output_path
@@ -326,19 +342,24 @@ def main():
     successful_downloads = 0
     successful_processing = 0
     
-    # Download and process each video
+    # Download every video first
+    downloads = []
     for i, video_info in enumerate(SAMPLE_VIDEOS, 1):
-        print(f"\n📹 Processing sample {i}/{len(SAMPLE_VIDEOS)}: {video_info['title']}")
-        
-        # Download video
+        print(f"\n📹 Downloading sample {i}/{len(SAMPLE_VIDEOS)}: {video_info['title']}")
         input_path = download_video(video_info)
         if input_path:
             successful_downloads += 1
-            
-            # Process video
-            output_path = process_video_sample(video_info, input_path)
-            if output_path:
-                successful_processing += 1
+            downloads.append((video_info, input_path))
+    
+    # Short clips keep the model busier when transcribed together
+    transcripts = transcribe_samples(downloads)
+    
+    # Process each video
+    for i, (video_info, input_path) in enumerate(downloads, 1):
+        print(f"\n📹 Processing sample {i}/{len(downloads)}: {video_info['title']}")
+        output_path = process_video_sample(video_info, input_path, transcripts.get(video_info['id']))
+        if output_path:
+            successful_processing += 1
         
         # Small delay between processing
         time.sleep(1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Spoken Language Detection
+Identifies the language once per job from the first speech-bearing 30 seconds,
+so every transcription window can be decoded with the language fixed
+"""
+
+from typing import Dict, Optional, Tuple
+
+from audio_extraction import AudioBuffer
+from transcript_cache import transcript_key
+from vad import detect_speech
+
+# Whisper's language ID looks at a single 30 s encoder window
+DETECTION_SECONDS = 30.0
+
+
+def detection_window(audio: AudioBuffer, seconds: float = DETECTION_SECONDS) -> Optional[Tuple[float, float]]:
+    """(start, end) of the detection window, starting at the first speech, or
+    None when the audio has no speech"""
+    if len(audio) == 0:
+        return None
+    regions = detect_speech(audio.samples, audio.sample_rate)
+    if not regions:
+        return None
+    start = regions[0][0]
+    return start, min(audio.duration, start + seconds)
+
+
+def language_cache_key(audio_hash: str, backend: str, model_size: str) -> str:
+    """Transcript cache key under which a detected language is stored"""
+    return transcript_key(audio_hash, backend, model_size, {'task': 'detect_language'})
+
+
+def detect_language(model, samples, features=None) -> Dict:
+    """Most likely language of up to 30 s of 16 kHz samples as
+    {'language': code, 'probability': p}, reading the model input from
+    `features` (mel_features.MelFeatures of the same window) when given"""
+    import numpy as np
+    import torch
+    import whisper
+
+    if not model.is_multilingual:
+        return {'language': 'en', 'probability': 1.0}
+    if features is not None:
+        mel = features.log_mel()
+    else:
+        if isinstance(samples, str):
+            samples = whisper.load_audio(samples)[:int(DETECTION_SECONDS * whisper.audio.SAMPLE_RATE)]
+        audio = whisper.pad_or_trim(torch.from_numpy(np.ascontiguousarray(samples, dtype=np.float32)))
+        mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels)
+    # Match the weights (float16 when loaded from a GPU model cache)
+    parameter = next(model.parameters())
+    mel = mel.to(device=parameter.device, dtype=parameter.dtype)
+    _, probs = model.detect_language(mel)
+    language = max(probs, key=probs.get)
+    return {'language': language, 'probability': float(probs[language])}
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Map-Reduce LLM Analysis
+Long transcripts are split into fixed-length windows that are scored by
+concurrent LLM calls (map), and the candidates they return are ranked locally
+into the final summary segments within the target length (reduce)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# Candidates asked of each window
+MAP_CANDIDATES = 5
+# Summary size picked by the reduce step
+MIN_SUMMARY_SEGMENTS = 3
+MAX_SUMMARY_SEGMENTS = 5
+# Clips shorter than this aren't worth trimming a candidate down to
+MIN_CLIP_SECONDS = 3.0
+
+
+def analysis_mode() -> str:
+    """'single' (one prompt), 'map_reduce', or 'auto': map-reduce only when the
+    transcript doesn't fit one prompt without dropping segments"""
+    return os.getenv('LLM_ANALYSIS_MODE', 'auto').lower()
+
+
+def map_window_seconds() -> float:
+    return float(os.getenv('LLM_MAP_WINDOW_SECONDS', '600'))
+
+
+def map_concurrency() -> int:
+    return max(1, int(os.getenv('LLM_MAP_CONCURRENCY', '4')))
+
+
+def plan_map_windows(segments: List[Dict], window_seconds: float) -> List[List[Dict]]:
+    """Consecutive segments grouped into windows of about `window_seconds`;
+    a segment belongs to the window its start falls in"""
+    windows = []
+    window_end = None
+    for segment in segments:
+        if window_end is None or segment['start'] >= window_end:
+            windows.append([])
+            window_end = segment['start'] + window_seconds
+        windows[-1].append(segment)
+    return windows
+
+
+def map_windows(windows: List[List[Dict]], score_window: Callable[[int, List[Dict]], Optional[List[Dict]]],
+                concurrency: int = None) -> List[Dict]:
+    """Candidates from every window, scored by up to `concurrency` concurrent
+    `score_window(index, segments)` calls (None or an error: no candidates),
+    clamped to their window"""
+    concurrency = concurrency or map_concurrency()
+
+    def score(index: int) -> List[Dict]:
+        try:
+            candidates = score_window(index, windows[index]) or []
+        except Exception as e:
+            print(f"Warning: Scoring transcript window {index + 1}/{len(windows)} failed: {e}")
+            return []
+        start, end = windows[index][0]['start'], windows[index][-1]['end']
+        clamped = []
+        for candidate in candidates:
+            try:
+                candidate = dict(candidate, start_time=max(start, float(candidate['start_time'])),
+                                 end_time=min(end, float(candidate['end_time'])),
+                                 importance=float(candidate.get('importance', 0)))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if candidate['end_time'] > candidate['start_time']:
+                clamped.append(candidate)
+        return clamped
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(windows)) or 1) as executor:
+        return [candidate for candidates in executor.map(score, range(len(windows))) for candidate in candidates]
+
+
+def select_segments(candidates: List[Dict], target_seconds: float, min_count: int = MIN_SUMMARY_SEGMENTS,
+                    max_count: int = MAX_SUMMARY_SEGMENTS) -> List[Dict]:
+    """Reduce step: the most important non-overlapping candidates, in time
+    order, totalling at most `target_seconds`.
+
+    A candidate that doesn't fit whole is trimmed to the time left, and until
+    `min_count` are picked the rest of the time is shared with the picks still
+    to come, so the summary isn't one long clip.
+    """
+    picked = []
+    remaining = target_seconds
+    for candidate in sorted(candidates, key=lambda c: (-c['importance'], c['start_time'])):
+        if len(picked) >= max_count or remaining < MIN_CLIP_SECONDS:
+            break
+        if any(candidate['start_time'] < other['end_time'] and other['start_time'] < candidate['end_time']
+               for other in picked):
+            continue
+        allowed = remaining / max(1, min_count - len(picked))
+        duration = min(candidate['end_time'] - candidate['start_time'], allowed)
+        if duration < MIN_CLIP_SECONDS:
+            continue
+        picked.append(dict(candidate, end_time=round(candidate['start_time'] + duration, 3)))
+        remaining -= duration
+    return sorted(picked, key=lambda c: c['start_time'])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache
+Persists the segments picked by the LLM on disk, keyed by a digest of the
+normalized transcript, the prompt version, the model and the sampling
+settings, so re-runs and identical re-uploads skip the LLM call
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from transcript_cache import TranscriptCache
+
+
+def llm_cache_dir() -> str:
+    """Directory holding cached LLM answers, or '' when the cache is disabled"""
+    return os.getenv('LLM_CACHE_DIR', 'llm_cache')
+
+
+def llm_cache_max_bytes() -> int:
+    return int(float(os.getenv('LLM_CACHE_MAX_MB', '50')) * 1024 * 1024)
+
+
+def llm_cache_ttl() -> float:
+    """Seconds an answer stays valid (LLM_CACHE_TTL_HOURS, 0 for no expiry)"""
+    return float(os.getenv('LLM_CACHE_TTL_HOURS', '168')) * 3600
+
+
+def transcript_digest(segments: List[Dict]) -> str:
+    """Hash of what the prompt is built from: each segment's text with case and
+    whitespace normalized and its times at the prompt's 0.1 s precision"""
+    normalized = [(round(segment['start'], 1), round(segment['end'], 1),
+                   re.sub(r"\s+", ' ', segment['text']).strip().lower()) for segment in segments]
+    return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+
+def llm_cache_key(digest: str, prompt_version: str, model: str, temperature: float, **extra) -> str:
+    """Cache key for one analysis of one transcript; `extra` holds anything else
+    that changes the answer, such as the analysis mode"""
+    identity = {
+        'transcript': digest,
+        'prompt_version': prompt_version,
+        'model': model,
+        'temperature': temperature,
+        **extra,
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LLMResponseCache(TranscriptCache):
+    """TranscriptCache (size-bounded LRU of JSON files) whose entries also
+    expire `ttl` seconds after they were stored"""
+
+    def __init__(self, directory: str, max_bytes: int = None, ttl: float = None):
+        super().__init__(directory, max_bytes if max_bytes is not None else llm_cache_max_bytes())
+        self.ttl = ttl if ttl is not None else llm_cache_ttl()
+        self.expired = 0
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        entry = super().get(key)
+        if entry is None:
+            return None
+        if self.ttl and time.time() - entry.get('stored_at', 0) > self.ttl:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+                self.expired += 1
+            return None
+        return entry['summary_segments']
+
+    def put(self, key: str, summary_segments: List[Dict]):
+        super().put(key, {'stored_at': time.time(), 'summary_segments': summary_segments})
+
+    def stats(self) -> Dict:
+        return dict(super().stats(), ttl=self.ttl, expired=self.expired)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide LLM response cache, or None when LLM_CACHE_DIR is empty"""
+    global _cache
+    directory = llm_cache_dir()
+    if not directory:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.directory != directory:
+            _cache = LLMResponseCache(directory)
+        return _cache
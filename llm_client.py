@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Shared LLM Client
+One pooled OpenAI client per endpoint for the whole process, with
+per-request timeouts, retries that honour 429 Retry-After, and a token-bucket
+limiter that keeps every concurrent job within the account's RPM/TPM limits
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from llm_prompt import RESPONSE_TOKENS, count_tokens
+
+# Backoff between retries without a Retry-After (seconds, doubled per attempt)
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+
+def llm_timeout() -> float:
+    return float(os.getenv('LLM_TIMEOUT_SECONDS', '60'))
+
+
+def llm_max_retries() -> int:
+    return int(os.getenv('LLM_MAX_RETRIES', '4'))
+
+
+def llm_max_connections() -> int:
+    return int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+
+
+def llm_rate_limits() -> Tuple[float, float]:
+    """(requests, tokens) per minute allowed for the account; 0 for no limit"""
+    return float(os.getenv('LLM_RPM_LIMIT', '0')), float(os.getenv('LLM_TPM_LIMIT', '0'))
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, shared by every
+    thread (and event loop) of the process.
+
+    Callers poll acquire() and sleep for the time it returns (at most
+    POLL_SECONDS at a time, so tokens handed back by adjust() in the
+    meantime are picked up) until it returns 0.
+    """
+
+    POLL_SECONDS = 1.0
+
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = rpm
+        self._tokens = tpm
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens: int) -> float:
+        """Take one request and `tokens` tokens and return 0, or return the
+        seconds to sleep before asking again"""
+        # A request larger than the bucket only has to wait for a full one
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._paused_until - now
+            if self.rpm and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+            if self.tpm and self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+            if wait > 0:
+                return min(wait, self.POLL_SECONDS)
+            self._requests -= 1
+            self._tokens -= tokens
+            return 0.0
+
+    def adjust(self, tokens: int):
+        """Give back (negative: take more) tokens once the real usage is known"""
+        if self.tpm:
+            with self._lock:
+                self._tokens = min(self.tpm, self._tokens + tokens)
+
+    def pause(self, seconds: float):
+        """Hold every new request for `seconds` (after the API answered 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _retry_after(error) -> Optional[float]:
+    """Seconds the API asked us to wait, from a 429's Retry-After headers"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if 'retry-after-ms' in headers:
+            return float(headers['retry-after-ms']) / 1000
+        if 'retry-after' in headers:
+            return float(headers['retry-after'])
+    except ValueError:
+        pass
+    return None
+
+
+class LLMClient:
+    """Chat completions through one keep-alive connection pool per endpoint.
+
+    complete() blocks and acomplete() is its asyncio counterpart; both
+    return the answer text. Timeouts, connection errors, 429s and 5xx
+    responses are retried up to `max_retries` times, waiting for the
+    server's Retry-After when it sends one and backing off otherwise.
+    """
+
+    def __init__(self, api_key: str, base_url: str = None, limiter: RateLimiter = None,
+                 timeout: float = None, max_retries: int = None):
+        import httpx
+        from openai import OpenAI
+
+        self.base_url = base_url
+        self.limiter = limiter or RateLimiter()
+        self.timeout = timeout if timeout is not None else llm_timeout()
+        self.max_retries = max_retries if max_retries is not None else llm_max_retries()
+        self.api_key = api_key
+        self._limits = httpx.Limits(max_connections=llm_max_connections(),
+                                    max_keepalive_connections=llm_max_connections())
+        # Retries are done here, so they go through the rate limiter
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=self.timeout, max_retries=0,
+                             http_client=httpx.Client(limits=self._limits, timeout=self.timeout))
+        self._async_client = None
+        self._async_loop = None
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def _async(self):
+        """Async client for the running event loop (pooled connections belong to
+        the loop that opened them)"""
+        import httpx
+        from openai import AsyncOpenAI
+
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout,
+                                             max_retries=0, http_client=httpx.AsyncClient(limits=self._limits,
+                                                                                          timeout=self.timeout))
+            self._async_loop = loop
+        return self._async_client
+
+    def _estimate(self, model: str, messages: List[Dict]) -> int:
+        """Tokens reserved from the limiter for one request (prompt and answer)"""
+        return sum(count_tokens(message['content'], model) for message in messages) + RESPONSE_TOKENS
+
+    def _retry_delay(self, error, attempt: int) -> Optional[float]:
+        """Seconds before the next attempt, or None when `error` isn't retried"""
+        import openai
+
+        if attempt >= self.max_retries:
+            return None
+        if isinstance(error, openai.RateLimitError):
+            retry_after = _retry_after(error)
+            if retry_after is not None:
+                # Every other request waits too instead of hitting the same 429
+                self.limiter.pause(retry_after)
+                return retry_after
+        elif not isinstance(error, (openai.APITimeoutError, openai.APIConnectionError,
+                                    openai.InternalServerError)):
+            return None
+        backoff = min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** attempt)
+        return backoff * random.uniform(0.5, 1.0)
+
+    def _finish(self, response, reserved: int) -> str:
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            self.limiter.adjust(reserved - usage.total_tokens)
+        return response.choices[0].message.content
+
+    def _count(self, retried: bool):
+        with self._lock:
+            self.requests += 1
+            self.retries += retried
+
+    def complete(self, model: str, messages: List[Dict], temperature: float = 0.0, **options) -> str:
+        attempt = 0
+        while True:
+            reserved = self._estimate(model, messages)
+            while True:
+                wait = self.limiter.acquire(reserved)
+                if not wait:
+                    break
+                time.sleep(wait)
+            self._count(attempt > 0)
+            try:
+                response = self.client.chat.completions.create(model=model, messages=messages,
+                                                               temperature=temperature, **options)
+            except Exception as e:
+                self.limiter.adjust(reserved)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                print(f"LLM request failed ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            return self._finish(response, reserved)
+
+    async def acomplete(self, model: str, messages: List[Dict], temperature: float = 0.0, **options) -> str:
+        attempt = 0
+        while True:
+            reserved = self._estimate(model, messages)
+            while True:
+                wait = self.limiter.acquire(reserved)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+            self._count(attempt > 0)
+            try:
+                response = await self._async().chat.completions.create(model=model, messages=messages,
+                                                                           temperature=temperature, **options)
+            except Exception as e:
+                self.limiter.adjust(reserved)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                print(f"LLM request failed ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            return self._finish(response, reserved)
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def run_coroutine(coroutine):
+    """Run a coroutine on the process-wide LLM event loop (a daemon thread, so
+    async clients keep their connection pools between calls) and wait for
+    its result"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='llm-event-loop', daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coroutine, _loop).result()
+
+
+_clients: Dict[Tuple[str, Optional[str]], LLMClient] = {}
+_limiters: Dict[Optional[str], RateLimiter] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(api_key: str, base_url: str = None) -> LLMClient:
+    """Process-wide client for an endpoint (the OpenAI API by default). Clients
+    of the same endpoint share one rate limiter, set from LLM_RPM_LIMIT and
+    LLM_TPM_LIMIT for the OpenAI API and unlimited for other endpoints."""
+    with _clients_lock:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            limiter = _limiters.get(base_url)
+            if limiter is None:
+                limiter = _limiters[base_url] = RateLimiter(*llm_rate_limits()) if base_url is None else RateLimiter()
+            client = _clients[(api_key, base_url)] = LLMClient(api_key, base_url, limiter)
+        return client
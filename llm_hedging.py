@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Hedged LLM Requests
+When the primary endpoint hasn't answered within its observed tail latency, a
+duplicate request goes to a secondary OpenAI-compatible endpoint (e.g. a local
+model server); the first valid answer wins and the other request is cancelled
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from llm_client import LLMClient, get_llm_client, run_coroutine
+
+logger = logging.getLogger(__name__)
+
+# Primary latencies kept per model, and how many are needed before the
+# observed percentile replaces the configured default delay
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+def default_hedge_delay() -> float:
+    return float(os.getenv('LLM_HEDGE_DELAY_SECONDS', '8'))
+
+
+def get_secondary_llm_client() -> Optional[LLMClient]:
+    """Client for LLM_SECONDARY_BASE_URL, or None when no secondary is configured"""
+    base_url = os.getenv('LLM_SECONDARY_BASE_URL')
+    if not base_url:
+        return None
+    # Local OpenAI-compatible servers usually accept any key
+    return get_llm_client(os.getenv('LLM_SECONDARY_API_KEY') or 'none', base_url)
+
+
+class LatencyTracker:
+    """Recent primary-endpoint latencies per model"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def models(self) -> List[str]:
+        with self._lock:
+            return list(self._latencies)
+
+    def percentile(self, model: str, percentile: float) -> Optional[float]:
+        """Observed latency percentile, or None until there are enough samples"""
+        with self._lock:
+            latencies = sorted(self._latencies.get(model, ()))
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))]
+
+
+class HedgedLLMClient:
+    """LLMClient-compatible client racing a secondary endpoint against a slow
+    primary.
+
+    The secondary request starts once the primary has been pending for its
+    observed `percentile` latency (LLM_HEDGE_DELAY_SECONDS until enough calls
+    have been seen), or right away when the primary fails. An answer only
+    wins if the call's `validate(text)` accepts it; the losing request is
+    cancelled. Hedge and failover events are logged at INFO level.
+    """
+
+    def __init__(self, primary: LLMClient, secondary: LLMClient, percentile: float,
+                 secondary_model: str = None):
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        self.secondary_model = secondary_model
+        self.tracker = LatencyTracker()
+        self.requests = 0
+        self.hedged = 0
+        self.failovers = 0
+        self.secondary_wins = 0
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, model: str) -> float:
+        observed = self.tracker.percentile(model, self.percentile)
+        return observed if observed is not None else default_hedge_delay()
+
+    @staticmethod
+    async def _attempt(client: LLMClient, model: str, messages: List[Dict], temperature: float,
+                       validate: Optional[Callable[[str], object]], **options) -> str:
+        text = await client.acomplete(model, messages, temperature, **options)
+        if validate:
+            validate(text)
+        return text
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    async def aanswer(self, model: str, messages: List[Dict], temperature: float = 0.0,
+                      validate: Callable[[str], object] = None, **options) -> Tuple[str, str]:
+        """(answer text, model that gave it): `model` when the primary won,
+        else secondary_label(model)"""
+        delay = self.hedge_delay(model)
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._attempt(self.primary, model, messages, temperature, validate,
+                                                      **options))
+        pending = {primary}
+        secondary = None
+        error = None
+        self._count(requests=1)
+        try:
+            while pending:
+                timeout = None if secondary else max(0.0, started + delay - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        text = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if task is primary or not primary.done():
+                        # A primary that lost the race took at least this long
+                        self.tracker.record(model, time.monotonic() - started)
+                    if task is primary:
+                        return text, model
+                    self._count(secondary_wins=1)
+                    logger.info("Hedged LLM request: secondary answered first after %.1fs",
+                                time.monotonic() - started)
+                    return text, self.secondary_label(model)
+                if secondary is None:
+                    # Slower than the hedge delay, or failed: ask the secondary too
+                    failed = primary.done()
+                    self._count(failovers=int(failed), hedged=int(not failed))
+                    logger.info("LLM %s, sending it to the secondary endpoint too",
+                                'request failed' if failed else f'request slower than {delay:.1f}s')
+                    secondary = asyncio.ensure_future(self._attempt(
+                        self.secondary, self.secondary_model or model, messages, temperature, validate, **options))
+                    pending.add(secondary)
+            raise error
+        finally:
+            for task in (primary, secondary):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def secondary_label(self, model: str) -> str:
+        """Name for answers from the secondary endpoint (never equal to a
+        primary model name, even when both serve the same model id)"""
+        return f"{self.secondary.base_url}:{self.secondary_model or model}"
+
+    async def acomplete(self, model: str, messages: List[Dict], temperature: float = 0.0,
+                        validate: Callable[[str], object] = None, **options) -> str:
+        text, _ = await self.aanswer(model, messages, temperature, validate, **options)
+        return text
+
+    def complete(self, model: str, messages: List[Dict], temperature: float = 0.0,
+                 validate: Callable[[str], object] = None, **options) -> str:
+        return run_coroutine(self.acomplete(model, messages, temperature, validate, **options))
+
+    def answer(self, model: str, messages: List[Dict], temperature: float = 0.0,
+               validate: Callable[[str], object] = None, **options) -> Tuple[str, str]:
+        return run_coroutine(self.aanswer(model, messages, temperature, validate, **options))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'failovers': self.failovers,
+                'secondary_wins': self.secondary_wins,
+                'hedge_rate': self.hedged / self.requests if self.requests else 0.0,
+                'hedge_delay': {model: self.hedge_delay(model) for model in self.tracker.models()},
+            }
+
+
+_hedged: Dict[tuple, HedgedLLMClient] = {}
+_hedged_lock = threading.Lock()
+
+
+def get_hedged_client(primary: LLMClient, percentile: float) -> Optional[HedgedLLMClient]:
+    """Process-wide hedged client around `primary` (so latencies and hedge
+    rates accumulate across jobs), or None without a secondary endpoint"""
+    secondary = get_secondary_llm_client()
+    if secondary is None or secondary is primary:
+        return None
+    key = (id(primary), id(secondary), percentile)
+    with _hedged_lock:
+        if key not in _hedged:
+            _hedged[key] = HedgedLLMClient(primary, secondary, percentile, os.getenv('LLM_SECONDARY_MODEL'))
+        return _hedged[key]
+
+
+def hedged_stats() -> List[Dict]:
+    """stats() of every hedged client in the process, with its endpoints"""
+    with _hedged_lock:
+        clients = list(_hedged.values())
+    return [dict(client.stats(), primary=client.primary.base_url or 'openai',
+                 secondary=client.secondary.base_url, percentile=client.percentile) for client in clients]
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+LLM Prompt Builder
+Builds the segment-selection prompt with every transcript segment sent once as
+a compact line, counted in tokens and fitted to a budget by merging
+neighbouring segments and then dropping the least informative ones
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Tuple
+
+# Bump when the prompt changes in a way the template text doesn't show (the
+# line format, merging, dropping); cached LLM answers are keyed by it
+PROMPT_VERSION = 1
+TEMPERATURE = 0.3
+
+SYSTEM_PROMPT = "You are an expert video editor who identifies the most important segments for creating summary videos."
+
+PROMPT_TEMPLATE = """Analyze this video transcript and identify the most important segments for creating a summary video.
+
+Transcript, one line per segment as "[index] start-end: text" (times in seconds):
+{transcript}
+
+Please identify 3-5 key segments that would make a good summary video. For each segment, provide:
+1. start_time: start time in seconds
+2. end_time: end time in seconds
+3. importance: score from 1-10
+4. topic: brief description of what this segment covers
+5. reason: why this segment is important
+
+Respond in JSON format like this:
+{{"summary_segments": [{{"start_time": 0.0, "end_time": 15.5, "importance": 9, "topic": "introduction", "reason": "Sets up the main topic"}}]}}"""
+
+# Map step of map-reduce analysis (see llm_analysis): candidates from one part
+MAP_PROMPT_TEMPLATE = """This is part {part} of {parts} of a video transcript. Identify the segments of this part that would be worth including in a summary video of the whole video.
+
+Transcript part, one line per segment as "[index] start-end: text" (times in seconds):
+{transcript}
+
+Please identify up to {candidates} candidate segments. For each segment, provide:
+1. start_time: start time in seconds
+2. end_time: end time in seconds
+3. importance: score from 1-10 for how essential it is to the whole video (not just this part)
+4. topic: brief description of what this segment covers
+5. reason: why this segment is important
+
+Respond in JSON format like this:
+{{"summary_segments": [{{"start_time": 0.0, "end_time": 15.5, "importance": 9, "topic": "introduction", "reason": "Sets up the main topic"}}]}}"""
+
+# Context windows of the models the tiers use; unknown models get the smallest
+MODEL_CONTEXT_TOKENS = {
+    'gpt-3.5-turbo': 4096,
+    'gpt-3.5-turbo-16k': 16384,
+    'gpt-4': 8192,
+    'gpt-4-32k': 32768,
+}
+# Tokens kept free for the JSON answer
+RESPONSE_TOKENS = 800
+# Line lengths (seconds) neighbouring segments are merged up to, tried in
+# turn until the prompt fits
+MERGE_SECONDS = (15.0, 30.0, 60.0)
+# Words this short don't count towards a line's information content
+MIN_CONTENT_WORD = 4
+
+
+def prompt_version() -> str:
+    """PROMPT_VERSION plus a digest of the templates, so editing any template
+    invalidates answers cached for the old one"""
+    templates = '\n'.join((SYSTEM_PROMPT, PROMPT_TEMPLATE, MAP_PROMPT_TEMPLATE))
+    return f"{PROMPT_VERSION}-{hashlib.sha256(templates.encode()).hexdigest()[:12]}"
+
+
+def token_budget(model: str) -> int:
+    """Prompt tokens allowed for `model` (LLM_PROMPT_TOKEN_BUDGET overrides)"""
+    configured = os.getenv('LLM_PROMPT_TOKEN_BUDGET')
+    if configured:
+        return int(configured)
+    return MODEL_CONTEXT_TOKENS.get(model, min(MODEL_CONTEXT_TOKENS.values())) - RESPONSE_TOKENS
+
+
+_encodings: Dict[str, object] = {}
+_encodings_lock = threading.Lock()
+
+
+def _encoding(model: str):
+    """tiktoken encoding for `model`, or None when tiktoken isn't installed or
+    can't fetch its tables (it downloads them on first use, so concurrent
+    first calls wait for one attempt)"""
+    with _encodings_lock:
+        if model not in _encodings:
+            _encodings[model] = _load_encoding(model)
+        return _encodings[model]
+
+
+def _load_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        print(f"Warning: tiktoken unavailable ({e.__class__.__name__}), estimating prompt tokens")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Tokens in `text` for `model` (~4 characters per token without tiktoken)"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def parse_response(response_text: str) -> List[Dict]:
+    """summary_segments from an answer to either prompt (raises ValueError or
+    KeyError when it doesn't hold them)"""
+    # Extract JSON from the response (in case there's extra text)
+    start_idx = response_text.find('{')
+    end_idx = response_text.rfind('}') + 1
+    summary_segments = json.loads(response_text[start_idx:end_idx])['summary_segments']
+    if not isinstance(summary_segments, list):
+        raise ValueError("summary_segments is not a list")
+    return summary_segments
+
+
+def _line(entry: Dict) -> str:
+    return f"[{entry['index']}] {entry['start']:.1f}-{entry['end']:.1f}: {entry['text']}"
+
+
+def _merge(entries: List[Dict], max_seconds: float) -> List[Dict]:
+    """Neighbouring entries joined into lines spanning at most `max_seconds`"""
+    merged = []
+    for entry in entries:
+        last = merged[-1] if merged else None
+        if last and entry['end'] - last['start'] <= max_seconds:
+            merged[-1] = dict(last, end=entry['end'], text=f"{last['text']} {entry['text']}",
+                              segments=last['segments'] + entry['segments'])
+        else:
+            merged.append(entry)
+    return merged
+
+
+def _information(text: str) -> int:
+    """Distinct content words in a line: fillers and back-channel lines score lowest"""
+    return len({word for word in re.findall(r"\w+", text.lower()) if len(word) >= MIN_CONTENT_WORD})
+
+
+def legacy_prompt_tokens(full_text: str, segments: List[Dict], model: str) -> int:
+    """Tokens the transcript took in the previous prompt format (the full text
+    followed by every segment again as indented JSON)"""
+    listing = json.dumps([{'text': segment['text'], 'start': segment['start'], 'end': segment['end']}
+                          for segment in segments], indent=2)
+    return count_tokens(full_text, model) + count_tokens(listing, model)
+
+
+def build_prompt(segments: List[Dict], model: str, budget: int = None, full_text: str = None,
+                 template: str = PROMPT_TEMPLATE, **fields) -> Tuple[str, Dict]:
+    """(prompt, report) for ranking `segments` with `model`, within `budget`
+    prompt tokens (system message included). `template` is filled with the
+    transcript lines and any other `fields`.
+
+    The report has the prompt's token count, how many segments were merged
+    into shared lines or dropped to fit, and the tokens saved against the
+    previous full-text + JSON prompt.
+    """
+    budget = budget if budget is not None else token_budget(model)
+    fixed = count_tokens(SYSTEM_PROMPT, model) + count_tokens(template.format(transcript='', **fields), model)
+
+    entries = [{'index': index, 'start': segment['start'], 'end': segment['end'],
+                'text': segment['text'].strip(), 'segments': 1}
+               for index, segment in enumerate(segments) if segment['text'].strip()]
+
+    def transcript_tokens(lines: List[Dict]) -> int:
+        return count_tokens('\n'.join(_line(entry) for entry in lines), model)
+
+    lines = entries
+    used = fixed + transcript_tokens(lines)
+    for max_seconds in MERGE_SECONDS:
+        if used <= budget:
+            break
+        lines = _merge(entries, max_seconds)
+        used = fixed + transcript_tokens(lines)
+
+    dropped = 0
+    if used > budget:
+        # Drop the least informative lines (by estimate, then recount) until it
+        # fits, from the shortest merged lines so what's kept spans the video
+        lines = _merge(entries, MERGE_SECONDS[0])
+        used = fixed + transcript_tokens(lines)
+        line_tokens = [count_tokens(_line(entry), model) for entry in lines]
+        order = sorted(range(len(lines)), key=lambda i: (_information(lines[i]['text']), -line_tokens[i]))
+        keep = set(range(len(lines)))
+        position = 0
+        while used > budget and position < len(order):
+            estimate = used
+            while estimate > budget and position < len(order):
+                keep.discard(order[position])
+                estimate -= line_tokens[order[position]]
+                position += 1
+            used = fixed + transcript_tokens([lines[i] for i in sorted(keep)])
+        dropped = sum(lines[i]['segments'] for i in range(len(lines)) if i not in keep)
+        lines = [lines[i] for i in sorted(keep)]
+
+    prompt = template.format(transcript='\n'.join(_line(entry) for entry in lines), **fields)
+    if full_text is None:
+        full_text = ''.join(segment['text'] for segment in segments)
+    baseline = fixed + legacy_prompt_tokens(full_text, segments, model)
+    report = {
+        'model': model,
+        'budget': budget,
+        'prompt_tokens': used,
+        'baseline_tokens': baseline,
+        'saved_tokens': baseline - used,
+        'segments': len(segments),
+        'lines': len(lines),
+        'merged_segments': sum(entry['segments'] for entry in lines) - len(lines),
+        'dropped_segments': dropped,
+    }
+    return prompt, report
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Windowed Log-Mel Features
+Computes the log-mel spectrogram of just the stretch of a job's audio a
+Whisper stage works on (the language detection window, a run of segments to
+align) in 30 s blocks, with the frames at its edges seeing the neighbouring
+audio, and hands the stage Whisper-normalized 30 s inputs from it
+"""
+
+from audio_extraction import AudioBuffer
+
+# Frames computed per STFT call (30 s of audio)
+BLOCK_FRAMES = 3000
+# log10 of the power floor Whisper clamps to (what zero padding turns into)
+SILENCE_LOG_MEL = -10.0
+
+
+class MelFeatures:
+    """Unnormalized log10 mel power, (n_mels, frames) at Whisper's 10 ms hop.
+
+    Whisper normalizes each 30 s input against its own maximum, so the stored
+    values stay raw and log_mel() applies that per window. window() views
+    share the array.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def n_mels(self) -> int:
+        return self.raw.shape[0]
+
+    @property
+    def frames_per_second(self) -> int:
+        from whisper.audio import FRAMES_PER_SECOND
+        return FRAMES_PER_SECOND
+
+    @property
+    def duration(self) -> float:
+        return self.raw.shape[1] / self.frames_per_second
+
+    def _frame(self, seconds: float) -> int:
+        return max(0, min(self.raw.shape[1], int(round(seconds * self.frames_per_second))))
+
+    def window(self, start: float, end: float = None) -> 'MelFeatures':
+        """Zero-copy view of the frames between two times"""
+        end = self.duration if end is None else end
+        return MelFeatures(self.raw[:, self._frame(start):self._frame(end)])
+
+    def log_mel(self, start: float = 0.0, end: float = None):
+        """Model input for up to 30 s from `start`, as
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(samples)) computes it
+        (except that the frames at the window edges see the neighbouring audio
+        instead of padding)"""
+        import numpy as np
+        import torch
+        from whisper.audio import N_FRAMES
+
+        end = self.duration if end is None else end
+        first = self._frame(start)
+        last = min(self._frame(end), first + N_FRAMES)
+        log_spec = np.full((self.n_mels, N_FRAMES), SILENCE_LOG_MEL, dtype=np.float32)
+        log_spec[:, :last - first] = self.raw[:, first:last]
+        log_spec = torch.from_numpy(log_spec)
+        log_spec = torch.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+
+def _reflect_padded(samples, start: int, stop: int):
+    """samples[start:stop] of the signal reflect-padded on both sides, as
+    torch.stft(center=True) sees it"""
+    import numpy as np
+
+    n = len(samples)
+    if start >= 0 and stop <= n:
+        return np.asarray(samples[start:stop], dtype=np.float32)
+    index = np.abs(np.arange(start, stop))
+    index = np.where(index > n - 1, 2 * (n - 1) - index, index)
+    return np.asarray(samples[index.min():index.max() + 1], dtype=np.float32)[index - index.min()]
+
+
+def compute_features(audio: AudioBuffer, start: float = 0.0, end: float = None, n_mels: int = 80) -> MelFeatures:
+    """Log-mel features of the `start`-`end` stretch of a decoded audio buffer
+    (times in the result are relative to `start`), computed in 30 s blocks"""
+    import numpy as np
+    import torch
+    from whisper.audio import HOP_LENGTH, N_FFT, mel_filters
+
+    offset = audio.sample_index(start)
+    stop = len(audio) if end is None else audio.sample_index(end)
+    n_frames = max(0, stop - offset) // HOP_LENGTH
+    raw = np.empty((n_mels, n_frames), dtype=np.float32)
+    filters = mel_filters('cpu', n_mels)
+    window = torch.hann_window(N_FFT)
+    for first in range(0, n_frames, BLOCK_FRAMES):
+        last = min(n_frames, first + BLOCK_FRAMES)
+        # Frame i is centred on sample offset + i * HOP_LENGTH
+        block = _reflect_padded(audio.samples, offset + first * HOP_LENGTH - N_FFT // 2,
+                                offset + (last - 1) * HOP_LENGTH + N_FFT // 2)
+        stft = torch.stft(torch.from_numpy(block), N_FFT, HOP_LENGTH, window=window,
+                          center=False, return_complex=True)
+        mel_spec = filters @ (stft.abs() ** 2)
+        raw[:, first:last] = torch.clamp(mel_spec, min=1e-10).log10().numpy()
+    return MelFeatures(raw)
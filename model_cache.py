@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Whisper Model Cache
+Stores Whisper weights pre-converted for a device/dtype in a flat, aligned file
+that loads by memory-mapping instead of unpickling the checkpoint, so cold
+starts are near-instant and processes share the weights through the page cache
+"""
+
+import contextlib
+import json
+import os
+import struct
+import threading
+from typing import Callable, Dict
+
+MAGIC = b'WMC1'
+ALIGNMENT = 64
+CACHE_VERSION = 1
+
+_init_lock = threading.Lock()
+
+
+def cache_dir() -> str:
+    """Directory holding cache files, or '' when the cache is disabled"""
+    return os.getenv('WHISPER_MODEL_CACHE_DIR', '')
+
+
+def default_dtype(device: str) -> str:
+    """float16 on GPU (what transcribe runs at), float32 everywhere else"""
+    return os.getenv('WHISPER_MODEL_CACHE_DTYPE') or ('float16' if device.startswith('cuda') else 'float32')
+
+
+def cache_path(size: str, device: str, dtype: str = None, directory: str = None) -> str:
+    """Cache file path for a model size converted for a device and dtype"""
+    dtype = dtype or default_dtype(device)
+    device_tag = device.replace(':', '')
+    # whisper.load_model also accepts a checkpoint path in place of a size name
+    name = os.path.splitext(os.path.basename(size))[0]
+    return os.path.join(directory or cache_dir(), f"whisper-{name}-{device_tag}-{dtype}.wmc")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_model_cache(model, path: str, dtype: str = 'float32'):
+    """Write a loaded Whisper model to the cache format (atomically)"""
+    import numpy as np
+    import torch
+    from dataclasses import asdict
+
+    state = model.state_dict()
+    tensors = dict(state)
+    # Non-persistent buffers (attention mask, alignment heads) aren't in the
+    # state dict but must be restored too, since construction is skipped
+    for name, buffer in model.named_buffers():
+        tensors.setdefault(name, buffer)
+
+    target = getattr(torch, dtype)
+    entries = []
+    blobs = []
+    offset = 0
+    for name, tensor in tensors.items():
+        sparse = tensor.is_sparse
+        tensor = tensor.detach()
+        if sparse:
+            tensor = tensor.to_dense()
+        if tensor.is_floating_point():
+            tensor = tensor.to(target)
+        array = tensor.cpu().contiguous().numpy()
+        offset = _align(offset)
+        entries.append({
+            'name': name,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+            'nbytes': array.nbytes,
+            'persistent': name in state,
+            'sparse': sparse,
+        })
+        blobs.append((offset, array))
+        offset += array.nbytes
+
+    header = json.dumps({
+        'version': CACHE_VERSION,
+        'dims': asdict(model.dims),
+        'dtype': dtype,
+        'tensors': entries,
+    }).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for blob_offset, array in blobs:
+            f.seek(data_start + blob_offset)
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def _skip_parameter_init():
+    """Skip random weight init while building a model whose weights get replaced"""
+    import torch.nn as nn
+
+    classes = [nn.Linear, nn.Conv1d, nn.Embedding, nn.LayerNorm]
+    with _init_lock:
+        originals = {cls: cls.reset_parameters for cls in classes}
+        try:
+            for cls in classes:
+                cls.reset_parameters = lambda self: None
+            yield
+        finally:
+            for cls, method in originals.items():
+                cls.reset_parameters = method
+
+
+def load_model_cache(path: str, device: str = 'cpu'):
+    """Build a Whisper model whose tensors are views into a memory-mapped cache file"""
+    import numpy as np
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a Whisper model cache file: {path}")
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len))
+    if header.get('version') != CACHE_VERSION:
+        raise ValueError(f"Unsupported model cache version in {path}")
+    data_start = _align(len(MAGIC) + 8 + header_len)
+
+    # Copy-on-write mapping: pages stay shared with the page cache (and every
+    # other process mapping the file) as long as nobody writes to them
+    mapped = np.memmap(path, dtype=np.uint8, mode='c')
+
+    with _skip_parameter_init():
+        model = Whisper(ModelDimensions(**header['dims']))
+
+    state = {}
+    extra_buffers = {}
+    for entry in header['tensors']:
+        start = data_start + entry['offset']
+        array = mapped[start:start + entry['nbytes']].view(np.dtype(entry['dtype'])).reshape(entry['shape'])
+        tensor = torch.from_numpy(array)
+        if entry['sparse']:
+            tensor = tensor.to_sparse()
+        if entry['persistent']:
+            state[entry['name']] = tensor
+        else:
+            extra_buffers[entry['name']] = tensor
+
+    model.load_state_dict(state, assign=True)
+    for name, tensor in extra_buffers.items():
+        module_name, _, buffer_name = name.rpartition('.')
+        module = model.get_submodule(module_name) if module_name else model
+        module.register_buffer(buffer_name, tensor, persistent=False)
+
+    if device != 'cpu':
+        model = model.to(device)
+    return model.eval()
+
+
+def load_with_cache(size: str, device: str, loader: Callable, dtype: str = None):
+    """Load from the cache when enabled, populating it on the first (slow) load"""
+    if not cache_dir():
+        return loader(size, device)
+
+    dtype = dtype or default_dtype(device)
+    path = cache_path(size, device, dtype)
+    if os.path.exists(path):
+        try:
+            return load_model_cache(path, device)
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable model cache {path}: {e}")
+
+    model = loader(size, device)
+    try:
+        save_model_cache(model, path, dtype)
+        print(f"Saved memory-mapped model cache: {path}")
+    except Exception as e:
+        print(f"Warning: Failed to write model cache {path}: {e}")
+    return model
+
+
+def cache_info(path: str) -> Dict:
+    """Header summary of a cache file"""
+    with open(path, 'rb') as f:
+        f.read(len(MAGIC))
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len))
+    return {
+        'path': path,
+        'dtype': header['dtype'],
+        'dims': header['dims'],
+        'tensors': len(header['tensors']),
+        'file_size': os.path.getsize(path),
+    }
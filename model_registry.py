@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Whisper Model Registry
+Loads each (backend, size, device) model once per process and hands out shared,
+reference-counted handles so concurrent jobs don't each pay for their own copy
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from model_cache import load_with_cache
+
+ModelKey = Tuple[str, str, str]
+
+
+def _load_whisper_checkpoint(size: str, device: str):
+    import whisper
+    return whisper.load_model(size, device=device)
+
+
+def _load_whisper_timestamped_checkpoint(size: str, device: str):
+    import whisper_timestamped
+    return whisper_timestamped.load_model(size, device=device)
+
+
+def _load_whisper(size: str, device: str):
+    """Load a vanilla openai-whisper model (from the mmap cache when enabled)"""
+    return load_with_cache(size, device, _load_whisper_checkpoint)
+
+
+def _load_whisper_timestamped(size: str, device: str):
+    """Load a model through whisper-timestamped (same weights, different transcribe)"""
+    return load_with_cache(size, device, _load_whisper_timestamped_checkpoint)
+
+
+def _load_faster_whisper(size: str, device: str):
+    """Load a CTranslate2 model through faster-whisper (int8 on CPU by default)"""
+    from faster_whisper import WhisperModel
+    compute_type = os.getenv('FASTER_WHISPER_COMPUTE_TYPE') or ('float16' if device.startswith('cuda') else 'int8')
+    device_type, _, index = device.partition(':')
+    # 0 lets CTranslate2 use every core; parallel chunk workers set their share
+    cpu_threads = int(os.getenv('FASTER_WHISPER_CPU_THREADS', '0'))
+    return WhisperModel(size, device=device_type, device_index=int(index or 0),
+                        compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def default_device() -> str:
+    """Pick the device Whisper would pick on its own"""
+    device = os.getenv('WHISPER_DEVICE')
+    if device:
+        return device
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, if the platform exposes it"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _model_nbytes(model) -> int:
+    """Bytes held by a torch module's parameters and buffers"""
+    if not hasattr(model, 'parameters'):
+        # CTranslate2 models keep their weights outside of torch
+        return 0
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelHandle:
+    """Reference-counted handle to a model owned by a ModelRegistry.
+
+    Whisper installs kv-cache hooks on the model while decoding, so a single
+    model instance must not run two transcriptions at once. Hold ``handle.lock``
+    around inference calls.
+    """
+
+    def __init__(self, registry: 'ModelRegistry', key: ModelKey, entry: Dict):
+        self._registry = registry
+        self._entry = entry
+        self.key = key
+        self.released = False
+
+    @property
+    def model(self):
+        return self._entry['model']
+
+    @property
+    def lock(self) -> threading.Lock:
+        return self._entry['inference_lock']
+
+    def release(self):
+        """Give the handle back to the registry (idempotent)"""
+        if not self.released:
+            self.released = True
+            self._registry.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models keyed by (backend, size, device)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[ModelKey, Dict] = {}
+        self._loaders: Dict[str, Callable] = {
+            'whisper': _load_whisper,
+            'whisper_timestamped': _load_whisper_timestamped,
+            'faster_whisper': _load_faster_whisper,
+        }
+
+    def register_loader(self, backend: str, loader: Callable):
+        """Register a ``loader(size, device)`` callable for a backend name"""
+        with self._lock:
+            self._loaders[backend] = loader
+
+    def acquire(self, size: str = "base", backend: str = "whisper",
+                device: str = None) -> ModelHandle:
+        """Return a handle to the requested model, loading it on first use"""
+        device = device or default_device()
+        key = (backend, size, device)
+
+        with self._lock:
+            if backend not in self._loaders:
+                raise ValueError(f"Unknown model backend: {backend}")
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    'model': None,
+                    'load_lock': threading.Lock(),
+                    'inference_lock': threading.Lock(),
+                    'refcount': 0,
+                    'load_time': None,
+                    'memory_bytes': None,
+                    'rss_delta': None,
+                    'loaded_at': None,
+                }
+                self._entries[key] = entry
+            entry['refcount'] += 1
+
+        # Load outside the registry lock so other keys can load concurrently;
+        # the per-entry lock stops two threads loading the same key twice.
+        try:
+            with entry['load_lock']:
+                if entry['model'] is None:
+                    self._load(key, entry)
+        except Exception:
+            with self._lock:
+                entry['refcount'] -= 1
+                if entry['model'] is None and entry['refcount'] == 0:
+                    self._entries.pop(key, None)
+            raise
+
+        return ModelHandle(self, key, entry)
+
+    def _load(self, key: ModelKey, entry: Dict):
+        backend, size, device = key
+        print(f"Loading Whisper model ({backend}, {size}, {device})...")
+        rss_before = _current_rss()
+        start = time.perf_counter()
+        model = self._loaders[backend](size, device)
+        entry['load_time'] = time.perf_counter() - start
+        rss_after = _current_rss()
+        entry['memory_bytes'] = _model_nbytes(model)
+        if rss_before is not None and rss_after is not None:
+            entry['rss_delta'] = rss_after - rss_before
+        entry['loaded_at'] = time.time()
+        entry['model'] = model
+        print(f"Whisper model loaded successfully in {entry['load_time']:.2f}s "
+              f"({entry['memory_bytes'] / (1024 * 1024):.1f} MB)")
+
+    def release(self, handle: ModelHandle):
+        """Drop one reference; the model stays resident until unloaded"""
+        with self._lock:
+            entry = self._entries.get(handle.key)
+            if entry is not None and entry['refcount'] > 0:
+                entry['refcount'] -= 1
+
+    def unload_idle(self) -> List[ModelKey]:
+        """Unload every model that currently has no outstanding handles"""
+        with self._lock:
+            idle = [key for key, entry in self._entries.items()
+                    if entry['refcount'] == 0 and entry['model'] is not None]
+            for key in idle:
+                del self._entries[key]
+        return idle
+
+    def stats(self) -> List[Dict]:
+        """Load time, memory footprint and reference count for each model"""
+        with self._lock:
+            return [
+                {
+                    'backend': key[0],
+                    'size': key[1],
+                    'device': key[2],
+                    'loaded': entry['model'] is not None,
+                    'refcount': entry['refcount'],
+                    'load_time': entry['load_time'],
+                    'memory_bytes': entry['memory_bytes'],
+                    'rss_delta': entry['rss_delta'],
+                    'loaded_at': entry['loaded_at'],
+                }
+                for key, entry in self._entries.items()
+            ]
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry"""
+    return _registry
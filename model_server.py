@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Local Whisper Model Server
+Keeps one resident copy of the Whisper weights and serves transcription requests
+to every web worker over a Unix domain socket or a local HTTP port
+"""
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from model_registry import get_registry
+from transcription_backends import get_backend
+from workspace import to_json_safe
+
+DEFAULT_SOCKET_PATH = '/tmp/videosense-whisper.sock'
+
+
+class ModelServerError(Exception):
+    """Raised by the client when the model server can't serve a request"""
+
+
+class ModelServerBusy(ModelServerError):
+    """Raised when the server's request queue is full"""
+
+
+def load_request_audio(payload: Dict):
+    """Audio for a request: a media path, or raw 16 kHz float32 PCM to memory-map
+    (optionally only the `start`-`end` window, in seconds)"""
+    if payload.get('audio_format') == 'f32le':
+        from audio_extraction import AudioBuffer
+        return AudioBuffer(payload['audio_path']).window(payload.get('start') or 0.0, payload.get('end'))
+    return payload['audio_path']
+
+
+def run_transcription(model, backend: str, audio, options: Dict) -> Dict:
+    """Run one transcription with the engine that matches the backend name"""
+    return get_backend(backend).transcribe(model, audio, options)
+
+
+def run_task(model, backend: str, payload: Dict) -> Dict:
+    """Run the task a request asks for: transcription, language detection or word alignment"""
+    audio = load_request_audio(payload)
+    if payload.get('task') == 'detect_language':
+        return get_backend(backend).detect_language(model, audio)
+    if payload.get('task') == 'align_words':
+        return get_backend(backend).align_words(model, audio, payload['segments'], payload.get('language'))
+    return run_transcription(model, backend, audio, payload.get('options', {}))
+
+
+def _batchable(items: List) -> List[List]:
+    """Transcriptions among `items` that asked to be batched, grouped by their
+    decode options apart from the language"""
+    groups: Dict[str, List] = {}
+    for payload, future in items:
+        if payload.get('task', 'transcribe') != 'transcribe' or not payload.get('batched'):
+            continue
+        options = dict(payload.get('options', {}), language=None)
+        groups.setdefault(json.dumps(options, sort_keys=True, default=str), []).append((payload, future))
+    return list(groups.values())
+
+
+def _batch_audio(payload: Dict):
+    """Samples of a request's audio (transcribe_batch takes no paths)"""
+    audio = load_request_audio(payload)
+    if isinstance(audio, str):
+        import whisper
+        audio = whisper.load_audio(audio)
+    return audio
+
+
+class TranscriptionQueue:
+    """Bounded request queue drained by a single inference thread.
+
+    Requests that arrive within ``batch_window`` seconds of each other are
+    collected (up to ``max_batch``) and grouped by (backend, size) under one
+    model handle, so the model is never contended. Transcriptions that ask
+    for it (``batched``) are decoded together through the backend's
+    transcribe_batch, in fixed 30 s windows without a previous-text prompt,
+    whether or not other requests share their batch; everything else runs
+    back to back as a plain transcription.
+    """
+
+    def __init__(self, max_queue: int = 16, max_batch: int = 4, batch_window: float = 0.05):
+        self.requests = queue.Queue(maxsize=max_queue)
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.processed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, payload: Dict) -> Future:
+        """Queue a request; raises queue.Full when the server is saturated"""
+        future = Future()
+        try:
+            self.requests.put_nowait((payload, future))
+        except queue.Full:
+            self.rejected += 1
+            raise
+        return future
+
+    def _next_batch(self) -> List:
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            self.batches += 1
+
+            groups: Dict = {}
+            for payload, future in batch:
+                key = (payload.get('backend', 'whisper'), payload.get('model_size', 'base'))
+                groups.setdefault(key, []).append((payload, future))
+
+            for (backend, size), items in groups.items():
+                try:
+                    handle = get_registry().acquire(size, backend=backend)
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+
+                with handle:
+                    items = [(payload, future) for payload, future in items
+                             if future.set_running_or_notify_cancel()]
+                    for same_options in _batchable(items):
+                        self._run_batch(handle, backend, same_options)
+                    for payload, future in items:
+                        if future.done():
+                            continue
+                        try:
+                            with handle.lock:
+                                result = run_task(handle.model, backend, payload)
+                            future.set_result(to_json_safe(result))
+                        except Exception as e:
+                            future.set_exception(e)
+                        self.processed += 1
+
+    def _run_batch(self, handle, backend: str, items: List):
+        """Decode transcriptions sharing their options in one transcribe_batch
+        call; when that fails, each one is retried on its own"""
+        options = dict(items[0][0].get('options', {}), language=None)
+        languages = [payload.get('options', {}).get('language') for payload, _ in items]
+        try:
+            audios = [_batch_audio(payload) for payload, _ in items]
+            with handle.lock:
+                results = get_backend(backend).transcribe_batch(handle.model, audios, options,
+                                                                languages=languages)
+        except Exception as e:
+            if len(items) == 1:
+                items[0][1].set_exception(e)
+                self.processed += 1
+                return
+            print(f"Batched transcription of {len(items)} requests failed ({e}), retrying them one by one")
+            for item in items:
+                self._run_batch(handle, backend, [item])
+            return
+        for (_, future), result in zip(items, results):
+            future.set_result(to_json_safe(result))
+        self.batched += len(items)
+        self.processed += len(items)
+
+    def stats(self) -> Dict:
+        return {
+            'queued': self.requests.qsize(),
+            'max_queue': self.requests.maxsize,
+            'processed': self.processed,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'batched': self.batched,
+        }
+
+
+class ModelRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /transcribe, POST /detect_language, POST /align_words, GET /health"""
+
+    server_version = 'VideoSenseModelServer/1.0'
+
+    def address_string(self):
+        # Unix domain sockets have no peer address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def _send_json(self, status: int, body: Dict, headers: Dict = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        self._send_json(200, {
+            'status': 'ok',
+            'queue': self.server.transcription_queue.stats(),
+            'models': get_registry().stats(),
+        })
+
+    def do_POST(self):
+        if self.path not in ('/transcribe', '/detect_language', '/align_words'):
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._send_json(400, {'error': 'Invalid JSON body'})
+            return
+
+        if not payload.get('audio_path'):
+            self._send_json(400, {'error': 'audio_path is required'})
+            return
+        if not os.path.exists(payload['audio_path']):
+            self._send_json(404, {'error': f"File not found: {payload['audio_path']}"})
+            return
+        if self.path in ('/detect_language', '/align_words'):
+            payload['task'] = self.path[1:]
+
+        try:
+            future = self.server.transcription_queue.submit(payload)
+        except queue.Full:
+            self._send_json(503, {'error': 'Transcription queue is full'}, {'Retry-After': '5'})
+            return
+
+        try:
+            result = future.result()
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, {'result': result})
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server bound to a Unix domain socket"""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
+        os.chmod(self.server_address, 0o660)
+
+
+def create_server(socket_path: str = None, host: str = '127.0.0.1', port: int = None,
+                  max_queue: int = 16, max_batch: int = 4):
+    """Create a model server on a Unix socket (default) or a local TCP port"""
+    if port is not None:
+        server = ThreadingHTTPServer((host, port), ModelRequestHandler)
+    else:
+        server = UnixHTTPServer(socket_path or DEFAULT_SOCKET_PATH, ModelRequestHandler)
+    server.transcription_queue = TranscriptionQueue(max_queue=max_queue, max_batch=max_batch)
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ModelServerClient:
+    """Client for the local model server.
+
+    ``url`` is either ``unix:///path/to/socket`` or ``http://127.0.0.1:PORT``.
+    """
+
+    def __init__(self, url: str, timeout: float = None):
+        self.url = url
+        self.timeout = timeout
+        parsed = urlparse(url)
+        if parsed.scheme == 'unix':
+            self._socket_path = parsed.path
+            self._address = None
+        elif parsed.scheme == 'http':
+            self._socket_path = None
+            self._address = (parsed.hostname, parsed.port or 80)
+        else:
+            raise ValueError(f"Unsupported model server URL: {url}")
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._socket_path:
+            return _UnixHTTPConnection(self._socket_path, timeout=self.timeout)
+        return http.client.HTTPConnection(*self._address, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, body: Dict = None) -> Dict:
+        conn = self._connection()
+        try:
+            data = json.dumps(body).encode('utf-8') if body is not None else None
+            headers = {'Content-Type': 'application/json'} if data else {}
+            conn.request(method, path, body=data, headers=headers)
+            response = conn.getresponse()
+            payload = json.loads(response.read() or b'{}')
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise ModelServerError(f"Model server unavailable at {self.url}: {e}")
+        finally:
+            conn.close()
+
+        if response.status == 503:
+            raise ModelServerBusy(payload.get('error', 'Model server busy'))
+        if response.status != 200:
+            raise ModelServerError(payload.get('error', f"HTTP {response.status}"))
+        return payload
+
+    def transcribe(self, audio_path: str, model_size: str = 'base',
+                   backend: str = 'whisper', audio_format: str = None, start: float = None,
+                   end: float = None, batched: bool = False, **options) -> Dict:
+        """Transcribe a local file on the server and return the raw Whisper result.
+
+        ``audio_format='f32le'`` marks `audio_path` as already-decoded 16 kHz
+        mono float32 PCM (see audio_extraction), which the server maps directly;
+        `start`/`end` then limit it to a window, with timestamps relative to `start`.
+        ``batched`` asks for batch_transcription's decoding, shared with other
+        queued batched requests; its results differ from a plain transcription,
+        so cache them under their own key.
+        """
+        payload = self._request('POST', '/transcribe', {
+            'audio_path': os.path.abspath(audio_path),
+            'audio_format': audio_format,
+            'start': start,
+            'end': end,
+            'model_size': model_size,
+            'backend': backend,
+            'batched': batched,
+            'options': options,
+        })
+        return payload['result']
+
+    def detect_language(self, audio_path: str, model_size: str = 'base', backend: str = 'whisper',
+                        audio_format: str = None, start: float = None, end: float = None) -> Dict:
+        """Detect the spoken language of (a window of) a local file on the server"""
+        payload = self._request('POST', '/detect_language', {
+            'audio_path': os.path.abspath(audio_path),
+            'audio_format': audio_format,
+            'start': start,
+            'end': end,
+            'model_size': model_size,
+            'backend': backend,
+        })
+        return payload['result']
+
+    def align_words(self, audio_path: str, segments: List[Dict], model_size: str = 'base',
+                    backend: str = 'whisper', audio_format: str = None, start: float = None,
+                    end: float = None, language: str = None) -> List[List[Dict]]:
+        """Word timestamps for transcribed segments of (a window of) a local file,
+        segment times being relative to the window"""
+        payload = self._request('POST', '/align_words', {
+            'audio_path': os.path.abspath(audio_path),
+            'audio_format': audio_format,
+            'start': start,
+            'end': end,
+            'model_size': model_size,
+            'backend': backend,
+            'segments': segments,
+            'language': language,
+        })
+        return payload['result']
+
+    def health(self) -> Dict:
+        return self._request('GET', '/health')
+
+
+def get_model_server_client() -> Optional[ModelServerClient]:
+    """Client for MODEL_SERVER_URL, or None when no server is configured"""
+    url = os.getenv('MODEL_SERVER_URL')
+    return ModelServerClient(url) if url else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident Whisper model server")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH,
+                        help="Unix domain socket path (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=None,
+                        help="Serve on 127.0.0.1:PORT instead of a Unix socket")
+    parser.add_argument('--preload', action='append', default=[],
+                        help="Model to load at startup as BACKEND:SIZE (e.g. whisper:base)")
+    parser.add_argument('--queue-size', type=int, default=16, help="Maximum queued requests")
+    parser.add_argument('--max-batch', type=int, default=4, help="Requests drained per batch")
+    args = parser.parse_args()
+
+    for spec in args.preload:
+        backend, _, size = spec.rpartition(':')
+        get_registry().acquire(size, backend=backend or 'whisper')
+
+    server = create_server(args.socket, port=args.port,
+                           max_queue=args.queue_size, max_batch=args.max_batch)
+    where = f"http://127.0.0.1:{args.port}" if args.port is not None else f"unix://{args.socket}"
+    print(f"🧠 Model server listening on {where}")
+    print(f"   Set MODEL_SERVER_URL={where} for the web workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down model server...")
+    finally:
+        server.server_close()
+        if args.port is None and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
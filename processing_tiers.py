@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Processing Tiers
+Named speed/quality presets for the summarization pipeline and the logic that
+picks one for a job from the request or from the video duration
+"""
+
+import os
+from typing import Dict, Optional
+
+# Every tier sets the Whisper model size, its decoding parameters, the LLM
+# used for segment selection and the encode profile for the summary video.
+# `transcription_backend` is the engine the tier prefers when it is installed
+# (None: the summarizer's default, see transcription_backends).
+# whisper_timestamped only gets beam_size, best_of and temperature when
+# `naive_approach` is set in decode_options, since they switch it to its
+# slower decode-then-align mode; without it, it decodes greedily in one pass.
+# `word_alignment` 'lazy' transcribes with segment timestamps only and aligns
+# words just around the clips picked for the summary (see word_alignment).
+# `llm_hedge_percentile`: when a secondary LLM endpoint is configured, an LLM
+# call still pending after this percentile of observed latency is also sent
+# there and the first valid answer is used (None: never hedge, see llm_hedging).
+# `realtime_factor` is a rough CPU estimate of processing seconds per second
+# of input, used to check a tier against a latency budget.
+PROCESSING_TIERS = {
+    'draft': {
+        'name': 'draft',
+        'description': 'Fastest turnaround, rough transcript',
+        'whisper_model': 'tiny',
+        'transcription_backend': 'faster_whisper',
+        'word_alignment': 'lazy',
+        'decode_options': {
+            'beam_size': None,
+            'best_of': 1,
+            'temperature': (0.0,),
+        },
+        'llm_model': 'gpt-3.5-turbo',
+        'llm_hedge_percentile': 0.9,
+        'video_encode': {
+            'codec': 'libx264',
+            'preset': 'ultrafast',
+            'ffmpeg_params': ['-crf', '30'],
+            'audio_bitrate': '96k',
+        },
+        'realtime_factor': 0.15,
+    },
+    'standard': {
+        'name': 'standard',
+        'description': 'Balanced speed and quality (previous defaults)',
+        'whisper_model': 'base',
+        'transcription_backend': None,
+        'word_alignment': 'eager',
+        'decode_options': {
+            'beam_size': None,
+            'best_of': 5,
+            'temperature': (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        },
+        'llm_model': 'gpt-3.5-turbo',
+        'llm_hedge_percentile': 0.9,
+        'video_encode': {
+            'codec': 'libx264',
+            'preset': 'medium',
+            'ffmpeg_params': ['-crf', '23'],
+            'audio_bitrate': '128k',
+        },
+        'realtime_factor': 0.4,
+    },
+    'high': {
+        'name': 'high',
+        'description': 'Most accurate transcript and best-looking output',
+        'whisper_model': 'small',
+        'transcription_backend': None,
+        'word_alignment': 'eager',
+        'decode_options': {
+            'naive_approach': True,
+            'beam_size': 5,
+            'best_of': 5,
+            'temperature': (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        },
+        'llm_model': 'gpt-4',
+        'llm_hedge_percentile': None,
+        'video_encode': {
+            'codec': 'libx264',
+            'preset': 'slow',
+            'ffmpeg_params': ['-crf', '18'],
+            'audio_bitrate': '192k',
+        },
+        'realtime_factor': 1.2,
+    },
+}
+
+DEFAULT_TIER = 'standard'
+TIER_ORDER = ['draft', 'standard', 'high']
+
+# Default processing latency budget (seconds) per requested summary length:
+# a 30 second brief is expected back quickly, a 5 minute digest can wait
+TARGET_LENGTH_BUDGETS = {
+    '30_seconds': 120,
+    '2_minutes': 300,
+    '5_minutes': 900,
+    'custom': 300,
+}
+
+# Length (seconds) of the summary video aimed for per requested target length
+TARGET_LENGTH_SECONDS = {
+    '30_seconds': 30,
+    '2_minutes': 120,
+    '5_minutes': 300,
+    'custom': 120,
+}
+
+# Summary types whose output is only useful with an accurate transcript
+SUMMARY_TYPE_MIN_TIER = {
+    'educational': 'standard',
+}
+
+
+def get_tier(name: str = None) -> Dict:
+    """Look up a tier by name (the default tier when name is empty)"""
+    name = name or DEFAULT_TIER
+    if name not in PROCESSING_TIERS:
+        raise ValueError(f"Unknown processing tier: {name}")
+    return PROCESSING_TIERS[name]
+
+
+def latency_budget(target_length: str = None) -> float:
+    """Processing time budget in seconds for a job"""
+    configured = os.getenv('PROCESSING_LATENCY_BUDGET')
+    if configured:
+        return float(configured)
+    return TARGET_LENGTH_BUDGETS.get(target_length, TARGET_LENGTH_BUDGETS['2_minutes'])
+
+
+def target_seconds(target_length: str = None) -> float:
+    """Summary video length in seconds for a requested target length"""
+    return TARGET_LENGTH_SECONDS.get(target_length, TARGET_LENGTH_SECONDS['2_minutes'])
+
+
+def estimate_processing_time(tier: Dict, duration: float) -> float:
+    """Rough processing time in seconds for a video of `duration` seconds"""
+    return duration * tier['realtime_factor']
+
+
+def select_tier(requested: str = None, summary_type: str = 'auto',
+                target_length: str = '2_minutes', duration: Optional[float] = None,
+                budget: Optional[float] = None) -> Dict:
+    """Pick the tier for a job.
+
+    An explicit tier name wins. Otherwise the highest-quality tier whose
+    estimated processing time fits the latency budget is used, but never one
+    below the minimum for the summary type. Without a duration the default
+    tier is used.
+    """
+    if requested and requested != 'auto':
+        return get_tier(requested)
+
+    floor = TIER_ORDER.index(SUMMARY_TYPE_MIN_TIER.get(summary_type, TIER_ORDER[0]))
+    if duration is None:
+        return get_tier(TIER_ORDER[max(floor, TIER_ORDER.index(DEFAULT_TIER))])
+
+    budget = budget if budget is not None else latency_budget(target_length)
+    for name in reversed(TIER_ORDER[floor:]):
+        if estimate_processing_time(PROCESSING_TIERS[name], duration) <= budget:
+            return get_tier(name)
+    return get_tier(TIER_ORDER[floor])
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test Batch Transcription
+Batch windows stay within Whisper's 30 s input and are cut in pauses
+"""
+
+import numpy as np
+import pytest
+
+from batch_transcription import plan_windows
+
+SAMPLE_RATE = 16000
+
+
+def speech_like(duration: float, word: float = 0.7, pause: float = 0.3) -> np.ndarray:
+    """Bursts of noise ("words") separated by silent pauses"""
+    rng = np.random.default_rng(0)
+    samples = np.zeros(int(duration * SAMPLE_RATE), dtype=np.float32)
+    t = 0.0
+    while t < duration:
+        start, end = int(t * SAMPLE_RATE), int(min(duration, t + word) * SAMPLE_RATE)
+        samples[start:end] = rng.normal(0, 0.3, end - start)
+        t += word + pause
+    return samples
+
+
+def in_pause(t: float, word: float = 0.7, pause: float = 0.3) -> bool:
+    return (t % (word + pause)) >= word - 0.05
+
+
+@pytest.mark.parametrize('duration', [5.0, 29.0, 31.0, 65.0, 200.0])
+def test_windows_cover_the_input_within_30_seconds(duration):
+    windows = plan_windows([speech_like(duration)])
+    assert windows[0][1] == 0.0 and windows[-1][2] == pytest.approx(duration)
+    for (_, _, end), (_, start, _) in zip(windows, windows[1:]):
+        assert start == end
+    assert all(0 < end - start <= 30.0 for _, start, end in windows)
+
+
+def test_windows_are_cut_in_pauses():
+    windows = plan_windows([speech_like(120.0), speech_like(45.0)])
+    cuts = [end for i, (index, _, end) in enumerate(windows)
+            if i + 1 < len(windows) and windows[i + 1][0] == index]
+    assert cuts and all(in_pause(t) for t in cuts)
+    assert sorted({index for index, _, _ in windows}) == [0, 1]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test Chunked Transcription
+Chunk results merge onto one timeline without overlapping or repeating words at the seams
+"""
+
+from chunked_transcription import merge_results
+
+
+def make_segment(start, end, words):
+    words = [{'word': f" {text}", 'start': s, 'end': e} for text, s, e in words]
+    return {'start': start, 'end': end, 'text': ''.join(w['word'] for w in words), 'words': words}
+
+
+def test_words_past_the_chunk_end_are_dropped_and_clamped():
+    first = {'segments': [make_segment(8.0, 10.8, [('hello', 8.0, 9.0), ('world', 9.5, 10.3),
+                                                    ('again', 10.4, 10.8)])]}
+    second = {'segments': [make_segment(0.4, 2.0, [('again', 0.4, 0.8), ('there', 1.0, 2.0)])],
+              'language': 'en'}
+    merged = merge_results([(0.0, 10.0, first), (10.0, 20.0, second)])
+
+    assert [s['text'] for s in merged['segments']] == [' hello world', ' again there']
+    assert merged['segments'][0]['end'] == 10.0
+    assert merged['segments'][0]['words'][-1]['end'] == 10.0
+    assert merged['segments'][1]['start'] == 10.4
+    assert [s['id'] for s in merged['segments']] == [0, 1]
+    assert merged['text'] == ' hello world again there'
+    assert merged['language'] == 'en'
+
+
+def test_words_already_covered_by_the_previous_segment_are_not_repeated():
+    result = {'segments': [make_segment(0.0, 5.0, [('one', 0.0, 2.0), ('two', 2.5, 5.0)]),
+                           make_segment(4.5, 7.0, [('two', 4.5, 5.0), ('three', 5.2, 7.0)]),
+                           make_segment(6.0, 7.0, [('three', 6.0, 7.0)])]}
+    merged = merge_results([(30.0, 60.0, result)])
+
+    assert [s['text'] for s in merged['segments']] == [' one two', ' three']
+    assert merged['segments'][1]['start'] == 35.2
+    assert merged['segments'][0]['end'] <= merged['segments'][1]['start']
+
+
+def test_segments_without_words_are_trimmed_to_the_previous_end():
+    result = {'segments': [{'start': 0.0, 'end': 4.0, 'text': ' a'},
+                           {'start': 3.0, 'end': 6.0, 'text': ' b'},
+                           {'start': 4.5, 'end': 5.5, 'text': ' c'}]}
+    segments = merge_results([(0.0, 30.0, result)])['segments']
+
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [(0.0, 4.0, ' a'), (4.0, 6.0, ' b')]
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test LLM Analysis
+Map windows return candidates clamped to their window, and the reduce step picks
+non-overlapping clips within the target length
+"""
+
+from llm_analysis import map_windows, plan_map_windows, select_segments
+
+
+def make_segments(count, length=10.0):
+    return [{'start': i * length, 'end': (i + 1) * length, 'text': f" s{i}"} for i in range(count)]
+
+
+def candidate(start, end, importance):
+    return {'start_time': start, 'end_time': end, 'importance': importance}
+
+
+def test_windows_group_segments_by_start_time():
+    windows = plan_map_windows(make_segments(10), 35.0)
+    assert [[s['text'] for s in window] for window in windows] == [
+        [' s0', ' s1', ' s2', ' s3'], [' s4', ' s5', ' s6', ' s7'], [' s8', ' s9']]
+
+
+def test_map_clamps_candidates_to_their_window_and_skips_failures():
+    windows = plan_map_windows(make_segments(9), 30.0)
+
+    def score_window(index, segments):
+        if index == 1:
+            raise RuntimeError("rate limited")
+        if index == 2:
+            return None
+        return [candidate(-5.0, 12.0, '7'), candidate(25.0, 99.0, 5),
+                candidate(40.0, 50.0, 3), {'start_time': 1.0}, candidate(10.0, 'x', 1)]
+
+    candidates = map_windows(windows, score_window, concurrency=3)
+    assert candidates == [candidate(0.0, 12.0, 7.0), candidate(25.0, 30.0, 5.0)]
+
+
+def test_reduce_picks_important_non_overlapping_clips_within_the_target():
+    candidates = [candidate(300.0, 310.0, 6.0), candidate(0.0, 100.0, 9.0), candidate(10.0, 30.0, 8.0),
+                  candidate(200.0, 220.0, 7.0), candidate(400.0, 402.0, 10.0)]
+    picked = select_segments(candidates, target_seconds=60.0)
+
+    # The long first pick is trimmed so the others still fit; the overlapping
+    # and too-short candidates are skipped; the result is in time order
+    assert [(c['start_time'], c['end_time']) for c in picked] == [(0.0, 20.0), (200.0, 220.0), (300.0, 310.0)]
+    assert sum(c['end_time'] - c['start_time'] for c in picked) <= 60.0
+
+
+def test_reduce_stops_at_max_count():
+    candidates = [candidate(i * 100.0, i * 100.0 + 5.0, float(i)) for i in range(10)]
+    picked = select_segments(candidates, target_seconds=600.0, max_count=4)
+    assert [c['importance'] for c in picked] == [6.0, 7.0, 8.0, 9.0]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test LLM Client
+The rate limiter refills its buckets over time, and 429s wait for the server's
+Retry-After (pausing every other request too) instead of the usual backoff
+"""
+
+import httpx
+import openai
+
+import llm_client
+from llm_client import LLMClient, RateLimiter, _retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_limiter(monkeypatch, rpm=0, tpm=0):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_client.time, 'monotonic', clock)
+    return RateLimiter(rpm, tpm), clock
+
+
+def make_error(status, headers=None):
+    request = httpx.Request('POST', 'https://api.example.com/v1/chat/completions')
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    error_type = openai.RateLimitError if status == 429 else openai.InternalServerError
+    return error_type('error', response=response, body=None)
+
+
+def test_requests_refill_at_the_per_minute_rate(monkeypatch):
+    limiter, clock = make_limiter(monkeypatch, rpm=60)
+    for _ in range(60):
+        assert limiter.acquire(0) == 0
+    # Empty: the next request is one second (60/rpm) away
+    assert limiter.acquire(0) == 1.0
+    clock.now += 0.5
+    assert limiter.acquire(0) == 0.5
+    clock.now += 0.5
+    assert limiter.acquire(0) == 0
+
+
+def test_tokens_refill_and_wait_is_capped_at_the_poll_interval(monkeypatch):
+    limiter, clock = make_limiter(monkeypatch, tpm=6000)
+    assert limiter.acquire(5000) == 0
+    # 4000 more tokens are needed at 100 per second; sleeps are polled
+    assert limiter.acquire(5000) == RateLimiter.POLL_SECONDS
+    clock.now += 30
+    assert limiter.acquire(5000) == RateLimiter.POLL_SECONDS
+    clock.now += 10
+    assert limiter.acquire(5000) == 0
+    # Unused tokens handed back are available at once
+    limiter.adjust(4000)
+    assert limiter.acquire(4000) == 0
+
+
+def test_oversized_requests_only_wait_for_a_full_bucket(monkeypatch):
+    limiter, _ = make_limiter(monkeypatch, tpm=1000)
+    assert limiter.acquire(50000) == 0
+
+
+def test_retry_after_headers():
+    assert _retry_after(make_error(429, {'retry-after-ms': '1500'})) == 1.5
+    assert _retry_after(make_error(429, {'retry-after': '7'})) == 7.0
+    assert _retry_after(make_error(429, {'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'})) is None
+    assert _retry_after(ValueError("no response")) is None
+
+
+def test_429_waits_for_retry_after_and_pauses_other_requests(monkeypatch):
+    limiter, clock = make_limiter(monkeypatch, rpm=600)
+    client = LLMClient('test-key', limiter=limiter, max_retries=3)
+
+    assert client._retry_delay(make_error(429, {'retry-after': '20'}), attempt=0) == 20.0
+    assert limiter.acquire(0) == RateLimiter.POLL_SECONDS
+    clock.now += 20
+    assert limiter.acquire(0) == 0
+
+
+def test_backoff_without_retry_after_and_retry_limit(monkeypatch):
+    limiter, _ = make_limiter(monkeypatch)
+    client = LLMClient('test-key', limiter=limiter, max_retries=3)
+    monkeypatch.setattr(llm_client.random, 'uniform', lambda low, high: high)
+
+    assert client._retry_delay(make_error(429), attempt=0) == llm_client.BACKOFF_SECONDS
+    assert client._retry_delay(make_error(500), attempt=2) == llm_client.BACKOFF_SECONDS * 4
+    assert client._retry_delay(make_error(500), attempt=3) is None
+    assert client._retry_delay(ValueError("bad request"), attempt=0) is None
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test LLM Hedging
+A slow primary gets a duplicate request on the secondary after the hedge delay,
+the first valid answer wins and the losing request is cancelled
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from llm_hedging import MIN_LATENCY_SAMPLES, HedgedLLMClient
+
+
+class FakeClient:
+    """Async LLM endpoint answering `text` after `delay` seconds (or failing)"""
+
+    def __init__(self, base_url, delay, text='answer', error=None):
+        self.base_url = base_url
+        self.delay = delay
+        self.text = text
+        self.error = error
+        self.calls = []
+        self.cancelled = False
+
+    async def acomplete(self, model, messages, temperature, **options):
+        self.calls.append((model, time.monotonic()))
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.text
+
+
+def make_client(monkeypatch, primary, secondary, delay=0.05, secondary_model=None):
+    monkeypatch.setenv('LLM_HEDGE_DELAY_SECONDS', str(delay))
+    return HedgedLLMClient(primary, secondary, 0.95, secondary_model)
+
+
+def answer(client, validate=None):
+    started = time.monotonic()
+    result = asyncio.run(client.aanswer('gpt-test', [{'role': 'user', 'content': 'hi'}], validate=validate))
+    return result, started
+
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    primary, secondary = FakeClient(None, 0.0, 'primary'), FakeClient('http://local/v1', 0.0, 'secondary')
+    client = make_client(monkeypatch, primary, secondary)
+
+    (text, model), _ = answer(client)
+    assert (text, model) == ('primary', 'gpt-test')
+    assert secondary.calls == []
+    assert client.stats()['hedged'] == 0
+
+
+def test_slow_primary_is_hedged_after_the_delay_and_cancelled(monkeypatch):
+    primary, secondary = FakeClient(None, 5.0, 'primary'), FakeClient('http://local/v1', 0.01, 'secondary')
+    client = make_client(monkeypatch, primary, secondary, delay=0.1, secondary_model='llama')
+
+    (text, model), started = answer(client)
+    assert (text, model) == ('secondary', 'http://local/v1:llama')
+    assert secondary.calls[0][0] == 'llama'
+    assert secondary.calls[0][1] - started >= 0.1
+    assert primary.cancelled
+    stats = client.stats()
+    assert (stats['requests'], stats['hedged'], stats['secondary_wins']) == (1, 1, 1)
+
+
+def test_failed_primary_fails_over_without_waiting(monkeypatch):
+    primary = FakeClient(None, 0.0, error=RuntimeError("503"))
+    secondary = FakeClient('http://local/v1', 0.0, 'secondary')
+    client = make_client(monkeypatch, primary, secondary, delay=30.0)
+
+    (text, _), started = answer(client)
+    assert text == 'secondary'
+    assert secondary.calls[0][1] - started < 1.0
+    assert client.stats()['failovers'] == 1
+
+
+def test_invalid_secondary_answer_does_not_win(monkeypatch):
+    primary, secondary = FakeClient(None, 0.3, 'valid'), FakeClient('http://local/v1', 0.0, 'garbage')
+    client = make_client(monkeypatch, primary, secondary)
+
+    def validate(text):
+        if text != 'valid':
+            raise ValueError(text)
+
+    (text, model), _ = answer(client, validate)
+    assert (text, model) == ('valid', 'gpt-test')
+    assert len(secondary.calls) == 1
+
+
+def test_both_failing_raises(monkeypatch):
+    primary = FakeClient(None, 0.0, error=RuntimeError("primary down"))
+    secondary = FakeClient('http://local/v1', 0.0, error=RuntimeError("secondary down"))
+    client = make_client(monkeypatch, primary, secondary)
+
+    with pytest.raises(RuntimeError, match="secondary down"):
+        answer(client)
+
+
+def test_observed_latency_replaces_the_default_delay(monkeypatch):
+    client = make_client(monkeypatch, FakeClient(None, 0.0), FakeClient('http://local/v1', 0.0), delay=8.0)
+    for i in range(MIN_LATENCY_SAMPLES - 1):
+        client.tracker.record('gpt-test', 1.0 + i / 100)
+    assert client.hedge_delay('gpt-test') == 8.0
+    client.tracker.record('gpt-test', 3.0)
+    assert client.hedge_delay('gpt-test') == 3.0
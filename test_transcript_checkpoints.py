@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test Transcript Checkpoints
+Concurrent jobs on the same audio share checkpoints without deleting each other's
+"""
+
+import os
+
+from transcript_checkpoints import ChunkCheckpoints, collect_checkpoints
+
+
+def test_resumed_counts_only_completed_chunks(tmp_path):
+    first = ChunkCheckpoints('key', str(tmp_path))
+    first.save(0.0, 30.0, {'segments': []})
+    open(first.workspace.path('chunk_30.000_60.000.json.abc.tmp'), 'w').close()
+    first.release()
+    assert ChunkCheckpoints('key', str(tmp_path)).resumed == 1
+
+
+def test_clear_keeps_checkpoints_another_job_is_using(tmp_path):
+    first = ChunkCheckpoints('key', str(tmp_path))
+    second = ChunkCheckpoints('key', str(tmp_path))
+    first.save(0.0, 30.0, {'segments': [{'text': ' hi', 'start': 0.0, 'end': 1.0}]})
+    first.clear()
+    assert second.load(0.0, 30.0) is not None
+    second.clear()
+    assert not os.path.exists(second.workspace.root)
+
+
+def test_collect_deletes_oldest_unused_directories_over_the_limit(tmp_path):
+    old = ChunkCheckpoints('old', str(tmp_path))
+    old.save(0.0, 30.0, {'text': 'x' * 1000})
+    old.release()
+    os.utime(old.workspace.path(old._name(0.0, 30.0)), (0, 0))
+    running = ChunkCheckpoints('running', str(tmp_path))
+    running.save(0.0, 30.0, {'text': 'x' * 1000})
+    os.utime(running.workspace.path(running._name(0.0, 30.0)), (0, 0))
+    recent = ChunkCheckpoints('recent', str(tmp_path))
+    recent.save(0.0, 30.0, {'text': 'x' * 1000})
+    recent.release()
+
+    assert collect_checkpoints(str(tmp_path), max_bytes=2500) == 1
+    assert sorted(os.listdir(tmp_path)) == ['recent', 'running']
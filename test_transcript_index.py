@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test Transcript Index
+Clip boundaries snap to pauses in the right direction and never further than max_shift
+"""
+
+from transcript_index import TranscriptIndex
+from word_store import WordStore
+
+
+def make_index(times, duration):
+    words = [{'word': f" w{i}", 'start': start, 'end': end} for i, (start, end) in enumerate(times)]
+    segments = [{'start': times[0][0], 'end': times[-1][1], 'text': '', 'words': list(words)}]
+    return TranscriptIndex(WordStore.from_segments(segments), segments, duration)
+
+
+def test_snap_end_moves_forward_to_the_pause_after():
+    # A long pause at 1.0-3.0, and the clip ends in the middle of the second word
+    index = make_index([(0.0, 1.0), (3.0, 4.0)], 6.0)
+    assert index.snap_end(3.5) == 4.25
+    assert index.snap_start(3.5) == 2.85
+
+
+def test_snapping_stays_within_max_shift():
+    # Dense speech: 0.3 s words with 0.05 s pauses and one long silence at 10.0-12.0
+    times = [(round(i * 0.35, 2), round(i * 0.35 + 0.3, 2)) for i in range(29)]
+    times += [(12.0 + i * 0.35, 12.0 + i * 0.35 + 0.3) for i in range(10)]
+    index = make_index(times, 20.0)
+    for t in (5.0, 8.3, 9.0, 12.2, 13.1):
+        assert abs(index.snap_start(t, max_shift=0.5) - t) <= 0.5
+        assert abs(index.snap_end(t, max_shift=0.5) - t) <= 0.5
+    # Starts go back to the pause before the word, ends forward to the silence
+    # after it when it's in reach, else to the next pause between words
+    assert index.snap_start(9.0) == 8.7
+    assert index.snap_end(9.0) == 10.35
+    assert index.snap_end(9.0, max_shift=0.5) == 9.1
+
+
+def test_without_a_pause_in_reach_boundaries_stay_put():
+    index = make_index([(0.0, 5.0), (5.0, 10.0)], 10.0)
+    assert index.snap_start(2.5, max_shift=1.0) == 2.5
+    assert index.snap_end(2.5, max_shift=1.0) == 2.5
+    assert index.snap_start(5.5, max_shift=1.0) == 5.0
+    assert index.snap_end(9.5, max_shift=1.0) == 10.0
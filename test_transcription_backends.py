@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test Transcription Backends
+Each backend receives exactly the engine options a processing tier asks for
+"""
+
+import sys
+import types
+
+import pytest
+
+from processing_tiers import PROCESSING_TIERS
+from transcription_backends import get_backend
+
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+EXPECTED = {
+    'whisper': {
+        'draft': {'word_timestamps': True, 'language': 'en', 'beam_size': None, 'best_of': 1,
+                  'temperature': (0.0,)},
+        'standard': {'word_timestamps': True, 'language': 'en', 'beam_size': None, 'best_of': 5,
+                     'temperature': TEMPERATURES},
+        'high': {'word_timestamps': True, 'language': 'en', 'beam_size': 5, 'best_of': 5,
+                 'temperature': TEMPERATURES},
+    },
+    # Without naive_approach, whisper_timestamped keeps its single-pass greedy
+    # default (what the pipeline called it with before tiers existed)
+    'whisper_timestamped': {
+        'draft': {'language': 'en'},
+        'standard': {'language': 'en'},
+        'high': {'language': 'en', 'naive_approach': True, 'beam_size': 5, 'best_of': 5,
+                 'temperature': TEMPERATURES},
+    },
+    'faster_whisper': {
+        'draft': {'word_timestamps': True, 'language': 'en', 'beam_size': 1, 'best_of': 1,
+                  'temperature': (0.0,), 'vad_filter': False},
+        'standard': {'word_timestamps': True, 'language': 'en', 'beam_size': 1, 'best_of': 5,
+                     'temperature': TEMPERATURES, 'vad_filter': False},
+        'high': {'word_timestamps': True, 'language': 'en', 'beam_size': 5, 'best_of': 5,
+                 'temperature': TEMPERATURES, 'vad_filter': False},
+    },
+}
+
+
+class FakeModel:
+    """Records the keyword arguments of transcribe()"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        return self.result
+
+
+@pytest.fixture
+def fake_whisper_timestamped(monkeypatch):
+    calls = []
+    module = types.ModuleType('whisper_timestamped')
+    module.transcribe = lambda model, audio, **options: calls.append(options) or {'segments': []}
+    monkeypatch.setitem(sys.modules, 'whisper_timestamped', module)
+    return calls
+
+
+@pytest.mark.parametrize('tier', sorted(PROCESSING_TIERS))
+def test_whisper_receives_tier_options(tier):
+    backend = get_backend('whisper')
+    model = FakeModel({'segments': []})
+    backend.transcribe(model, 'audio.wav', backend.decode_options(PROCESSING_TIERS[tier]['decode_options'], 'en'))
+    assert model.calls == [EXPECTED['whisper'][tier]]
+
+
+@pytest.mark.parametrize('tier', sorted(PROCESSING_TIERS))
+def test_whisper_timestamped_receives_tier_options(tier, fake_whisper_timestamped):
+    backend = get_backend('whisper_timestamped')
+    options = backend.decode_options(PROCESSING_TIERS[tier]['decode_options'], 'en')
+    backend.transcribe(FakeModel(None), 'audio.wav', options)
+    assert fake_whisper_timestamped == [EXPECTED['whisper_timestamped'][tier]]
+
+
+@pytest.mark.parametrize('tier', sorted(PROCESSING_TIERS))
+def test_whisper_timestamped_without_words_uses_plain_whisper(tier, fake_whisper_timestamped):
+    backend = get_backend('whisper_timestamped')
+    model = FakeModel({'segments': []})
+    options = backend.decode_options(PROCESSING_TIERS[tier]['decode_options'], 'en', word_timestamps=False)
+    backend.transcribe(model, 'audio.wav', options)
+    expected = dict(EXPECTED['whisper_timestamped'][tier], word_timestamps=False)
+    expected.pop('naive_approach', None)
+    assert fake_whisper_timestamped == [] and model.calls == [expected]
+
+
+@pytest.mark.parametrize('tier', sorted(PROCESSING_TIERS))
+def test_faster_whisper_receives_tier_options(tier):
+    backend = get_backend('faster_whisper')
+    model = FakeModel(([], types.SimpleNamespace(language='en')))
+    backend.transcribe(model, 'audio.wav', backend.decode_options(PROCESSING_TIERS[tier]['decode_options'], 'en'))
+    assert model.calls == [EXPECTED['faster_whisper'][tier]]
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Test VAD
+Timestamps from the speech-only audio map back onto the original timeline
+"""
+
+from vad import SpeechMap
+
+
+def test_times_map_into_their_region():
+    # Speech at 2-5 s and 10-12 s, joined with a 0.5 s gap: 0-3 is the first
+    # region, 3-3.5 the gap and 3.5-5.5 the second region
+    speech_map = SpeechMap([(2.0, 5.0), (10.0, 12.0)], gap=0.5)
+    assert speech_map.speech_duration == 5.0
+    assert speech_map.to_original(0.0) == 2.0
+    assert speech_map.to_original(1.25) == 3.25
+    assert speech_map.to_original(3.5) == 10.0
+    assert speech_map.to_original(5.5) == 12.0
+
+
+def test_times_in_the_gap_snap_to_the_end_of_the_region():
+    speech_map = SpeechMap([(2.0, 5.0), (10.0, 12.0)], gap=0.5)
+    assert speech_map.to_original(3.2) == 5.0
+    # Whisper can run slightly past the end of the audio
+    assert speech_map.to_original(6.0) == 12.0
+
+
+def test_remap_segment_moves_words_without_changing_the_input():
+    speech_map = SpeechMap([(2.0, 5.0), (10.0, 12.0)], gap=0.5)
+    segment = {'start': 2.5, 'end': 4.0, 'text': ' across the gap',
+               'words': [{'word': ' across', 'start': 2.5, 'end': 2.9},
+                         {'word': ' the', 'start': 3.6, 'end': 3.8},
+                         {'word': ' gap', 'start': 3.8, 'end': 4.0}]}
+    remapped = speech_map.remap_segment(segment)
+
+    assert (remapped['start'], remapped['end']) == (4.5, 10.5)
+    assert [(w['start'], w['end']) for w in remapped['words']] == [(4.5, 4.9), (10.1, 10.3), (10.3, 10.5)]
+    assert segment['words'][0]['start'] == 2.5
+    assert remapped['text'] == segment['text']
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test Word Store
+Columnar words survive packing for the cache and come back exactly as the legacy dicts
+"""
+
+import copy
+import json
+import random
+
+from word_store import WordStore, legacy_transcript, pack_transcript, unpack_transcript
+
+
+def make_segments(count, start=0.0):
+    rng = random.Random(count)
+    segments = []
+    t = start
+    for index in range(count):
+        words = []
+        for _ in range(rng.randint(1, 6)):
+            duration = round(rng.uniform(0.05, 0.9), 3)
+            words.append({'word': rng.choice([' the', ' a', ' word', ' Hello,', ' ünïcode']),
+                          'start': round(t, 3), 'end': round(t + duration, 3),
+                          'confidence': round(rng.random(), 3)})
+            t += duration + round(rng.uniform(0.0, 0.4), 3)
+        segments.append({'id': index, 'start': words[0]['start'], 'end': words[-1]['end'],
+                         'text': ''.join(w['word'] for w in words), 'words': words})
+    return segments
+
+
+def round_trip(segments):
+    expected = copy.deepcopy(segments)
+    transcript_data = {'segments': segments, 'transcript': WordStore.from_segments(segments),
+                       'language': 'en', 'duration': segments[-1]['end']}
+    cached = json.loads(json.dumps(pack_transcript(transcript_data)))
+    return expected, legacy_transcript(unpack_transcript(cached))
+
+
+def test_round_trip_is_lossless():
+    expected, restored = round_trip(make_segments(200))
+    assert restored['segments'] == expected
+    assert restored['transcript'] == [word for segment in expected for word in segment['words']]
+    assert restored['language'] == 'en'
+
+
+def test_round_trip_is_lossless_late_in_a_long_recording():
+    # float32 spacing stays under a millisecond up to ~4.5 hours
+    expected, restored = round_trip(make_segments(200, start=4 * 3600 + 0.001))
+    assert restored['segments'] == expected
+
+
+def test_segments_without_words_stay_without_words():
+    segments = make_segments(3)
+    del segments[1]['words']
+    expected, restored = round_trip(segments)
+    assert restored['segments'] == expected
+    assert 'words' not in restored['segments'][1]
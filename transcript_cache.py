@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Transcript Cache
+Persists finished transcripts on disk, keyed by a hash of the decoded audio and
+everything that affects transcription, so re-uploads of the same media skip
+Whisper entirely
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from transcription_backends import get_backend
+from workspace import to_json_safe
+
+CACHE_VERSION = 2
+
+
+def transcript_cache_dir() -> str:
+    """Directory holding cached transcripts, or '' when the cache is disabled"""
+    return os.getenv('TRANSCRIPT_CACHE_DIR', 'transcript_cache')
+
+
+def transcript_cache_max_bytes() -> int:
+    return int(float(os.getenv('TRANSCRIPT_CACHE_MAX_MB', '500')) * 1024 * 1024)
+
+
+def engine_version(backend: str) -> str:
+    """Installed version of the package implementing a transcription backend"""
+    from importlib import metadata
+
+    try:
+        return metadata.version(get_backend(backend).package)
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def transcript_key(audio_hash: str, backend: str, model_size: str, options: Dict, **extra) -> str:
+    """Cache key for one transcription of one audio stream.
+
+    `options` are the decode options passed to the engine (language included);
+    `extra` holds anything else that changes the output, such as VAD.
+    """
+    identity = {
+        'version': CACHE_VERSION,
+        'audio': audio_hash,
+        'backend': backend,
+        'engine_version': engine_version(backend),
+        'model': model_size,
+        'options': options,
+        **extra,
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class TranscriptCache:
+    """Size-bounded on-disk LRU of transcript_data dicts, one JSON file per key.
+
+    File modification times record recency, so the LRU order survives restarts
+    and is shared by every process using the same directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = None):
+        self.directory = directory
+        self.max_bytes = max_bytes if max_bytes is not None else transcript_cache_max_bytes()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: Dict):
+        """Store a transcript atomically, then evict down to the size bound"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(to_json_safe(data), f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def _entries(self) -> List:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self.evictions += evicted
+        return evicted
+
+    def stats(self) -> Dict:
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'directory': self.directory,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """Process-wide transcript cache, or None when TRANSCRIPT_CACHE_DIR is empty"""
+    global _cache
+    directory = transcript_cache_dir()
+    if not directory:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.directory != directory:
+            _cache = TranscriptCache(directory)
+        return _cache
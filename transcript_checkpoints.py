@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Transcription Checkpoints
+Persists each transcribed chunk as soon as it is done, keyed by the same
+content hash as the transcript cache, so a job that dies part-way through a
+long file resumes from the last completed chunk instead of starting over
+"""
+
+import os
+import shutil
+import uuid
+from typing import Dict, List, Optional
+
+from transcript_cache import transcript_cache_max_bytes
+from workspace import JobWorkspace, to_json_safe, workspace_root
+
+# Marks a running job using a checkpoint directory (followed by its pid)
+LEASE_PREFIX = 'active_'
+
+
+def checkpoint_root() -> str:
+    """Directory holding in-progress transcriptions, or '' when checkpoints are disabled"""
+    return os.getenv('TRANSCRIPT_CHECKPOINT_DIR', os.path.join(workspace_root(), 'checkpoints'))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _live_leases(directory: str) -> List[str]:
+    """Lease files in a checkpoint directory whose job's process is still running"""
+    leases = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return leases
+    for name in names:
+        if not name.startswith(LEASE_PREFIX):
+            continue
+        try:
+            pid = int(name[len(LEASE_PREFIX):].split('_')[0])
+        except ValueError:
+            continue
+        if _pid_alive(pid):
+            leases.append(name)
+    return leases
+
+
+class ChunkCheckpoints:
+    """Raw chunk results of one transcription (one JSON file per chunk window).
+
+    The directory is named after the transcript key rather than the job, so a
+    restarted job - or a re-run of the same file - finds it again. Concurrent
+    jobs on the same audio share it; each holds a lease file while it runs, and
+    the directory is only removed once no running job holds one.
+    """
+
+    def __init__(self, key: str, root: str = None):
+        self.workspace = JobWorkspace(key, root or checkpoint_root(), keep=True)
+        self.resumed = sum(1 for name in os.listdir(self.workspace.root) if name.endswith('.json'))
+        self.lease = f"{LEASE_PREFIX}{os.getpid()}_{uuid.uuid4().hex}"
+        open(self.workspace.path(self.lease), 'w').close()
+
+    @staticmethod
+    def _name(start: float, end: float) -> str:
+        return f"chunk_{start:.3f}_{end:.3f}.json"
+
+    def load(self, start: float, end: float) -> Optional[Dict]:
+        """Result of a chunk completed by an earlier run, if any"""
+        return self.workspace.read_json(self._name(start, end))
+
+    def save(self, start: float, end: float, result: Dict) -> Dict:
+        """Atomically persist a chunk result; returns it as stored, so fresh and
+        resumed runs hand identical results to the merge"""
+        result = to_json_safe(result)
+        self.workspace.write_json(self._name(start, end), result)
+        return result
+
+    def release(self):
+        """Drop this job's lease but keep the checkpoints (the job failed or was
+        abandoned; a rerun resumes from them)"""
+        try:
+            os.remove(self.workspace.path(self.lease))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Drop this job's lease, and the checkpoints once no other running
+        job is using them (the whole transcript is done)"""
+        self.release()
+        if not _live_leases(self.workspace.root):
+            shutil.rmtree(self.workspace.root, ignore_errors=True)
+
+
+def collect_checkpoints(root: str = None, max_bytes: int = None) -> int:
+    """Delete the least recently written checkpoint directories no running job
+    holds until all of them fit in `max_bytes` (the transcript cache's size
+    limit by default); returns how many were deleted"""
+    root = root or checkpoint_root()
+    max_bytes = max_bytes if max_bytes is not None else transcript_cache_max_bytes()
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+
+    directories = []
+    total = 0
+    for name in names:
+        directory = os.path.join(root, name)
+        size = 0
+        mtime = 0.0
+        try:
+            for entry in os.scandir(directory):
+                stat = entry.stat()
+                size += stat.st_size
+                mtime = max(mtime, stat.st_mtime)
+        except OSError:
+            continue
+        total += size
+        directories.append((mtime, size, directory))
+
+    deleted = 0
+    for _, size, directory in sorted(directories):
+        if total <= max_bytes:
+            break
+        if _live_leases(directory):
+            continue
+        shutil.rmtree(directory, ignore_errors=True)
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def open_checkpoints(key: str) -> Optional[ChunkCheckpoints]:
+    if not checkpoint_root():
+        return None
+    # Interrupted transcriptions that were never resumed don't pile up
+    collect_checkpoints()
+    return ChunkCheckpoints(key)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Transcript Interval Index
+Sorted word/segment/pause intervals with O(log n) time queries, used to snap
+summary segment boundaries to natural pauses so clips never cut mid-word
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from word_store import DECIMALS, WordStore
+
+# Boundaries only move this far (seconds) to reach a pause
+MAX_SHIFT = 1.5
+# A pause at least this long (seconds) counts as a silence worth cutting in
+MIN_SILENCE = 0.3
+# Breathing room kept before the first word / after the last word of a clip
+LEAD_IN = 0.15
+TAIL_OUT = 0.25
+
+
+class TranscriptIndex:
+    """Time index over a transcript's words, segments and the pauses between words.
+
+    Words must be in time order (as the pipeline emits them). Without word
+    timestamps, segments stand in for words.
+    """
+
+    def __init__(self, words: WordStore, segments: List[Dict], duration: float = None):
+        import numpy as np
+
+        self.words = words
+        if len(words):
+            self.starts = words.starts.astype(np.float64)
+            self.ends = words.ends.astype(np.float64)
+        else:
+            self.starts = np.array([s['start'] for s in segments], dtype=np.float64)
+            self.ends = np.array([s['end'] for s in segments], dtype=np.float64)
+        self.segment_starts = np.array([s['start'] for s in segments], dtype=np.float64)
+        self.segment_ends = np.array([s['end'] for s in segments], dtype=np.float64)
+        self.duration = duration if duration is not None else (float(self.ends[-1]) if len(self.ends) else 0.0)
+
+        # Pauses: before the first word, between consecutive words, after the last
+        self.gap_starts = np.concatenate(([0.0], self.ends))
+        self.gap_ends = np.concatenate((self.starts, [max(self.duration, self.ends[-1] if len(self.ends) else 0.0)]))
+        self.gap_ends = np.maximum(self.gap_ends, self.gap_starts)
+        self._silences: Dict[float, Tuple] = {}
+
+    @classmethod
+    def from_transcript(cls, transcript_data: Dict) -> 'TranscriptIndex':
+        words = transcript_data.get('transcript')
+        if not isinstance(words, WordStore):
+            words = WordStore.from_segments([{'words': list(words or [])}])
+        return cls(words, transcript_data['segments'], transcript_data.get('duration'))
+
+    def word_at(self, t: float) -> Optional[int]:
+        """Index of the word being spoken at time t, or None in a pause"""
+        import numpy as np
+
+        i = int(np.searchsorted(self.starts, t, side='right')) - 1
+        if i >= 0 and t < self.ends[i]:
+            return i
+        return None
+
+    def segment_at(self, t: float) -> Optional[int]:
+        import numpy as np
+
+        i = int(np.searchsorted(self.segment_starts, t, side='right')) - 1
+        if i >= 0 and t < self.segment_ends[i]:
+            return i
+        return None
+
+    def word_range(self, a: float, b: float) -> Tuple[int, int]:
+        """[lo, hi) indices of the words overlapping [a, b]"""
+        import numpy as np
+
+        lo = int(np.searchsorted(self.ends, a, side='right'))
+        hi = int(np.searchsorted(self.starts, b, side='left'))
+        return lo, max(lo, hi)
+
+    def words_between(self, a: float, b: float) -> WordStore:
+        """Zero-copy view of the words overlapping [a, b]"""
+        lo, hi = self.word_range(a, b)
+        return self.words[lo:hi]
+
+    def _nearest(self, starts, ends, t: float) -> Optional[Tuple[float, float]]:
+        import numpy as np
+
+        if len(starts) == 0:
+            return None
+        # Gaps are disjoint and sorted, so the nearest one is next to t's position
+        i = int(np.searchsorted(ends, t, side='left'))
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(starts)]
+        best = min(candidates, key=lambda j: 0.0 if starts[j] <= t <= ends[j]
+                   else min(abs(t - starts[j]), abs(t - ends[j])))
+        return round(float(starts[best]), DECIMALS), round(float(ends[best]), DECIMALS)
+
+    def nearest_gap(self, t: float) -> Optional[Tuple[float, float]]:
+        """(start, end) of the pause between words closest to time t"""
+        return self._nearest(self.gap_starts, self.gap_ends, t)
+
+    def _silence_gaps(self, min_duration: float) -> Tuple:
+        if min_duration not in self._silences:
+            keep = (self.gap_ends - self.gap_starts) >= min_duration
+            self._silences[min_duration] = (self.gap_starts[keep], self.gap_ends[keep])
+        return self._silences[min_duration]
+
+    def nearest_silence(self, t: float, min_duration: float = MIN_SILENCE) -> Optional[Tuple[float, float]]:
+        """(start, end) of the closest pause lasting at least `min_duration` seconds"""
+        return self._nearest(*self._silence_gaps(min_duration), t)
+
+    @staticmethod
+    def _pause_before(starts, ends, t: float) -> Optional[Tuple[float, float]]:
+        """The last of the pauses starting at or before t"""
+        import numpy as np
+
+        i = int(np.searchsorted(starts, t, side='right')) - 1
+        return (float(starts[i]), float(ends[i])) if i >= 0 else None
+
+    @staticmethod
+    def _pause_after(starts, ends, t: float) -> Optional[Tuple[float, float]]:
+        """The first of the pauses ending at or after t"""
+        import numpy as np
+
+        i = int(np.searchsorted(ends, t, side='left'))
+        return (float(starts[i]), float(ends[i])) if i < len(starts) else None
+
+    @staticmethod
+    def _cut_in(gap: Optional[Tuple[float, float]], cut: float, t: float, max_shift: float) -> Optional[float]:
+        """`cut` moved to within `max_shift` of t, or None when that leaves the gap"""
+        if gap is None:
+            return None
+        cut = min(max(cut, t - max_shift), t + max_shift)
+        return round(cut, DECIMALS) if gap[0] <= cut <= gap[1] else None
+
+    def snap_start(self, t: float, max_shift: float = MAX_SHIFT, min_silence: float = MIN_SILENCE) -> float:
+        """Move a clip start at most `max_shift` into a pause, just before the
+        next word: a silence at or before t, else any pause between words at or
+        before t, else the nearest one"""
+        for gap in (self._pause_before(*self._silence_gaps(min_silence), t),
+                    self._pause_before(self.gap_starts, self.gap_ends, t),
+                    self.nearest_gap(t)):
+            cut = self._cut_in(gap, max(gap[0], gap[1] - LEAD_IN) if gap else 0.0, t, max_shift)
+            if cut is not None:
+                return cut
+        # No pause within reach: at least start at the beginning of the word
+        word = self.word_at(t)
+        if word is not None and t - self.starts[word] <= max_shift:
+            return round(float(self.starts[word]), DECIMALS)
+        return t
+
+    def snap_end(self, t: float, max_shift: float = MAX_SHIFT, min_silence: float = MIN_SILENCE) -> float:
+        """Move a clip end at most `max_shift` into a pause, just after the last
+        word: a silence at or after t, else any pause between words at or after
+        t, else the nearest one"""
+        for gap in (self._pause_after(*self._silence_gaps(min_silence), t),
+                    self._pause_after(self.gap_starts, self.gap_ends, t),
+                    self.nearest_gap(t)):
+            cut = self._cut_in(gap, min(gap[1], gap[0] + TAIL_OUT) if gap else 0.0, t, max_shift)
+            if cut is not None:
+                return cut
+        word = self.word_at(t)
+        if word is not None and self.ends[word] - t <= max_shift:
+            return round(float(self.ends[word]), DECIMALS)
+        return t
+
+    def snap_segments(self, summary_segments: List[Dict], max_shift: float = MAX_SHIFT,
+                      min_silence: float = MIN_SILENCE) -> List[Dict]:
+        """Copies of LLM summary segments with start/end moved to natural pauses"""
+        snapped = []
+        for segment in summary_segments:
+            start = self.snap_start(segment['start_time'], max_shift, min_silence)
+            end = self.snap_end(segment['end_time'], max_shift, min_silence)
+            start = max(0.0, round(start, 3))
+            end = min(self.duration or end, round(end, 3))
+            if end <= start:
+                # Snapping collapsed a very short clip; keep what the LLM asked for
+                start, end = segment['start_time'], segment['end_time']
+            snapped.append(dict(segment, start_time=start, end_time=end))
+        return snapped
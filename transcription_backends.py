@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Transcription Backends
+Speech-to-text engines behind one interface: each turns 16 kHz samples into a
+Whisper-style result and formats its segments into the pipeline's common
+transcript schema (text, start, end and words with word/start/end/confidence)
+"""
+
+import importlib.util
+import os
+from typing import Dict, List, Optional
+
+# Tier decode options that only steer whisper_timestamped (see its backend)
+TIER_ONLY_OPTIONS = ('naive_approach',)
+
+
+def engine_options(tier_options: Dict) -> Dict:
+    """A tier's decoding parameters without the backend-specific switches"""
+    return {key: value for key, value in tier_options.items() if key not in TIER_ONLY_OPTIONS}
+
+
+class TranscriptionBackend:
+    """Base class for an engine served by the model registry under `name`"""
+
+    name = None
+    # Python package implementing the engine (and whose version keys caches)
+    module = None
+    package = None
+
+    def available(self) -> bool:
+        return importlib.util.find_spec(self.module) is not None
+
+    def decode_options(self, tier_options: Dict, language: Optional[str], word_timestamps: bool = True) -> Dict:
+        """Engine options for a tier's decoding parameters and a fixed language
+        (with word timestamps unless `word_timestamps` is False)"""
+        return {'language': language, **engine_options(tier_options)}
+
+    def transcribe(self, model, audio, options: Dict) -> Dict:
+        """Whisper-style result ({'text', 'segments', 'language'}) for samples or a path"""
+        raise NotImplementedError
+
+    def detect_language(self, model, samples, features=None) -> Dict:
+        """{'language': code, 'probability': p} for up to 30 s of samples.
+
+        `features` (mel_features.MelFeatures on the samples' timeline) spares
+        engines that take log-mel input their own spectrogram.
+        """
+        from language_detection import detect_language
+        return detect_language(model, samples, features)
+
+    def align_words(self, model, samples, segments: List[Dict], language: Optional[str],
+                    features=None) -> List[List[Dict]]:
+        """Words (in the common schema) of already-transcribed segments, whose
+        start/end are relative to `samples`; one list per segment"""
+        from word_alignment import align_segments
+        return align_segments(model, samples, segments, language, features)
+
+    def transcribe_batch(self, model, audios: List, options: Dict, batch_size: int = None,
+                         languages: List[Optional[str]] = None) -> List[Dict]:
+        """Whisper-style results for many sample arrays, decoded in batched
+        forward passes; `languages` fixes each array's language"""
+        from batch_transcription import transcribe_batch
+        return transcribe_batch(model, audios, options, batch_size, languages)
+
+    def _format_word(self, word: Dict) -> Dict:
+        return {
+            'word': word['word'].strip(),
+            'start': word['start'],
+            'end': word['end'],
+            'confidence': round(word.get('probability', 1.0), 3)
+        }
+
+    def format_segment(self, segment: Dict) -> Dict:
+        """A result segment in the common transcript schema"""
+        segment_data = {
+            'text': segment['text'],
+            'start': segment['start'],
+            'end': segment['end']
+        }
+        if 'words' in segment:
+            segment_data['words'] = [self._format_word(word) for word in segment['words']]
+        return segment_data
+
+
+class WhisperBackend(TranscriptionBackend):
+    """openai-whisper with its built-in cross-attention word timestamps"""
+
+    name = 'whisper'
+    module = 'whisper'
+    package = 'openai-whisper'
+
+    def decode_options(self, tier_options: Dict, language: Optional[str], word_timestamps: bool = True) -> Dict:
+        return {'word_timestamps': word_timestamps, 'language': language, **engine_options(tier_options)}
+
+    def transcribe(self, model, audio, options: Dict) -> Dict:
+        return model.transcribe(audio, **options)
+
+
+class WhisperTimestampedBackend(TranscriptionBackend):
+    """whisper-timestamped: the same weights with DTW-aligned word timestamps"""
+
+    name = 'whisper_timestamped'
+    module = 'whisper_timestamped'
+    package = 'whisper-timestamped'
+
+    # Any of these switches whisper_timestamped to its "naive" mode (decode
+    # first, then a second alignment pass), so they're only passed on when the
+    # tier sets naive_approach
+    NAIVE_OPTIONS = ('beam_size', 'best_of', 'temperature')
+
+    def decode_options(self, tier_options: Dict, language: Optional[str], word_timestamps: bool = True) -> Dict:
+        options = {'language': language}
+        if tier_options.get('naive_approach'):
+            options.update(tier_options)
+        else:
+            options.update({key: value for key, value in engine_options(tier_options).items()
+                            if key not in self.NAIVE_OPTIONS})
+        if not word_timestamps:
+            options['word_timestamps'] = False
+        return options
+
+    def transcribe(self, model, audio, options: Dict) -> Dict:
+        if options.get('word_timestamps') is False:
+            # Segment timestamps only: plain Whisper decoding skips the DTW pass
+            return model.transcribe(audio, **engine_options(options))
+        import whisper_timestamped
+        return whisper_timestamped.transcribe(model, audio, **options)
+
+    def transcribe_batch(self, model, audios: List, options: Dict, batch_size: int = None,
+                         languages: List[Optional[str]] = None) -> List[Dict]:
+        results = super().transcribe_batch(model, audios, options, batch_size, languages)
+        # Batched decoding aligns words the openai-whisper way; rename their keys
+        for result in results:
+            for segment in result['segments']:
+                if 'words' in segment:
+                    segment['words'] = [{'text': word['word'], 'start': word['start'], 'end': word['end'],
+                                         'confidence': word.get('probability', 1.0)}
+                                        for word in segment['words']]
+        return results
+
+    def _format_word(self, word: Dict) -> Dict:
+        return {
+            'word': word['text'].strip(),
+            'start': word['start'],
+            'end': word['end'],
+            'confidence': round(word.get('confidence', 1.0), 3)
+        }
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """faster-whisper: Whisper converted to CTranslate2, int8 on CPU by default"""
+
+    name = 'faster_whisper'
+    module = 'faster_whisper'
+    package = 'faster-whisper'
+
+    def decode_options(self, tier_options: Dict, language: Optional[str], word_timestamps: bool = True) -> Dict:
+        options = {'word_timestamps': word_timestamps, 'language': language, **engine_options(tier_options)}
+        # Greedy decoding is beam_size=None in openai-whisper but 1 here
+        options['beam_size'] = options.get('beam_size') or 1
+        # Silence is already stripped by our own VAD pass
+        options['vad_filter'] = False
+        return options
+
+    def transcribe(self, model, audio, options: Dict) -> Dict:
+        import numpy as np
+
+        if not isinstance(audio, str):
+            audio = np.ascontiguousarray(audio, dtype=np.float32)
+        segments, info = model.transcribe(audio, **options)
+
+        result_segments = []
+        # Segments are decoded lazily as the generator is consumed
+        for segment in segments:
+            segment_data = {
+                'id': segment.id,
+                'seek': segment.seek,
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text,
+                'avg_logprob': segment.avg_logprob,
+                'no_speech_prob': segment.no_speech_prob,
+            }
+            if segment.words is not None:
+                segment_data['words'] = [
+                    {'word': word.word, 'start': word.start, 'end': word.end, 'probability': word.probability}
+                    for word in segment.words
+                ]
+            result_segments.append(segment_data)
+
+        return {
+            'text': ''.join(segment['text'] for segment in result_segments),
+            'segments': result_segments,
+            'language': info.language,
+        }
+
+    def detect_language(self, model, samples, features=None) -> Dict:
+        import numpy as np
+
+        if not isinstance(samples, str):
+            samples = np.ascontiguousarray(samples, dtype=np.float32)
+        # Language ID runs eagerly; the unconsumed segment generator decodes nothing
+        _, info = model.transcribe(samples, beam_size=1, vad_filter=False)
+        return {'language': info.language, 'probability': float(info.language_probability)}
+
+    def align_words(self, model, samples, segments: List[Dict], language: Optional[str],
+                    features=None) -> List[List[Dict]]:
+        # No forced-alignment API: re-decode the window with word timestamps
+        # and give each word to the segment its midpoint falls in
+        if not segments:
+            return []
+        result = self.transcribe(model, samples, {'word_timestamps': True, 'language': language,
+                                                  'beam_size': 1, 'vad_filter': False})
+        words = [word for segment in result['segments'] for word in self.format_segment(segment).get('words', [])]
+        aligned = [[] for _ in segments]
+        for word in words:
+            middle = (word['start'] + word['end']) / 2
+            index = min(range(len(segments)), key=lambda i: 0.0 if segments[i]['start'] <= middle <= segments[i]['end']
+                        else min(abs(middle - segments[i]['start']), abs(middle - segments[i]['end'])))
+            aligned[index].append(word)
+        return aligned
+
+    def transcribe_batch(self, model, audios: List, options: Dict, batch_size: int = None,
+                         languages: List[Optional[str]] = None) -> List[Dict]:
+        # CTranslate2 batches within an input, not across inputs: one at a time
+        languages = languages or [options.get('language')] * len(audios)
+        return [self.transcribe(model, audio, dict(options, language=language))
+                for audio, language in zip(audios, languages)]
+
+
+BACKENDS: Dict[str, TranscriptionBackend] = {
+    backend.name: backend
+    for backend in (WhisperBackend(), WhisperTimestampedBackend(), FasterWhisperBackend())
+}
+
+
+def get_backend(name: str) -> TranscriptionBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return BACKENDS[name]
+
+
+def available_backends() -> List[str]:
+    """Names of the backends whose engine is installed"""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def default_backend(fallback: str = 'whisper') -> str:
+    return os.getenv('TRANSCRIPTION_BACKEND') or fallback
+
+
+def select_backend(requested: str = None, preferred: str = None, fallback: str = 'whisper') -> TranscriptionBackend:
+    """Pick a job's backend.
+
+    An explicitly requested backend is used as is. A tier's preferred backend
+    is used when its engine is installed; otherwise, and when neither is set,
+    TRANSCRIPTION_BACKEND or `fallback` is used.
+    """
+    if requested:
+        return get_backend(requested)
+    if preferred and get_backend(preferred).available():
+        return get_backend(preferred)
+    return get_backend(default_backend(fallback))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-Fine Transcription
+A tiny Whisper model transcribes the whole video for segment selection; only
+the selected spans are then re-transcribed with the tier's model
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+# Audio kept around each selected span when re-transcribing it (seconds)
+REFINE_PADDING = 2.0
+
+
+def two_pass_enabled() -> bool:
+    return os.getenv('TWO_PASS_TRANSCRIPTION', 'false').lower() in ('1', 'true', 'yes')
+
+
+def coarse_model_size() -> str:
+    return os.getenv('COARSE_WHISPER_MODEL', 'tiny')
+
+
+def refine_windows(segments: List[Dict], spans: List[Tuple[float, float]],
+                   padding: float = REFINE_PADDING) -> List[Tuple[int, int, float, float]]:
+    """(first, last, start, end) per window to re-transcribe: the coarse
+    segments first..last (inclusive) overlapping a padded span, merged where
+    they touch, and the time range they cover"""
+    runs = []
+    for start, end in sorted(spans):
+        overlapping = [index for index, segment in enumerate(segments)
+                       if segment['start'] < end + padding and segment['end'] > start - padding]
+        if not overlapping:
+            continue
+        first, last = overlapping[0], overlapping[-1]
+        if runs and first <= runs[-1][1] + 1:
+            runs[-1][1] = max(runs[-1][1], last)
+        else:
+            runs.append([first, last])
+    return [(first, last, segments[first]['start'], segments[last]['end']) for first, last in runs]
+
+
+def splice_segments(segments: List[Dict], refined: List[Tuple[int, int, List[Dict]]]) -> List[Dict]:
+    """Coarse segments with each (first, last) run replaced by its refined segments"""
+    spliced = []
+    position = 0
+    for first, last, replacement in refined:
+        spliced.extend(segments[position:first])
+        spliced.extend(replacement)
+        position = last + 1
+    spliced.extend(segments[position:])
+    return spliced
+
+
+# What the CPU seconds in cost reports cover: time.thread_time() of the job's
+# own thread, so concurrent jobs in the same process aren't billed to it. Work
+# in torch's intra-op threads, a model server or chunk worker processes isn't
+# counted, so compare reports with each other rather than with wall time.
+CPU_SCOPE = 'job_thread'
+
+
+def cost_report(duration: float, coarse_model: str, refine_model: str, coarse_seconds: float,
+                refine_seconds: float, refined_audio: float) -> Dict:
+    """CPU seconds spent by both passes against what a single pass of the
+    refine model over the whole input would have cost (extrapolated from the
+    refine pass's own speed). Times are the job thread's CPU time (see
+    CPU_SCOPE)."""
+    single_pass = refine_seconds / refined_audio * duration if refined_audio > 0 else None
+    two_pass = coarse_seconds + refine_seconds
+    return {
+        'mode': 'two_pass',
+        'cpu_scope': CPU_SCOPE,
+        'coarse_model': coarse_model,
+        'refine_model': refine_model,
+        'audio_seconds': round(duration, 1),
+        'refined_audio_seconds': round(refined_audio, 1),
+        'coarse_cpu_seconds': round(coarse_seconds, 2),
+        'refine_cpu_seconds': round(refine_seconds, 2),
+        'two_pass_cpu_seconds': round(two_pass, 2),
+        'single_pass_cpu_seconds_estimate': round(single_pass, 2) if single_pass is not None else None,
+        'savings': round(1 - two_pass / single_pass, 3) if single_pass else None,
+    }
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Voice Activity Detection
+Vectorized NumPy energy-based speech detector that runs before transcription,
+so Whisper only sees speech-bearing audio and silent videos skip it entirely
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from audio_extraction import SAMPLE_RATE, AudioBuffer
+
+SPEECH_FILENAME = 'speech_16k_f32le.pcm'
+FRAME_SECONDS = 0.03
+# Regions are glued together with this much silence before transcription
+GAP_SECONDS = 0.5
+# Below this share of non-speech, cutting it out isn't worth a second buffer
+MIN_SAVINGS = 0.1
+
+
+def vad_enabled() -> bool:
+    return os.getenv('VAD_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+
+def frame_energy(samples, sample_rate: int = SAMPLE_RATE, frame_seconds: float = 0.01):
+    """Mean-square energy (dB) of consecutive non-overlapping frames"""
+    import numpy as np
+
+    frame = max(1, int(sample_rate * frame_seconds))
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.asarray(samples[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    power = np.einsum('ij,ij->i', frames, frames) / frame
+    return 10.0 * np.log10(power + 1e-10)
+
+
+def _runs(mask) -> Tuple:
+    """Start/end frame indices of the True runs in a boolean array"""
+    import numpy as np
+
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return edges[0::2], edges[1::2]
+
+
+def detect_speech(samples, sample_rate: int = SAMPLE_RATE, margin_db: float = 12.0,
+                  floor_db: float = -55.0, ceiling_db: float = -35.0, min_speech: float = 0.25,
+                  min_silence: float = 0.4, padding: float = 0.2) -> List[Tuple[float, float]]:
+    """Speech regions as (start, end) seconds.
+
+    A frame is speech when its energy is `margin_db` above the noise floor
+    (10th percentile of frame energy) and above an absolute `floor_db`. The
+    threshold never rises above `ceiling_db`, so audio that is never quiet
+    (speech over music) errs towards being transcribed. Pauses shorter than
+    `min_silence` are bridged, bursts shorter than `min_speech` are dropped
+    and every region is padded by `padding`.
+    """
+    import numpy as np
+
+    energy = frame_energy(samples, sample_rate, FRAME_SECONDS)
+    if len(energy) == 0:
+        return []
+
+    noise_floor = float(np.percentile(energy, 10))
+    speech = energy > max(min(noise_floor + margin_db, ceiling_db), floor_db)
+
+    # Bridge short pauses between words
+    starts, ends = _runs(~speech)
+    short_gaps = (ends - starts) * FRAME_SECONDS < min_silence
+    interior = (starts > 0) & (ends < len(speech))
+    fill = np.zeros(len(speech) + 1, dtype=np.int32)
+    np.add.at(fill, starts[short_gaps & interior], 1)
+    np.add.at(fill, ends[short_gaps & interior], -1)
+    speech |= np.cumsum(fill[:-1]) > 0
+
+    # Drop clicks and other short bursts
+    starts, ends = _runs(speech)
+    keep = (ends - starts) * FRAME_SECONDS >= min_speech
+
+    duration = len(samples) / sample_rate
+    regions = []
+    for start, end in zip(starts[keep], ends[keep]):
+        region_start = max(0.0, start * FRAME_SECONDS - padding)
+        region_end = min(duration, end * FRAME_SECONDS + padding)
+        if regions and region_start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], region_end)
+        else:
+            regions.append((region_start, region_end))
+    return [(round(float(start), 3), round(float(end), 3)) for start, end in regions]
+
+
+class SpeechMap:
+    """Maps timestamps in the concatenated speech audio back to the original timeline"""
+
+    def __init__(self, regions: List[Tuple[float, float]], gap: float = GAP_SECONDS):
+        self.regions = regions
+        self.gap = gap
+        self.offsets = []
+        position = 0.0
+        for start, end in regions:
+            self.offsets.append(position)
+            position += (end - start) + gap
+
+    @property
+    def speech_duration(self) -> float:
+        return sum(end - start for start, end in self.regions)
+
+    def to_original(self, t: float) -> float:
+        """Original-timeline time for a time in the speech audio"""
+        import bisect
+
+        index = max(0, bisect.bisect_right(self.offsets, t) - 1)
+        start, end = self.regions[index]
+        # Times inside the inserted gap snap to the end of the region
+        return round(min(start + (t - self.offsets[index]), end), 3)
+
+    def remap_segment(self, segment: Dict) -> Dict:
+        """Copy of a Whisper segment with its (and its words') timestamps remapped"""
+        segment = dict(segment, start=self.to_original(segment['start']),
+                       end=self.to_original(segment['end']))
+        if 'words' in segment:
+            segment['words'] = [
+                dict(word, start=self.to_original(word['start']), end=self.to_original(word['end']))
+                for word in segment['words']
+            ]
+        return segment
+
+    def remap_result(self, result: Dict) -> Dict:
+        """Rewrite a Whisper result's segment and word timestamps"""
+        return dict(result, segments=[self.remap_segment(segment) for segment in result.get('segments', [])])
+
+
+def extract_speech(audio: AudioBuffer, workspace) -> Tuple[Optional[AudioBuffer], Optional[SpeechMap]]:
+    """Speech-only audio for transcription plus the map back to the original.
+
+    Returns (None, None) when there is no speech, and (audio, None) when
+    nearly everything is speech and the original buffer should be used as is.
+    """
+    regions = detect_speech(audio.samples, audio.sample_rate)
+    if not regions:
+        print("No speech detected, skipping transcription")
+        return None, None
+
+    speech_map = SpeechMap(regions)
+    if speech_map.speech_duration > audio.duration * (1 - MIN_SAVINGS):
+        return audio, None
+
+    print(f"Speech detected in {len(regions)} regions "
+          f"({speech_map.speech_duration:.1f}s of {audio.duration:.1f}s)")
+    return extract_regions(audio, speech_map, workspace, SPEECH_FILENAME), speech_map
+
+
+def extract_regions(audio: AudioBuffer, speech_map: SpeechMap, workspace, filename: str) -> AudioBuffer:
+    """The map's regions of `audio` glued together with its gap of silence,
+    written to `filename` in the workspace"""
+    import numpy as np
+
+    path = workspace.path(filename)
+    gap = np.zeros(int(speech_map.gap * audio.sample_rate), dtype=np.float32)
+    with open(f"{path}.tmp", 'wb') as f:
+        for start, end in speech_map.regions:
+            f.write(np.ascontiguousarray(audio.window(start, end)).tobytes())
+            f.write(gap.tobytes())
+    os.replace(f"{path}.tmp", path)
+    return AudioBuffer(path, audio.sample_rate)
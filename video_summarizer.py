@@ -7,122 +7,663 @@ Extracts key segments from videos using speech analysis and LLM summarization
 import os
 import json
 import requests
-import whisper_timestamped as whisper
 from moviepy.editor import VideoFileClip, concatenate_videoclips
-from openai import OpenAI
 from dotenv import load_dotenv
+import heapq
 import tempfile
-from typing import List, Dict, Tuple
+import threading
+import time
+from typing import Callable, Iterator, List, Dict, Optional, Set, Tuple
+from model_registry import get_registry
+from model_server import ModelServerError, get_model_server_client
+from processing_tiers import get_tier, target_seconds
+from audio_extraction import AudioBuffer, extract_audio
+from workspace import JobWorkspace
+from chunked_transcription import (default_chunk_seconds, default_workers, iter_chunk_results,
+                                   iter_merged_segments, plan_chunks, shift_result, stream_chunk_seconds)
+from vad import SpeechMap, extract_regions, extract_speech, vad_enabled
+from transcript_cache import get_transcript_cache, transcript_key
+from language_detection import detection_window, language_cache_key
+from transcription_backends import select_backend
+from word_store import WordStore, pack_transcript, unpack_transcript
+from transcript_index import TranscriptIndex
+from transcript_checkpoints import ChunkCheckpoints, open_checkpoints
+from word_alignment import segments_to_align
+from mel_features import MelFeatures, compute_features
+from audio_fingerprint import GAPS_FILENAME, FingerprintIndex, fingerprint, get_fingerprint_index, plan_reuse
+from llm_analysis import (MAP_CANDIDATES, analysis_mode, map_concurrency, map_window_seconds, map_windows,
+                          plan_map_windows, select_segments)
+from llm_client import get_llm_client
+from llm_hedging import get_hedged_client
+from llm_cache import get_llm_cache, llm_cache_key, transcript_digest
+from llm_prompt import (MAP_PROMPT_TEMPLATE, SYSTEM_PROMPT, TEMPERATURE, build_prompt, parse_response,
+                        prompt_version)
+from two_pass import (CPU_SCOPE, coarse_model_size, cost_report, refine_windows, splice_segments,
+                      two_pass_enabled)
 
 # Load environment variables
 load_dotenv()
 
+# Raw sample format of the decoded job audio, as understood by the model server
+AUDIO_FORMAT = 'f32le'
+
 class VideoSummarizer:
-    def __init__(self, openai_api_key: str = None):
-        """Initialize the video summarizer with OpenAI API key"""
+    # Transcription engine used when neither the caller, the tier nor
+    # TRANSCRIPTION_BACKEND picks one (see transcription_backends)
+    DEFAULT_BACKEND = 'whisper_timestamped'
+    # Length of the clips used when the LLM isn't available
+    CLIP_SECONDS = 10
+    
+    def __init__(self, openai_api_key: str = None, whisper_model=None, model_size: str = None,
+                 tier=None, transcribe_workers: int = None, use_vad: bool = None, backend: str = None,
+                 word_alignment: str = None, two_pass: bool = None, target_length: str = None):
+        """Initialize the video summarizer with OpenAI API key.
+
+        Pass ``whisper_model`` to reuse an already-loaded model; otherwise the
+        model is borrowed from the process-wide registry and shared with every
+        other summarizer using the same size and device. ``tier`` (a name or a
+        dict from processing_tiers) sets the model size, decoding parameters,
+        LLM model and encode profile. ``transcribe_workers`` > 1 transcribes
+        long videos in parallel chunks (default: TRANSCRIBE_WORKERS).
+        ``use_vad`` strips non-speech audio before transcription (default:
+        VAD_ENABLED). ``backend`` names the transcription engine; by default
+        the tier's preferred engine is used when it is installed.
+        ``word_alignment`` is 'eager' (word timestamps while transcribing) or
+        'lazy' (segment timestamps only, words aligned later for the spans that
+        need them, see align_words); the tier decides by default.
+        ``two_pass`` transcribes everything with a tiny model first and only the
+        clips picked for the summary with the tier's model (default:
+        TWO_PASS_TRANSCRIPTION). ``target_length`` ('30_seconds', '2_minutes',
+        ...) bounds the summary picked by map-reduce analysis.
+        """
+        self.tier = tier if isinstance(tier, dict) else get_tier(tier)
+        self.backend = select_backend(backend, self.tier.get('transcription_backend'), self.DEFAULT_BACKEND)
+        
         self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
         if not self.openai_api_key:
             print("Warning: No OpenAI API key provided. Using mock LLM responses.")
             self.client = None
+            self.hedged_client = None
         else:
             try:
-                self.client = OpenAI(api_key=self.openai_api_key)
+                # One pooled, rate-limited client per process, shared by every job
+                self.client = get_llm_client(self.openai_api_key)
+                # Slow calls are raced against a secondary endpoint when one is set
+                percentile = self.tier.get('llm_hedge_percentile')
+                self.hedged_client = get_hedged_client(self.client, percentile) if percentile else None
             except Exception as e:
                 print(f"Warning: Failed to initialize OpenAI client: {e}")
                 print("Using mock LLM responses.")
                 self.client = None
+                self.hedged_client = None
+        
+        # Transcribe through the resident model server when MODEL_SERVER_URL is set
+        self.model_server = get_model_server_client()
+        self.model_size = model_size or self.tier['whisper_model']
+        # Two-pass mode: the coarse model does the full pass, this one the clips
+        self.refine_model_size = self.model_size
+        self.two_pass = two_pass_enabled() if two_pass is None else two_pass
+        if self.two_pass and coarse_model_size() != self.model_size:
+            self.model_size = coarse_model_size()
+        else:
+            self.two_pass = False
+        self.transcribe_workers = transcribe_workers or default_workers()
+        self.use_vad = vad_enabled() if use_vad is None else use_vad
+        self.word_alignment = word_alignment or self.tier.get('word_alignment', 'eager')
+        self.transcript_cache = get_transcript_cache()
+        self.llm_cache = get_llm_cache()
+        self.target_seconds = target_seconds(target_length)
+        self._model_handle = None
         
-        # Load Whisper model
-        print("Loading Whisper model...")
-        self.whisper_model = whisper.load_model("base")
-        print("Whisper model loaded successfully!")
+        # Load Whisper model (or reuse the shared copy)
+        if whisper_model is not None:
+            self.whisper_model = whisper_model
+            self._model_lock = threading.Lock()
+        elif self.model_server is None:
+            self._load_local_model()
+        else:
+            self.whisper_model = None
+            self._model_lock = None
     
-    def extract_audio_with_timestamps(self, video_path: str) -> Dict:
-        """Extract audio and generate word-level timestamps using Whisper"""
-        print(f"Extracting audio and generating timestamps from {video_path}...")
+    def _load_local_model(self):
+        """Borrow the in-process Whisper model from the shared registry"""
+        self._model_handle = get_registry().acquire(self.model_size, backend=self.backend.name)
+        self.whisper_model = self._model_handle.model
+        self._model_lock = self._model_handle.lock
+    
+    def close(self):
+        """Release the shared Whisper model handle"""
+        if self._model_handle is not None:
+            self._model_handle.release()
+            self._model_handle = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _decode_options(self, language: str = None) -> Dict:
+        """Options passed to the transcription engine for every window"""
+        return self.backend.decode_options(self.tier['decode_options'], language,
+                                           word_timestamps=self.word_alignment != 'lazy')
+    
+    def _transcript_cache_key(self, audio: AudioBuffer, language: str) -> str:
+        """Key identifying this transcription of this audio in the transcript cache"""
+        return transcript_key(audio.content_hash(), self.backend.name, self.model_size,
+                              self._decode_options(language), vad=self.use_vad)
+    
+    def _mel_features(self, audio: AudioBuffer, start: float, end: float) -> Optional[MelFeatures]:
+        """Log-mel features of one window a local Whisper model works on, timed
+        from `start` (None for engines without log-mel input)"""
+        dims = getattr(self.whisper_model, 'dims', None)
+        if dims is None or end <= start:
+            return None
+        return compute_features(audio, start, end, dims.n_mels)
+    
+    def _detect_language(self, audio: AudioBuffer) -> Optional[str]:
+        """Language of the first speech-bearing 30 s, cached per audio hash"""
+        window = detection_window(audio)
+        if window is None:
+            return None
         
-        # Use whisper-timestamped to get word-level timestamps
-        result = whisper.transcribe(self.whisper_model, video_path, language="en")
+        cache_key = None
+        if self.transcript_cache:
+            cache_key = language_cache_key(audio.content_hash(), self.backend.name, self.model_size)
+            cached = self.transcript_cache.get(cache_key)
+            if cached is not None:
+                return cached['language']
         
-        # Format the result for our use
-        formatted_transcript = []
-        for segment in result['segments']:
-            for word_info in segment.get('words', []):
-                formatted_transcript.append({
-                    'word': word_info['text'].strip(),
-                    'start': word_info['start'],
-                    'end': word_info['end'],
-                    'confidence': word_info.get('confidence', 1.0)
-                })
+        start, end = window
+        detected = None
+        if self.whisper_model is None:
+            try:
+                detected = self.model_server.detect_language(audio.path, self.model_size,
+                                                             backend=self.backend.name, audio_format=AUDIO_FORMAT,
+                                                             start=start, end=end)
+            except ModelServerError as e:
+                print(f"Warning: Model server request failed: {e}")
+                print("Falling back to a local Whisper model...")
+                self._load_local_model()
+        if detected is None:
+            features = self._mel_features(audio, start, end)
+            with self._model_lock:
+                detected = self.backend.detect_language(self.whisper_model, audio.window(start, end), features)
         
-        return {
-            'full_text': result['text'],
-            'transcript': formatted_transcript,
-            'segments': result['segments']
+        print(f"Detected language: {detected['language']} (p={detected['probability']:.2f})")
+        if cache_key:
+            self.transcript_cache.put(cache_key, detected)
+        return detected['language']
+    
+    def _iter_chunk_results(self, audio: AudioBuffer, language: str,
+                            checkpoints: ChunkCheckpoints = None) -> Iterator[Tuple[float, float, Dict]]:
+        """Transcribe an audio buffer in time order, yielding (start, end, result) per window.
+
+        Windows already in ``checkpoints`` are reused; new ones are saved there.
+        """
+        options = self._decode_options(language)
+        
+        # Long inputs: transcribe silence-aligned chunks on several CPU cores
+        if (self.whisper_model is not None and self.transcribe_workers > 1
+                and audio.duration > default_chunk_seconds() * 1.5):
+            yield from iter_chunk_results(audio, self.backend.name, self.model_size, options,
+                                          workers=self.transcribe_workers, checkpoints=checkpoints)
+            return
+        
+        # Otherwise go window by window so segments stream out as they're decoded
+        for start, end in plan_chunks(audio, stream_chunk_seconds()):
+            result = checkpoints.load(start, end) if checkpoints else None
+            if result is None:
+                result = self._run_whisper(audio, start, end, options)
+                if checkpoints:
+                    result = checkpoints.save(start, end, result)
+            yield start, end, result
+    
+    def _run_whisper(self, audio: AudioBuffer, start: float, end: float, options: Dict) -> Dict:
+        """Run Whisper on one window of an audio buffer (via the model server if configured)"""
+        if self.whisper_model is None:
+            try:
+                return self.model_server.transcribe(audio.path, self.model_size, backend=self.backend.name,
+                                                    audio_format=AUDIO_FORMAT, start=start, end=end,
+                                                    **options)
+            except ModelServerError as e:
+                print(f"Warning: Model server request failed: {e}")
+                print("Falling back to a local Whisper model...")
+                self._load_local_model()
+        
+        with self._model_lock:
+            return self.backend.transcribe(self.whisper_model, audio.window(start, end), options)
+    
+    def _iter_segments(self, audio: AudioBuffer, workspace: JobWorkspace, language: str,
+                       checkpoints: ChunkCheckpoints = None) -> Iterator[Dict]:
+        """Yield Whisper segments for the speech in a decoded audio buffer"""
+        # Only speech-bearing audio goes to Whisper; timestamps are mapped back
+        speech_map = None
+        if self.use_vad and len(audio) > 0:
+            audio, speech_map = extract_speech(audio, workspace)
+        if audio is None or len(audio) == 0:
+            return
+        
+        for segment in iter_merged_segments(self._iter_chunk_results(audio, language, checkpoints)):
+            yield speech_map.remap_segment(segment) if speech_map else segment
+    
+    def stream_audio_with_timestamps(self, video_path: str, workspace: JobWorkspace,
+                                     language: str = None) -> Iterator[Dict]:
+        """Yield transcript segments with word-level timestamps as they are decoded.
+
+        Segments follow the common schema (text, start, end, words).
+        ``language`` fixes the spoken language; otherwise it is detected once up front.
+        Finished chunks are checkpointed, so a rerun after a crash resumes.
+        """
+        # Decode the audio track once into the job workspace; transcription
+        # and any other audio stage read the same memory-mapped buffer
+        audio = extract_audio(video_path, workspace)
+        language = language or self._detect_language(audio)
+        checkpoints = open_checkpoints(self._transcript_cache_key(audio, language))
+        if checkpoints and checkpoints.resumed:
+            print(f"Found {checkpoints.resumed} checkpointed chunks from an interrupted run")
+        try:
+            for segment in self._iter_segments(audio, workspace, language, checkpoints):
+                yield self.backend.format_segment(segment)
+        except BaseException:
+            if checkpoints:
+                checkpoints.release()
+            raise
+        if checkpoints:
+            checkpoints.clear()
+    
+    def _fingerprint_profile(self, language: str) -> str:
+        """Transcription settings a fingerprinted source must share to be reused"""
+        return transcript_key('', self.backend.name, self.model_size,
+                              self._decode_options(language), vad=self.use_vad)
+    
+    def _find_source(self, codes, fingerprints: FingerprintIndex, language: str,
+                     duration: float) -> Optional[Tuple[List[Dict], List[Tuple[float, float]]]]:
+        """(reused segments, gaps to transcribe) when this audio repeats an
+        earlier transcribed upload, or None"""
+        match = fingerprints.find_source(codes, self._fingerprint_profile(language))
+        if match is None:
+            return None
+        source_key, regions = match
+        cached = self.transcript_cache.get(source_key)
+        if cached is None:
+            # The transcript was evicted; its fingerprint is no use any more
+            fingerprints.remove(source_key)
+            return None
+        reused, gaps = plan_reuse(unpack_transcript(cached)['segments'], regions, duration)
+        if not reused:
+            return None
+        fingerprints.touch(source_key)
+        matched = sum(end - start for start, end, _ in regions)
+        print(f"Audio repeats an earlier upload over {matched:.0f}s of {duration:.0f}s: "
+              f"reusing {len(reused)} segments, transcribing {sum(end - start for start, end in gaps):.1f}s")
+        return reused, gaps
+    
+    def _iter_incremental_segments(self, audio: AudioBuffer, workspace: JobWorkspace, language: str,
+                                   reused: List[Dict], gaps: List[Tuple[float, float]]) -> Iterator[Dict]:
+        """Reused segments and freshly transcribed gaps, in time order.
+
+        The gaps are glued into one buffer and transcribed like a whole file
+        (speech detection, checkpoints, parallel chunks), then mapped back.
+        """
+        fresh = iter(())
+        checkpoints = None
+        if gaps:
+            gap_map = SpeechMap(gaps)
+            gap_audio = extract_regions(audio, gap_map, workspace, GAPS_FILENAME)
+            # Keyed by the gaps too: a different reuse plan transcribes different audio
+            checkpoints = open_checkpoints(transcript_key(audio.content_hash(), self.backend.name, self.model_size,
+                                                          self._decode_options(language), vad=self.use_vad,
+                                                          gaps=gaps))
+            if checkpoints and checkpoints.resumed:
+                print(f"Found {checkpoints.resumed} checkpointed chunks from an interrupted run")
+            fresh = (self.backend.format_segment(gap_map.remap_segment(segment))
+                     for segment in self._iter_segments(gap_audio, workspace, language, checkpoints))
+        try:
+            yield from heapq.merge(reused, fresh, key=lambda segment: segment['start'])
+        except BaseException:
+            if checkpoints:
+                checkpoints.release()
+            raise
+        if checkpoints:
+            checkpoints.clear()
+    
+    def extract_audio_with_timestamps(self, video_path: str, workspace: JobWorkspace = None,
+                                      on_segment: Callable[[Dict], None] = None, language: str = None) -> Dict:
+        """Extract audio and generate word-level timestamps using Whisper.
+
+        ``on_segment`` is called with each segment as soon as it is transcribed.
+        ``language`` is a hint that skips language detection.
+        """
+        print(f"Extracting audio and generating timestamps from {video_path}...")
+        
+        owns_workspace = workspace is None
+        workspace = workspace or JobWorkspace()
+        segments = []
+        try:
+            audio = extract_audio(video_path, workspace)
+            duration = audio.duration
+            language = language or self._detect_language(audio)
+            
+            # The same audio transcribed the same way before: skip Whisper
+            cache_key = self._transcript_cache_key(audio, language) if self.transcript_cache else None
+            cached = self.transcript_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                print("Using cached transcript")
+                cached = unpack_transcript(cached)
+                for segment in cached['segments']:
+                    if on_segment:
+                        on_segment(segment)
+                return cached
+            
+            # A re-upload of earlier audio (trimmed, or edited in places) only
+            # needs its new or changed regions transcribed
+            fingerprints = get_fingerprint_index() if cache_key else None
+            codes = fingerprint(audio.samples) if fingerprints else None
+            source = self._find_source(codes, fingerprints, language, duration) if fingerprints else None
+            if source:
+                stream = self._iter_incremental_segments(audio, workspace, language, *source)
+            else:
+                stream = self.stream_audio_with_timestamps(video_path, workspace, language)
+            for segment in stream:
+                segments.append(segment)
+                if on_segment:
+                    on_segment(segment)
+        finally:
+            if owns_workspace:
+                workspace.cleanup()
+        
+        transcript_data = {
+            'full_text': ''.join(segment['text'] for segment in segments),
+            # Columnar words; each segment's 'words' becomes a view into it
+            'transcript': WordStore.from_segments(segments),
+            'segments': segments,
+            'duration': duration,
+            'language': language
         }
+        if cache_key:
+            self.transcript_cache.put(cache_key, pack_transcript(transcript_data))
+            if fingerprints:
+                fingerprints.add(cache_key, self._fingerprint_profile(language), codes, duration)
+        return transcript_data
+    
+    def _align_window(self, audio: AudioBuffer, start: float, end: float, segments: List[Dict],
+                      language: str) -> List[List[Dict]]:
+        """Word timestamps for segments inside one window (via the model server if configured)"""
+        relative = [{'text': segment['text'], 'start': segment['start'] - start, 'end': segment['end'] - start}
+                    for segment in segments]
+        aligned = None
+        if self.whisper_model is None:
+            try:
+                aligned = self.model_server.align_words(audio.path, relative, self.model_size,
+                                                        backend=self.backend.name, audio_format=AUDIO_FORMAT,
+                                                        start=start, end=end, language=language)
+            except ModelServerError as e:
+                print(f"Warning: Model server request failed: {e}")
+                print("Falling back to a local Whisper model...")
+                self._load_local_model()
+        if aligned is None:
+            features = self._mel_features(audio, start, end)
+            with self._model_lock:
+                aligned = self.backend.align_words(self.whisper_model, audio.window(start, end), relative, language,
+                                                   features)
+        return [[dict(word, start=round(word['start'] + start, 3), end=round(word['end'] + start, 3))
+                 for word in words] for words in aligned]
+    
+    def align_words(self, video_path: str, transcript_data: Dict, spans: List[Tuple[float, float]] = None,
+                    workspace: JobWorkspace = None) -> Dict:
+        """Add word timestamps to the segments of a lazily aligned transcript
+        that overlap ``spans`` (plus a margin), or to every segment when
+        ``spans`` is None, e.g. for captions or search.
+        
+        Segments that already have words are skipped, and the cached transcript
+        is updated so the work is done once per audio.
+        """
+        segments = transcript_data['segments']
+        runs = segments_to_align(segments, spans)
+        if not runs:
+            return transcript_data
+        
+        owns_workspace = workspace is None
+        workspace = workspace or JobWorkspace()
+        try:
+            audio = extract_audio(video_path, workspace)
+            count = sum(len(run) for run in runs)
+            print(f"Aligning words for {count} of {len(segments)} segments...")
+            for run in runs:
+                run_segments = [segments[index] for index in run]
+                start = max(0.0, run_segments[0]['start'])
+                end = min(audio.duration, run_segments[-1]['end'])
+                aligned = self._align_window(audio, start, end, run_segments, transcript_data.get('language'))
+                for segment, words in zip(run_segments, aligned):
+                    segment['words'] = words
+            
+            transcript_data['transcript'] = WordStore.from_segments(segments)
+            if self.transcript_cache:
+                cache_key = self._transcript_cache_key(audio, transcript_data.get('language'))
+                self.transcript_cache.put(cache_key, pack_transcript(transcript_data))
+        finally:
+            if owns_workspace:
+                workspace.cleanup()
+        return transcript_data
+    
+    def _refine_window(self, audio: AudioBuffer, start: float, end: float, options: Dict) -> Dict:
+        """Transcribe one window with the refine model (via the model server if configured)"""
+        if self.model_server is not None:
+            try:
+                return self.model_server.transcribe(audio.path, self.refine_model_size, backend=self.backend.name,
+                                                    audio_format=AUDIO_FORMAT, start=start, end=end, **options)
+            except ModelServerError as e:
+                print(f"Warning: Model server request failed: {e}")
+                print("Falling back to a local Whisper model...")
+        
+        with get_registry().acquire(self.refine_model_size, backend=self.backend.name) as handle:
+            with handle.lock:
+                return self.backend.transcribe(handle.model, audio.window(start, end), options)
+    
+    def refine_transcript(self, video_path: str, transcript_data: Dict, spans: List[Tuple[float, float]],
+                          workspace: JobWorkspace) -> Tuple[Dict, float]:
+        """Re-transcribe the coarse segments around ``spans`` with the refine
+        model. Returns the spliced transcript and the audio seconds refined.
+        """
+        windows = refine_windows(transcript_data['segments'], spans)
+        if not windows:
+            return transcript_data, 0.0
+        
+        audio = extract_audio(video_path, workspace)
+        language = transcript_data.get('language')
+        options = self.backend.decode_options(self.tier['decode_options'], language)
+        refined_audio = sum(end - start for _, _, start, end in windows)
+        print(f"Refining {len(windows)} spans ({refined_audio:.0f}s of {audio.duration:.0f}s) "
+              f"with the {self.refine_model_size} model...")
+        
+        refined = []
+        for first, last, start, end in windows:
+            result = self._refine_window(audio, start, end, options)
+            segments = [self.backend.format_segment(segment)
+                        for segment in shift_result(result, start, end)['segments']]
+            refined.append((first, last, segments))
+        
+        segments = splice_segments(transcript_data['segments'], refined)
+        return dict(
+            transcript_data,
+            full_text=''.join(segment['text'] for segment in segments),
+            transcript=WordStore.from_segments(segments),
+            segments=segments,
+        ), refined_audio
+    
+    def transcribe_batch(self, media_paths: List[str], language: str = None,
+                         batch_size: int = None) -> List[Dict]:
+        """Transcribe many short media files together, packing their 30 s
+        windows into batched forward passes. Returns one transcript_data per
+        file, as extract_audio_with_timestamps would.
+        
+        Files are transcribed whole (no VAD) with a local model, since the
+        model server takes one file per request; cached transcripts are reused.
+        Without ``language`` each file's language is detected once, as for a
+        single job, and all of its windows are decoded in it.
+        """
+        if self.whisper_model is None:
+            self._load_local_model()
+        
+        results: List[Optional[Dict]] = [None] * len(media_paths)
+        pending = []
+        workspaces = []
+        try:
+            for index, media_path in enumerate(media_paths):
+                workspaces.append(JobWorkspace())
+                audio = extract_audio(media_path, workspaces[-1])
+                file_language = language or self._detect_language(audio)
+                cache_key = None
+                if self.transcript_cache:
+                    cache_key = transcript_key(audio.content_hash(), self.backend.name, self.model_size,
+                                               self._decode_options(file_language), vad=False, batched=True)
+                    cached = self.transcript_cache.get(cache_key)
+                    if cached is not None:
+                        results[index] = unpack_transcript(cached)
+                        continue
+                pending.append((index, audio, file_language, cache_key))
+            
+            if pending:
+                print(f"Transcribing {len(pending)} files in batches...")
+                with self._model_lock:
+                    decoded = self.backend.transcribe_batch(self.whisper_model,
+                                                            [audio.samples for _, audio, _, _ in pending],
+                                                            self._decode_options(language), batch_size,
+                                                            [file_language for _, _, file_language, _ in pending])
+                for (index, audio, file_language, cache_key), result in zip(pending, decoded):
+                    segments = [self.backend.format_segment(segment) for segment in result['segments']]
+                    transcript_data = {
+                        'full_text': ''.join(segment['text'] for segment in segments),
+                        'transcript': WordStore.from_segments(segments),
+                        'segments': segments,
+                        'duration': audio.duration,
+                        'language': file_language or result.get('language')
+                    }
+                    if cache_key:
+                        self.transcript_cache.put(cache_key, pack_transcript(transcript_data))
+                    results[index] = transcript_data
+        finally:
+            for workspace in workspaces:
+                workspace.cleanup()
+        return results
+    
+    def _complete(self, prompt: str) -> Tuple[List[Dict], str]:
+        """summary_segments from one chat completion and the model that gave
+        them (raises on API and parse errors)"""
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        model = self.tier['llm_model']
+        if self.hedged_client:
+            # A secondary answer only wins if it parses
+            response_text, model = self.hedged_client.answer(model, messages, TEMPERATURE,
+                                                             validate=parse_response)
+        else:
+            response_text = self.client.complete(model, messages, temperature=TEMPERATURE)
+        
+        return parse_response(response_text), model
+    
+    def _print_prompt_report(self, report: Dict, label: str = 'LLM prompt'):
+        print(f"{label}: {report['prompt_tokens']} tokens (budget {report['budget']}), "
+              f"{report['saved_tokens']} saved against {report['baseline_tokens']}; "
+              f"{report['merged_segments']} segments merged, {report['dropped_segments']} dropped")
     
     def analyze_with_llm(self, transcript_data: Dict) -> List[Dict]:
-        """Use LLM to identify important segments for summarization"""
+        """Use LLM to identify important segments for summarization.
+
+        Transcripts too long for one prompt (or any, with LLM_ANALYSIS_MODE=
+        map_reduce) go through analyze_map_reduce instead.
+        """
         full_text = transcript_data['full_text']
         segments = transcript_data['segments']
         
-        # Create a prompt for the LLM
-        prompt = f"""
-        Analyze this video transcript and identify the most important segments for creating a summary video.
-        
-        Full transcript: {full_text}
-        
-        Segment information with timestamps:
-        {json.dumps([{'text': seg['text'], 'start': seg['start'], 'end': seg['end']} for seg in segments], indent=2)}
-        
-        Please identify 3-5 key segments that would make a good summary video. For each segment, provide:
-        1. start_time: exact start time in seconds
-        2. end_time: exact end time in seconds  
-        3. importance: score from 1-10
-        4. topic: brief description of what this segment covers
-        5. reason: why this segment is important
-        
-        Respond in JSON format like this:
-        {{
-            "summary_segments": [
-                {{
-                    "start_time": 0.0,
-                    "end_time": 15.5,
-                    "importance": 9,
-                    "topic": "introduction",
-                    "reason": "Sets up the main topic"
-                }}
-            ]
-        }}
-        """
+        # Nothing was said, so there's nothing for the LLM to rank
+        if not segments:
+            return self._generate_no_speech_summary(transcript_data.get('duration', 0))
+        
+        # Each segment once, as a compact line, within the model's token budget
+        prompt, report = build_prompt(segments, self.tier['llm_model'], full_text=full_text)
+        self._print_prompt_report(report)
         
         if self.client:
-            try:
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are an expert video editor who identifies the most important segments for creating summary videos."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3
-                )
-                
-                # Parse the JSON response
-                response_text = response.choices[0].message.content
-                # Extract JSON from the response (in case there's extra text)
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-                json_str = response_text[start_idx:end_idx]
-                
-                return json.loads(json_str)['summary_segments']
+            mode = analysis_mode()
+            map_reduce = mode == 'map_reduce' or (mode == 'auto' and report['dropped_segments'])
             
-            except Exception as e:
-                print(f"Error calling OpenAI API: {e}")
-                print("Falling back to mock response...")
+            # The same transcript analyzed the same way before: skip the LLM
+            cache_key = None
+            if self.llm_cache:
+                extra = ({'mode': 'map_reduce', 'window': map_window_seconds(), 'target': self.target_seconds}
+                         if map_reduce else {'mode': 'single', 'budget': report['budget']})
+                cache_key = llm_cache_key(transcript_digest(segments), prompt_version(), self.tier['llm_model'],
+                                          TEMPERATURE, **extra)
+                cached = self.llm_cache.get(cache_key)
+                print(f"LLM cache {'hit' if cached is not None else 'miss'} ({self.llm_cache.hits} hits, "
+                      f"{self.llm_cache.misses} misses, {self.llm_cache.expired} expired)")
+                if cached is not None:
+                    return cached
+            
+            summary_segments = None
+            models = set()
+            if map_reduce:
+                summary_segments = self.analyze_map_reduce(segments, models)
+                if not summary_segments:
+                    print("Map-reduce analysis found no segments, falling back to mock response...")
+            else:
+                try:
+                    summary_segments, model = self._complete(prompt)
+                    models.add(model)
+                except Exception as e:
+                    print(f"Error calling OpenAI API: {e}")
+                    print("Falling back to mock response...")
+            if summary_segments:
+                # The key names the tier's model; answers from a hedged
+                # secondary endpoint aren't stored under it
+                if cache_key and models == {self.tier['llm_model']}:
+                    self.llm_cache.put(cache_key, summary_segments)
+                return summary_segments
         
         # Mock response if no API key or API fails
         return self._generate_mock_summary(segments)
     
+    def analyze_map_reduce(self, segments: List[Dict], models: Set[str] = None) -> List[Dict]:
+        """Score fixed-length transcript windows with concurrent LLM calls, then
+        rank their candidates locally into the summary (within target_seconds).
+        The models that answered are added to ``models``."""
+        models = models if models is not None else set()
+        windows = plan_map_windows(segments, map_window_seconds())
+        concurrency = map_concurrency()
+        print(f"Map-reduce analysis: {len(windows)} transcript windows, {concurrency} at a time")
+        
+        def score_window(index: int, window: List[Dict]) -> List[Dict]:
+            prompt, report = build_prompt(window, self.tier['llm_model'], template=MAP_PROMPT_TEMPLATE,
+                                          part=index + 1, parts=len(windows), candidates=MAP_CANDIDATES)
+            self._print_prompt_report(report, f"LLM prompt {index + 1}/{len(windows)}")
+            candidates, model = self._complete(prompt)
+            models.add(model)
+            return candidates
+        
+        started = time.time()
+        candidates = map_windows(windows, score_window, concurrency)
+        summary_segments = select_segments(candidates, self.target_seconds)
+        print(f"Picked {len(summary_segments)} of {len(candidates)} candidates "
+              f"in {time.time() - started:.1f}s")
+        return summary_segments
+    
+    def _generate_no_speech_summary(self, duration: float) -> List[Dict]:
+        """Summarize a video without speech as its opening seconds"""
+        print("No speech found, using the opening of the video...")
+        if duration <= 0:
+            return []
+        return [{
+            "start_time": 0.0,
+            "end_time": min(duration, self.CLIP_SECONDS),
+            "importance": 5,
+            "topic": "opening",
+            "reason": "No speech detected in the video"
+        }]
+    
     def _generate_mock_summary(self, segments: List[Dict]) -> List[Dict]:
         """Generate a mock summary when LLM is not available"""
         print("Using mock LLM analysis...")
@@ -133,7 +674,7 @@ class VideoSummarizer:
         if len(segments) >= 1:
             summary_segments.append({
                 "start_time": segments[0]['start'],
-                "end_time": min(segments[0]['end'], segments[0]['start'] + 10),
+                "end_time": min(segments[0]['end'], segments[0]['start'] + self.CLIP_SECONDS),
                 "importance": 9,
                 "topic": "introduction",
                 "reason": "Opening segment"
@@ -143,7 +684,7 @@ class VideoSummarizer:
             mid_idx = len(segments) // 2
             summary_segments.append({
                 "start_time": segments[mid_idx]['start'],
-                "end_time": min(segments[mid_idx]['end'], segments[mid_idx]['start'] + 10),
+                "end_time": min(segments[mid_idx]['end'], segments[mid_idx]['start'] + self.CLIP_SECONDS),
                 "importance": 8,
                 "topic": "main_content",
                 "reason": "Middle segment with key content"
@@ -151,7 +692,7 @@ class VideoSummarizer:
         
         if len(segments) >= 2:
             summary_segments.append({
-                "start_time": max(0, segments[-1]['end'] - 10),
+                "start_time": max(0, segments[-1]['end'] - self.CLIP_SECONDS),
                 "end_time": segments[-1]['end'],
                 "importance": 7,
                 "topic": "conclusion",
@@ -160,6 +701,16 @@ class VideoSummarizer:
         
         return summary_segments
     
+    def snap_to_pauses(self, summary_segments: List[Dict], transcript_data: Dict) -> List[Dict]:
+        """Move segment boundaries to the nearest natural pause so no clip cuts mid-word"""
+        index = TranscriptIndex.from_transcript(transcript_data)
+        snapped = index.snap_segments(summary_segments)
+        for before, after in zip(summary_segments, snapped):
+            if (before['start_time'], before['end_time']) != (after['start_time'], after['end_time']):
+                print(f"Snapped {before['start_time']:.2f}-{before['end_time']:.2f}s "
+                      f"to {after['start_time']:.2f}-{after['end_time']:.2f}s")
+        return snapped
+    
     def create_summary_video(self, video_path: str, summary_segments: List[Dict], output_path: str):
         """Create a summary video by extracting and concatenating segments"""
         print(f"Creating summary video from {len(summary_segments)} segments...")
@@ -183,12 +734,16 @@ class VideoSummarizer:
         print("Concatenating clips...")
         final_video = concatenate_videoclips(clips, method="compose")
         
-        # Write the final video
+        # Write the final video with the tier's encode profile
         print(f"Writing summary video to {output_path}...")
+        encode = self.tier['video_encode']
         final_video.write_videofile(
             output_path,
-            codec='libx264',
+            codec=encode['codec'],
+            preset=encode['preset'],
+            ffmpeg_params=encode['ffmpeg_params'],
             audio_codec='aac',
+            audio_bitrate=encode['audio_bitrate'],
             temp_audiofile='temp-audio.m4a',
             remove_temp=True
         )
@@ -201,24 +756,59 @@ class VideoSummarizer:
         
         print(f"Summary video created successfully: {output_path}")
     
-    def process_video(self, input_path: str, output_path: str) -> Dict:
-        """Complete pipeline: analyze video and create summary"""
+    def process_video(self, input_path: str, output_path: str, workspace: JobWorkspace = None,
+                      on_segment: Callable[[Dict], None] = None, language: str = None,
+                      transcript_data: Dict = None) -> Dict:
+        """Complete pipeline: analyze video and create summary.
+
+        Pass ``transcript_data`` (e.g. from transcribe_batch) to skip transcription.
+        """
         print(f"Processing video: {input_path}")
+        owns_workspace = workspace is None
+        workspace = workspace or JobWorkspace()
         
-        # Step 1: Extract audio and timestamps
-        transcript_data = self.extract_audio_with_timestamps(input_path)
-        
-        # Step 2: Analyze with LLM
-        summary_segments = self.analyze_with_llm(transcript_data)
-        
-        # Step 3: Create summary video
-        self.create_summary_video(input_path, summary_segments, output_path)
+        try:
+            # Step 1: Extract audio and timestamps
+            cpu_start = time.thread_time()
+            if transcript_data is None:
+                transcript_data = self.extract_audio_with_timestamps(input_path, workspace, on_segment, language)
+            transcribe_seconds = time.thread_time() - cpu_start
+            
+            # Step 2: Analyze with LLM
+            summary_segments = self.analyze_with_llm(transcript_data)
+            spans = [(segment['start_time'], segment['end_time']) for segment in summary_segments]
+            if self.two_pass:
+                # Accurate text and timestamps only where the summary needs them
+                cpu_start = time.thread_time()
+                transcript_data, refined_audio = self.refine_transcript(input_path, transcript_data, spans, workspace)
+                cost = cost_report(transcript_data['duration'], self.model_size, self.refine_model_size,
+                                   transcribe_seconds, time.thread_time() - cpu_start, refined_audio)
+            else:
+                cost = {
+                    'mode': 'single_pass',
+                    'cpu_scope': CPU_SCOPE,
+                    'model': self.model_size,
+                    'audio_seconds': round(transcript_data['duration'], 1),
+                    'cpu_seconds': round(transcribe_seconds, 2),
+                }
+            print(f"Transcription cost: {json.dumps(cost)}")
+            if self.word_alignment == 'lazy':
+                # Word precision is only needed around the selected clips
+                self.align_words(input_path, transcript_data, spans, workspace)
+            summary_segments = self.snap_to_pauses(summary_segments, transcript_data)
+            
+            # Step 3: Create summary video
+            self.create_summary_video(input_path, summary_segments, output_path)
+        finally:
+            if owns_workspace:
+                workspace.cleanup()
         
         return {
             'input_video': input_path,
             'output_video': output_path,
             'transcript': transcript_data,
-            'summary_segments': summary_segments
+            'summary_segments': summary_segments,
+            'transcription_cost': cost
         }
 
 def download_test_video(url: str, filename: str) -> str:
@@ -235,7 +825,7 @@ def download_test_video(url: str, filename: str) -> str:
     print(f"Downloaded: {filename}")
     return filename
 
-def main():
+def main(summarizer_class=None):
     """Main function to run the video summarizer"""
     print("=== AI Video Summarizer ===")
     
@@ -259,7 +849,7 @@ def main():
         print(f"Using existing test video: {test_video_path}")
     
     # Initialize the summarizer
-    summarizer = VideoSummarizer()
+    summarizer = (summarizer_class or VideoSummarizer)()
     
     # Process the video
     output_path = "output/summary_video.mp4"
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Lazy Word Alignment
+Adds word timestamps after the fact to segments transcribed with segment-level
+timestamps only, for just the spans that need them (the summary's clips, or
+everything for captions and search)
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# Words are aligned this far (seconds) around each requested span, which covers
+# how far boundary snapping may move a clip (transcript_index.MAX_SHIFT)
+ALIGN_MARGIN = 2.0
+
+
+def segments_to_align(segments: List[Dict], spans: Optional[List[Tuple[float, float]]],
+                      margin: float = ALIGN_MARGIN) -> List[List[int]]:
+    """Runs of consecutive segment indices without words that overlap a span
+    (widened by `margin`); every segment without words when `spans` is None"""
+    windows = None if spans is None else [(start - margin, end + margin) for start, end in spans]
+    runs = []
+    for index, segment in enumerate(segments):
+        if 'words' in segment:
+            continue
+        if windows is not None and not any(segment['start'] < end and segment['end'] > start
+                                           for start, end in windows):
+            continue
+        if runs and runs[-1][-1] == index - 1:
+            runs[-1].append(index)
+        else:
+            runs.append([index])
+    return runs
+
+
+def align_segments(model, samples, segments: List[Dict], language: Optional[str],
+                   features=None) -> List[List[Dict]]:
+    """Force-align the known text of each segment to the audio with a Whisper
+    model's cross-attention, as word_timestamps=True would have during decoding.
+
+    Segment times are relative to `samples`; returns one list of words
+    (word/start/end/confidence, same timeline) per segment. Model input is
+    read from `features` (mel_features.MelFeatures on the same timeline) when
+    given.
+    """
+    import numpy as np
+    import torch
+    import whisper
+    from whisper.audio import CHUNK_LENGTH, HOP_LENGTH, N_FRAMES, SAMPLE_RATE
+    from whisper.timing import add_word_timestamps
+    from whisper.tokenizer import get_tokenizer
+
+    tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                              language=language or 'en', task='transcribe')
+    parameter = next(model.parameters())
+
+    aligned = []
+    first = 0
+    while first < len(segments):
+        # Consecutive segments share one 30 s encoder window
+        last = first + 1
+        while last < len(segments) and segments[last]['end'] - segments[first]['start'] <= CHUNK_LENGTH:
+            last += 1
+        group = segments[first:last]
+        first = last
+
+        offset = group[0]['start']
+        end = min(group[-1]['end'], offset + CHUNK_LENGTH)
+        window = np.ascontiguousarray(samples[int(offset * SAMPLE_RATE):int(end * SAMPLE_RATE)], dtype=np.float32)
+        # Decoding results for the group, timed from the start of the window
+        decoded = [{'seek': 0, 'start': segment['start'] - offset, 'end': segment['end'] - offset,
+                    'tokens': tokenizer.encode(segment['text'])} for segment in group]
+        to_align = [segment for segment in decoded if segment['tokens']]
+        if len(window) and to_align:
+            if features is not None:
+                mel = features.log_mel(offset, end)
+            else:
+                mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(window)), model.dims.n_mels)
+            mel = mel.to(device=parameter.device, dtype=parameter.dtype)
+            add_word_timestamps(segments=to_align, model=model, tokenizer=tokenizer, mel=mel,
+                                num_frames=min(len(window) // HOP_LENGTH, N_FRAMES), last_speech_timestamp=0.0)
+        aligned.extend([{
+            'word': word['word'].strip(),
+            'start': round(offset + word['start'], 3),
+            'end': round(offset + word['end'], 3),
+            'confidence': round(float(word['probability']), 3),
+        } for word in segment.get('words', [])] for segment in decoded)
+    return aligned
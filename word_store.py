@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Columnar Word Store
+Keeps a transcript's word timestamps as flat NumPy columns plus an interned
+string table instead of one dict per word, while still reading like the legacy
+list of {'word', 'start', 'end', 'confidence'} dicts
+"""
+
+from typing import Dict, Iterator, List
+
+# Timestamps and confidences come out of the pipeline rounded to this many
+# decimals; float32 reproduces them exactly on the way back (for timestamps
+# below ~4.5 hours, where float32 spacing is still under a millisecond)
+DECIMALS = 3
+
+
+class WordStore:
+    """Word timestamps of a transcript (or a zero-copy view of part of one).
+
+    Columns are float32 `starts`/`ends`/`confidences` and int32 `word_ids`
+    into `vocabulary`; `segment_offsets[i]:segment_offsets[i + 1]` are the
+    words of segment i. Indexing gives legacy word dicts, slicing and
+    segment() give views that share the underlying arrays.
+    """
+
+    __slots__ = ('vocabulary', 'word_ids', 'starts', 'ends', 'confidences', 'segment_offsets',
+                 '_root', '_span')
+
+    def __init__(self, vocabulary: List[str], word_ids, starts, ends, confidences, segment_offsets,
+                 _root: 'WordStore' = None, _span: tuple = None):
+        self.vocabulary = vocabulary
+        self.word_ids = word_ids
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+        self.segment_offsets = segment_offsets
+        self._root = _root
+        self._span = _span
+
+    def __reduce__(self):
+        # Views pickle (and deepcopy) as a reference into their root store,
+        # so the columns are written once however many views there are
+        if self._root is not None:
+            return (_view, (self._root, *self._span))
+        return (WordStore, (self.vocabulary, self.word_ids, self.starts, self.ends,
+                            self.confidences, self.segment_offsets))
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict]) -> 'WordStore':
+        """Build a store from segments carrying legacy 'words' lists.
+
+        Each segment's 'words' list is replaced by a view into the store, so
+        the per-word dicts can be garbage collected.
+        """
+        import numpy as np
+
+        vocabulary = []
+        interned = {}
+        word_ids, starts, ends, confidences = [], [], [], []
+        offsets = [0]
+        for segment in segments:
+            for word in segment.get('words', []):
+                text = word['word']
+                if text not in interned:
+                    interned[text] = len(vocabulary)
+                    vocabulary.append(text)
+                word_ids.append(interned[text])
+                starts.append(word['start'])
+                ends.append(word['end'])
+                confidences.append(word.get('confidence', 1.0))
+            offsets.append(len(word_ids))
+
+        store = cls(vocabulary,
+                    np.array(word_ids, dtype=np.int32),
+                    np.array(starts, dtype=np.float32),
+                    np.array(ends, dtype=np.float32),
+                    np.array(confidences, dtype=np.float32),
+                    np.array(offsets, dtype=np.int32))
+        for index, segment in enumerate(segments):
+            if 'words' in segment:
+                segment['words'] = store.segment(index)
+        return store
+
+    @classmethod
+    def from_columns(cls, columns: Dict) -> 'WordStore':
+        """Inverse of to_columns()"""
+        import numpy as np
+
+        return cls(list(columns['vocabulary']),
+                   np.array(columns['word_ids'], dtype=np.int32),
+                   np.array(columns['starts'], dtype=np.float32),
+                   np.array(columns['ends'], dtype=np.float32),
+                   np.array(columns['confidences'], dtype=np.float32),
+                   np.array(columns['segment_offsets'], dtype=np.int32))
+
+    def to_columns(self) -> Dict:
+        """Compact JSON-serializable form"""
+        return {
+            'vocabulary': self.vocabulary,
+            'word_ids': self.word_ids.tolist(),
+            'starts': [round(t, DECIMALS) for t in self.starts.tolist()],
+            'ends': [round(t, DECIMALS) for t in self.ends.tolist()],
+            'confidences': [round(c, DECIMALS) for c in self.confidences.tolist()],
+            'segment_offsets': self.segment_offsets.tolist(),
+        }
+
+    @property
+    def num_segments(self) -> int:
+        return len(self.segment_offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns (the shared vocabulary not included)"""
+        return sum(array.nbytes for array in (self.word_ids, self.starts, self.ends,
+                                              self.confidences, self.segment_offsets))
+
+    def word(self, index: int) -> str:
+        return self.vocabulary[self.word_ids[index]]
+
+    def segment(self, index: int) -> 'WordStore':
+        """Zero-copy view of one segment's words"""
+        return self[int(self.segment_offsets[index]):int(self.segment_offsets[index + 1])]
+
+    def __len__(self) -> int:
+        return len(self.word_ids)
+
+    def __getitem__(self, index):
+        import numpy as np
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("WordStore only supports contiguous slices")
+            stop = max(start, stop)
+            root, offset = (self._root, self._span[0]) if self._root is not None else (self, 0)
+            return WordStore(self.vocabulary, self.word_ids[start:stop], self.starts[start:stop],
+                             self.ends[start:stop], self.confidences[start:stop],
+                             np.array([0, stop - start], dtype=np.int32),
+                             root, (offset + start, offset + stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("word index out of range")
+        return {
+            'word': self.vocabulary[self.word_ids[index]],
+            'start': round(float(self.starts[index]), DECIMALS),
+            'end': round(float(self.ends[index]), DECIMALS),
+            'confidence': round(float(self.confidences[index]), DECIMALS),
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        vocabulary = self.vocabulary
+        for word_id, start, end, confidence in zip(self.word_ids.tolist(), self.starts.tolist(),
+                                                   self.ends.tolist(), self.confidences.tolist()):
+            yield {
+                'word': vocabulary[word_id],
+                'start': round(start, DECIMALS),
+                'end': round(end, DECIMALS),
+                'confidence': round(confidence, DECIMALS),
+            }
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def tolist(self) -> List[Dict]:
+        """Legacy list of word dicts"""
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"WordStore({len(self)} words, {len(self.vocabulary)} distinct)"
+
+
+def _view(root: WordStore, start: int, stop: int) -> WordStore:
+    return root[start:stop]
+
+
+def pack_transcript(transcript_data: Dict) -> Dict:
+    """JSON-serializable transcript_data with words stored as columns"""
+    store = transcript_data['transcript']
+    return dict(
+        transcript_data,
+        transcript=store.to_columns(),
+        segments=[{key: value for key, value in segment.items() if key != 'words'}
+                  for segment in transcript_data['segments']],
+        segments_with_words=[index for index, segment in enumerate(transcript_data['segments'])
+                             if 'words' in segment],
+    )
+
+
+def unpack_transcript(packed: Dict) -> Dict:
+    """Inverse of pack_transcript()"""
+    store = WordStore.from_columns(packed['transcript'])
+    segments = packed['segments']
+    for index in packed.get('segments_with_words', []):
+        segments[index]['words'] = store.segment(index)
+    transcript_data = {key: value for key, value in packed.items() if key != 'segments_with_words'}
+    return dict(transcript_data, transcript=store, segments=segments)
+
+
+def legacy_transcript(transcript_data: Dict) -> Dict:
+    """transcript_data with plain word dict lists, as consumers outside the
+    pipeline (JSON APIs, saved metadata) expect it"""
+    store = transcript_data.get('transcript')
+    if not isinstance(store, WordStore):
+        return transcript_data
+    return dict(
+        transcript_data,
+        transcript=store.tolist(),
+        segments=[dict(segment, words=segment['words'].tolist()) if 'words' in segment else segment
+                  for segment in transcript_data['segments']],
+    )
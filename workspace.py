@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Job Workspace
+Per-job scratch directory for intermediate artifacts (decoded audio, features,
+checkpoints) shared by every pipeline stage
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Any
+
+
+def workspace_root() -> str:
+    return os.getenv('WORKSPACE_DIR', 'workspace')
+
+
+def to_json_safe(value):
+    """Convert numpy scalars/arrays in a Whisper result into plain Python types"""
+    if isinstance(value, dict):
+        return {k: to_json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_safe(v) for v in value]
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+class JobWorkspace:
+    """Directory holding one job's intermediate files"""
+
+    def __init__(self, job_id: str = None, root: str = None, keep: bool = False):
+        self.job_id = job_id or str(uuid.uuid4())
+        self.root = os.path.join(root or workspace_root(), self.job_id)
+        self.keep = keep
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        """Absolute path of a file inside the workspace"""
+        return os.path.abspath(os.path.join(self.root, name))
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.path(name))
+
+    def write_json(self, name: str, data: Any):
+        """Write JSON atomically so readers never see a partial file"""
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A unique temp file, so concurrent writers of the same name can't clobber each other's
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.",
+                                         suffix='.tmp', delete=False) as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f.name, path)
+
+    def read_json(self, name: str, default: Any = None) -> Any:
+        try:
+            with open(self.path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def cleanup(self):
+        """Delete the workspace unless it was created with keep=True"""
+        if not self.keep:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()